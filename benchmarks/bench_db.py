@@ -0,0 +1,196 @@
+"""Offline benchmark for db_manager and the task embeds.
+
+Seeds a local SQLite file with a synthetic catalog and thousands of tasks,
+then times the operations the bot runs on every command. No Discord or
+sqlitecloud connection is needed.
+
+Run from the repository root:
+    python benchmarks/bench_db.py [--tasks N] [--iterations N] [--output report.json] [--compare old.json]
+
+The JSON report records the commit, environment and parameters next to
+count, mean, p50/p95/p99 and operations per second for each benchmark, so
+reports from two commits can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import db_manager
+import embeds
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def use_local_database(path):
+    db_manager.configure_database({'backend': 'sqlite', 'path': path})
+
+def seed(rng, items, facilities, stockpiles, tasks, custom_tasks, users):
+    db_manager.bootstrap_database()
+    facility_rows = [(f"Facility {i}", f",fac{i},", "Player-built", f"http://example.invalid/facility{i}.png") for i in range(facilities)]
+    added_facilities = db_manager.add_facilities_to_db(facility_rows)
+    item_rows = [
+        (f"Item {i}", f",item{i},,i{i},", added_facilities[i % facilities].as_dict(), "yes", "yes", "10", "100", f"http://example.invalid/item{i}.png")
+        for i in range(items)
+    ]
+    added_items = db_manager.add_items_to_db(item_rows)
+
+    with db_manager.get_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO stockpiles (stockpile_name, stockpile_description, stockpile_location, stockpile_passcode) VALUES (?, ?, ?, ?)",
+            [(f"Stockpile {i}", "Synthetic stockpile", f"Region {i % 20}", 100000 + i) for i in range(stockpiles)]
+        )
+        cursor.executemany(
+            "INSERT INTO tasks (message_id, channel_id, item_id, amount, current_amount, facility_id, stockpile_id, created_by, thumbnail, status) VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, 'running')",
+            [(1000000 + i, 1000 + i % 5, added_items[i % items].id, rng.randint(10, 1000), added_facilities[i % facilities].id, 1 + i % stockpiles, str(rng.choice(users)), None)
+             for i in range(tasks)]
+        )
+        cursor.executemany(
+            "INSERT INTO custom_tasks (message_id, channel_id, task_header, task_location, task_description, created_by, status) VALUES (?, ?, ?, ?, ?, ?, 'running')",
+            [(2000000 + i, 1000 + i % 5, f"Custom task {i}", f"Region {i % 20}", "Synthetic custom task", str(rng.choice(users))) for i in range(custom_tasks)]
+        )
+        assignees = set()
+        for task_id in range(1, tasks + 1):
+            for user_id in rng.sample(users, 3):
+                assignees.add((task_id, db_manager.TASK_KIND, str(user_id)))
+        for task_id in range(1, custom_tasks + 1):
+            for user_id in rng.sample(users, 3):
+                assignees.add((task_id, db_manager.CUSTOM_TASK_KIND, str(user_id)))
+        cursor.executemany("INSERT INTO task_assignees (task_id, task_kind, user_id) VALUES (?, ?, ?)", sorted(assignees))
+    db_manager.load_catalog_cache()
+    return added_items, added_facilities
+
+# Swap two neighbouring characters, the most common autocomplete typo
+def typo(rng, term):
+    index = rng.randrange(len(term) - 1)
+    return term[:index] + term[index + 1] + term[index] + term[index + 2:]
+
+def measure(func, iterations):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    total = sum(samples)
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+    return {
+        "count": len(samples),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 2),
+        "p50_us": round(percentile(0.50) * 1e6, 2),
+        "p95_us": round(percentile(0.95) * 1e6, 2),
+        "p99_us": round(percentile(0.99) * 1e6, 2),
+        "ops_per_sec": round(len(samples) / total, 1) if total else None
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    rng = random.Random(args.seed)
+    users = [100000000000000000 + i for i in range(args.users)]
+    items, facilities = seed(rng, args.items, args.facilities, args.stockpiles, args.tasks, args.custom_tasks, users)
+    embeds.task_quotes = ["For the Navy!"]
+
+    item_terms = [term for item in items for term in (item.item_name, f"item{item.id - 1}")]
+    task_ids = list(range(1, args.tasks + 1))
+    custom_task_ids = list(range(1, args.custom_tasks + 1))
+    prefetched_tasks = [db_manager.get_task(task_id) for task_id in rng.sample(task_ids, min(200, len(task_ids)))]
+    prefetched_custom_tasks = [db_manager.get_custom_task(task_id) for task_id in rng.sample(custom_task_ids, min(200, len(custom_task_ids)))]
+
+    benchmarks = {
+        "get_item_from_db": lambda i: db_manager.get_item_from_db(rng.choice(item_terms)),
+        "get_facility_from_db": lambda i: db_manager.get_facility_from_db(f"fac{rng.randrange(args.facilities)}"),
+        "get_stockpile_from_db": lambda i: db_manager.get_stockpile_from_db(f"stockpile {rng.randrange(args.stockpiles)}"),
+        "search_items": lambda i: db_manager.search_items(f"item {rng.randrange(args.items)}"[:rng.randint(3, 8)]),
+        "search_items_typo": lambda i: db_manager.search_items(typo(rng, f"item {rng.randrange(args.items)}")),
+        "get_all_items": lambda i: db_manager.get_all_items(),
+        "get_task": lambda i: db_manager.get_task(rng.choice(task_ids)),
+        "get_custom_task": lambda i: db_manager.get_custom_task(rng.choice(custom_task_ids)),
+        "create_task": lambda i: db_manager.create_task(rng.choice(items).id, 100, rng.choice(facilities).id, 1, str(rng.choice(users)), [], None),
+        "add_task_progress": lambda i: db_manager.add_task_progress(rng.choice(task_ids), 1),
+        "toggle_task_assignee": lambda i: db_manager.toggle_task_assignee(db_manager.TASK_KIND, rng.choice(task_ids), str(rng.choice(users))),
+        "task_embed": lambda i: embeds.task_embed(prefetched_tasks[i % len(prefetched_tasks)]),
+        "custom_task_embed": lambda i: embeds.custom_task_embed(prefetched_custom_tasks[i % len(prefetched_custom_tasks)]),
+    }
+    if args.only:
+        benchmarks = {name: func for name, func in benchmarks.items() if name in args.only}
+
+    results = {}
+    for name, func in benchmarks.items():
+        iterations = max(1, args.iterations // 10) if name == "get_all_items" else args.iterations
+        results[name] = measure(func, iterations)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "parameters": {name: getattr(args, name) for name in ("items", "facilities", "stockpiles", "tasks", "custom_tasks", "users", "iterations", "seed")}
+        },
+        "results": results
+    }
+
+def print_report(report, baseline=None):
+    print(f"{'benchmark':<24} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10} {'ops/s':>12}" + ("  p50 vs baseline" if baseline else ""))
+    for name, stats in report["results"].items():
+        line = f"{name:<24} {stats['p50_us']:>10.1f} {stats['p95_us']:>10.1f} {stats['p99_us']:>10.1f} {stats['ops_per_sec'] or 0:>12.1f}"
+        previous = baseline["results"].get(name) if baseline else None
+        if previous and previous["p50_us"]:
+            line += f"  {stats['p50_us'] / previous['p50_us']:.2f}x"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="new SQLite file to seed and keep (default: a temporary file, deleted afterwards)")
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--facilities", type=int, default=40)
+    parser.add_argument("--stockpiles", type=int, default=60)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--custom-tasks", type=int, default=500)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", nargs="*", help="run just these benchmarks")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="JSON report from an earlier run to compare p50 against")
+    args = parser.parse_args()
+
+    # Seeding wipes the tables, so never point it at a file that might be a real database
+    if args.db and os.path.exists(args.db):
+        parser.error(f"{args.db} already exists - pass a path to a new file")
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="vk_bench_"), "bench.db")
+    use_local_database(path)
+    try:
+        report = run(args)
+    finally:
+        db_manager.close_pool()
+        if not args.db:
+            os.remove(path)
+            os.rmdir(os.path.dirname(path))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
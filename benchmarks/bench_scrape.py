@@ -0,0 +1,123 @@
+"""Micro-benchmark for scraphauler's page extraction.
+
+Compares the streaming FieldParser extraction with the full BeautifulSoup
+parse scraphauler used before, reporting per-page CPU time and peak memory.
+
+Pages are read from benchmarks/fixtures/*.html. Save real wiki pages there
+(e.g. https://foxhole.wiki.gg/Basic_Materials?action=pagevalues) to measure
+them. When the folder has none, two synthetic pages shaped like a pagevalues
+page are generated instead: one with the infobox near the top, where the
+streaming parser can stop early, and one with it after the long values
+table, where it has to read the whole page like BeautifulSoup does.
+
+Run from the repository root:
+    python benchmarks/bench_scrape.py [--iterations N] [--json]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scraphauler
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def synthetic_page(rows=1500, infobox_last=False):
+    # Navigation and sidebar first, the infobox with the scraped fields, then the long pagevalues table
+    # (or the table first with infobox_last, the streaming parser's worst case)
+    nav = "".join(f'<li class="nav-item"><a href="/wiki/Page_{i}" title="Page {i}">Page {i}</a></li>' for i in range(400))
+    infobox = (
+        '<table class="infobox"><tr><td><a href="/wiki/File:Basic_Materials.png" class="image">'
+        '<img alt="" src="/images/thumb/Basic_Materials.png/64px-Basic_Materials.png" class="thumbimage" width="64" height="64"></a></td></tr>'
+        '<tr><th>Cost</th><td><span class="price">10 <span class="resource">Salvage</span></span></td></tr>'
+        '<tr><th>Produced at</th><td><span class="factory">Refinery</span></td></tr>'
+        '<tr><th>Used in</th><td><span class="madeof">Salvage &amp; Components</span></td></tr></table>'
+    )
+    values = "".join(
+        f'<tr><td class="field">Field_{i}</td><td class="type">String</td><td class="value">Value number {i} with some text</td></tr>'
+        for i in range(rows)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="UTF-8"><title>Basic Materials</title></head><body>'
+        f'<div id="mw-navigation"><ul>{nav}</ul></div>'
+        f'<div id="content"><div class="mw-parser-output">'
+        + (f'<table class="wikitable pagevalues">{values}</table>{infobox}' if infobox_last
+           else f'{infobox}<table class="wikitable pagevalues">{values}</table>')
+        + '</div></div></body></html>'
+    ).encode("utf-8")
+
+def load_pages():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+    if not pages:
+        pages["synthetic, infobox first"] = synthetic_page()
+        pages["synthetic, infobox last"] = synthetic_page(infobox_last=True)
+    return pages
+
+# The BeautifulSoup extraction scraphauler used before the streaming parser
+def soup_extract(content):
+    soup = BeautifulSoup(content, "html.parser")
+    img_tag = soup.find("img", {"class": ["thumbimage", "thumbinner"]})
+    price_tag = soup.find("span", {"class": "price"})
+    factory_tag = soup.find("span", {"class": "factory"})
+    madeof_tag = soup.find("span", {"class": "madeof"})
+    return {
+        "image_url": f"{scraphauler.BASE_URL}{img_tag['src']}" if img_tag else None,
+        "price": price_tag.text if price_tag else "No price found",
+        "factory": factory_tag.text if factory_tag else "No factory found",
+        "madeof": madeof_tag.text if madeof_tag else "No materials found"
+    }
+
+def measure(extract, content, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        extract(content)
+    cpu_ms = (time.process_time() - started) * 1000 / iterations
+
+    tracemalloc.start()
+    extract(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"cpu_ms": round(cpu_ms, 3), "peak_kib": round(peak / 1024, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for name, content in load_pages().items():
+        if soup_extract(content) != scraphauler.extract_fields(content):
+            print(f"{name}: extractors disagree, skipping", file=sys.stderr)
+            continue
+        soup = measure(soup_extract, content, args.iterations)
+        streaming = measure(scraphauler.extract_fields, content, args.iterations)
+        results.append({
+            "page": name,
+            "size_kib": round(len(content) / 1024, 1),
+            "beautifulsoup": soup,
+            "streaming": streaming,
+            "cpu_speedup": round(soup["cpu_ms"] / max(streaming["cpu_ms"], 0.001), 1),
+            "memory_reduction": round(soup["peak_kib"] / max(streaming["peak_kib"], 0.1), 1)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for result in results:
+        print(f"{result['page']} ({result['size_kib']} KiB)")
+        for label in ("beautifulsoup", "streaming"):
+            print(f"  {label:<14} {result[label]['cpu_ms']:>9.3f} ms CPU  {result[label]['peak_kib']:>9.1f} KiB peak")
+        print(f"  {result['cpu_speedup']}x less CPU, {result['memory_reduction']}x less memory")
+
+if __name__ == "__main__":
+    main()
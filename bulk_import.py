@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import logging
+import time
+
+import db_async
+import db_manager
+import scraphauler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4 # Pages scraped at the same time
+DEFAULT_RATE = 2.0 # Wiki requests started per second at most
+PROGRESS_EVERY = 10 # Report progress after this many pages
+
+ITEMS = "items"
+FACILITIES = "facilities"
+
+class RateLimiter:
+    """Spaces out request starts so no more than `rate` begin per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class ImportReport:
+    """Running totals of a bulk import, used for progress and the final summary."""
+
+    def __init__(self, kind, names):
+        self.kind = kind
+        self.requested = len(names)
+        self.skipped = [] # Names already in the catalog
+        self.failed = [] # (name, reason) pairs
+        self.scraped = 0
+        self.added = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self):
+        return self.scraped / self.elapsed if self.elapsed else 0.0
+
+    def progress_line(self):
+        pending = self.requested - len(self.skipped)
+        done = self.scraped + len(self.failed)
+        return f"Importing {self.kind}: {done}/{pending} pages scraped, {len(self.failed)} failed ({self.throughput:.1f} pages/s)"
+
+    def summary(self):
+        lines = [
+            f"Imported {self.added} {self.kind} in {self.elapsed:.1f}s ({self.throughput:.1f} pages/s).",
+            f"Requested {self.requested}, already in the catalog {len(self.skipped)}, scraped {self.scraped}, failed {len(self.failed)}."
+        ]
+        for name, reason in self.failed:
+            lines.append(f"- {name}: {reason}")
+        return "\n".join(lines)
+
+def unique_names(names):
+    # Drop blanks and case-insensitive repeats, keeping the first spelling
+    seen = set()
+    result = []
+    for name in names:
+        name = name.strip()
+        key = db_manager.normalize_term(name)
+        if name and key not in seen:
+            seen.add(key)
+            result.append(name)
+    return result
+
+async def _catalog_row(kind, name, page, facility_type):
+    if kind == ITEMS:
+        # Link the production facility the wiki names, if it is in the catalog - /get_item reads
+        # facility_name from the stored object, so an unknown facility is stored as an empty one
+        facility = await db_async.get_facility_from_db(page["factory"]) or {}
+        return (name, "", facility, None, None, None, None, page["image_url"])
+    return (name, "", facility_type, page["image_url"])
+
+async def _report_progress(progress, report):
+    # Progress is cosmetic - a failed update (e.g. an expired interaction token) must not abort the import
+    try:
+        await progress(report)
+    except Exception as e:
+        logger.warning(f"Could not report {report.kind} import progress: {e}")
+
+async def run_import(kind, names, workers=DEFAULT_WORKERS, rate=DEFAULT_RATE, facility_type=None, progress=None):
+    """Scrape `names` from the wiki and add them to the catalog in one transaction.
+
+    `progress` is an optional coroutine function called with the report every
+    few pages and once more when scraping ends.
+    """
+    names = unique_names(names)
+    report = ImportReport(kind, names)
+    lookup = db_async.get_item_from_db if kind == ITEMS else db_async.get_facility_from_db
+
+    queue = asyncio.Queue()
+    for name in names:
+        if await lookup(name):
+            report.skipped.append(name)
+        else:
+            queue.put_nowait(name)
+
+    limiter = RateLimiter(rate)
+    cache = scraphauler.get_cache()
+    rows = []
+
+    async def worker():
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Fresh cache hits never reach the wiki, so only real requests wait for the rate limit
+            entry = cache.peek(name)
+            if not (entry and entry["fresh"]):
+                await limiter.wait()
+            page = await scraphauler.scrape_page(name)
+            if isinstance(page, str):
+                report.failed.append((name, page))
+            else:
+                rows.append(await _catalog_row(kind, name, page, facility_type))
+                report.scraped += 1
+            done = report.scraped + len(report.failed)
+            if progress and done % PROGRESS_EVERY == 0:
+                await _report_progress(progress, report)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        if progress:
+            await _report_progress(progress, report)
+    finally:
+        # Keep every page scraped so far, even if the scraping was interrupted
+        if rows:
+            added = await (db_async.add_items_to_db(rows) if kind == ITEMS else db_async.add_facilities_to_db(rows))
+            report.added = len(added)
+        report.finished = time.perf_counter()
+    logger.info(report.summary())
+    return report
+
+async def _main(args):
+    names = list(args.names or [])
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            names.extend(f.read().splitlines())
+    try:
+        if args.category:
+            names.extend(await scraphauler.category_members(args.category))
+
+        async def print_progress(report):
+            print(report.progress_line(), flush=True)
+
+        report = await run_import(args.kind, names, args.workers, args.rate, args.facility_type, print_progress)
+        print(report.summary())
+    finally:
+        await scraphauler.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape items or facilities from the Foxhole wiki into the catalog.")
+    parser.add_argument("kind", choices=[ITEMS, FACILITIES])
+    parser.add_argument("names", nargs="*", help="page names to import")
+    parser.add_argument("--file", help="file with one page name per line")
+    parser.add_argument("--category", help="import every page in this wiki category")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="wiki requests per second")
+    parser.add_argument("--facility-type", default=None, help="facility type stored for imported facilities")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db_manager.bootstrap_database()
+    try:
+        asyncio.run(_main(args))
+    finally:
+        db_async.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import db_manager
+
+# One worker per pooled connection, so queued calls wait here instead of blocking inside the pool
+_executor = ThreadPoolExecutor(max_workers=db_manager.POOL_SIZE, thread_name_prefix="db_worker")
+
+WRITE_BATCH_WINDOW = 0.05 # Seconds task mutations wait for others to share their transaction
+WRITE_BATCH_MAX = 200 # Mutations that flush a batch early, without waiting for the window
+
+# Run a blocking db_manager call on the database workers and await its result
+async def run(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def _awaitable(name):
+    # The function is looked up on every call so wrappers applied to db_manager later still take effect
+    async def wrapper(*args, **kwargs):
+        return await run(getattr(db_manager, name), *args, **kwargs)
+    wrapper.__name__ = wrapper.__qualname__ = name
+    wrapper.__doc__ = getattr(db_manager, name).__doc__
+    return wrapper
+
+class TaskWriteBatcher:
+    """Write-behind queue for task mutations from buttons and modals.
+
+    Mutations arriving within `window` seconds of the first one are applied
+    together in one transaction. Each caller awaits its own result, which is
+    only set after the batch has committed; a failed batch raises in every
+    caller. Batches are applied one at a time in arrival order.
+    """
+
+    def __init__(self, window=WRITE_BATCH_WINDOW, max_batch=WRITE_BATCH_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+
+    async def submit(self, mutation):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((mutation, future))
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                results = await run(db_manager.apply_task_mutations, [mutation for mutation, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+_task_writes = TaskWriteBatcher()
+
+# Batched replacements for db_manager.add_task_progress and toggle_task_assignee
+async def add_task_progress(task_id, amount):
+    return await _task_writes.submit((db_manager.PROGRESS_MUTATION, task_id, amount))
+
+async def toggle_task_assignee(task_kind, task_id, user_id):
+    return await _task_writes.submit((db_manager.TOGGLE_MUTATION, task_kind, task_id, user_id))
+
+# Apply queued task mutations now; call before the event loop stops
+async def flush_writes():
+    await _task_writes.flush()
+
+def shutdown():
+    _executor.shutdown(wait=True)
+    db_manager.close_pool()
+
+#--Schema--
+run_migrations = _awaitable('run_migrations')
+bootstrap_database = _awaitable('bootstrap_database')
+check_database_health = _awaitable('check_database_health')
+load_catalog_cache = _awaitable('load_catalog_cache')
+
+#--Items, facilities and stockpiles--
+add_item_to_db = _awaitable('add_item_to_db')
+add_facility_to_db = _awaitable('add_facility_to_db')
+add_stockpile_to_db = _awaitable('add_stockpile_to_db')
+add_items_to_db = _awaitable('add_items_to_db')
+add_facilities_to_db = _awaitable('add_facilities_to_db')
+get_item_from_db = _awaitable('get_item_from_db')
+get_facility_from_db = _awaitable('get_facility_from_db')
+get_stockpile_from_db = _awaitable('get_stockpile_from_db')
+get_item_by_name = _awaitable('get_item_by_name')
+get_facility_by_name = _awaitable('get_facility_by_name')
+get_stockpile_by_name = _awaitable('get_stockpile_by_name')
+get_all_items = _awaitable('get_all_items')
+get_all_facilities = _awaitable('get_all_facilities')
+update_item = _awaitable('update_item')
+update_stockpile = _awaitable('update_stockpile')
+delete_item_by_name = _awaitable('delete_item_by_name')
+delete_stockpile_by_name = _awaitable('delete_stockpile_by_name')
+purge_stockpiles = _awaitable('purge_stockpiles')
+export_catalog = _awaitable('export_catalog')
+import_catalog = _awaitable('import_catalog')
+
+#--Tasks--
+create_task = _awaitable('create_task')
+create_custom_task = _awaitable('create_custom_task')
+get_task = _awaitable('get_task')
+get_custom_task = _awaitable('get_custom_task')
+get_all_tasks = _awaitable('get_all_tasks')
+get_all_custom_tasks = _awaitable('get_all_custom_tasks')
+get_all_task_messages = _awaitable('get_all_task_messages')
+get_task_message = _awaitable('get_task_message')
+get_custom_task_message = _awaitable('get_custom_task_message')
+save_task_message = _awaitable('save_task_message')
+save_custom_task_message = _awaitable('save_custom_task_message')
+update_task_message_id = _awaitable('update_task_message_id')
+update_task_message_ids = _awaitable('update_task_message_ids')
+update_custom_task_message_id = _awaitable('update_custom_task_message_id')
+update_task_progress = _awaitable('update_task_progress')
+update_task_status = _awaitable('update_task_status')
+count_open_tasks = _awaitable('count_open_tasks')
+add_user_to_task = _awaitable('add_user_to_task')
+add_user_to_custom_task = _awaitable('add_user_to_custom_task')
+get_task_assignees = _awaitable('get_task_assignees')
+get_user_tasks = _awaitable('get_user_tasks')
+close_task = _awaitable('close_task')
+close_custom_task = _awaitable('close_custom_task')
+purge_tasks = _awaitable('purge_tasks')
+purge_custom_tasks = _awaitable('purge_custom_tasks')
@@ -1,726 +1,1373 @@
-import sqlite3
-import sqlitecloud
-import json
-import logging
-
-logger = logging.getLogger(__name__)
-
-# Function to connect to the database
-def connect_db():
-	try:	
-		conn = sqlitecloud.connect("veliankeeper.db")
-		return conn
-	except Exception as e:
-		logger.error(f"Error connecting to the database: {e}")
-		return None
-
-# Function to create a table for items (run this when bot starts)
-def create_item_table():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute('''CREATE TABLE IF NOT EXISTS items (
-						id INTEGER PRIMARY KEY,
-						item_name TEXT,
-						item_aliases TEXT,
-						facilities TEXT,
-						can_be_crated TEXT,
-						can_be_palleted TEXT,
-						crate_size TEXT,
-						pallet_size TEXT,
-						image_url TEXT
-					)''')
-	conn.commit()
-	conn.close()
-	
-def create_facility_table():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute('''CREATE TABLE IF NOT EXISTS facilities (
-						id INTEGER PRIMARY KEY,
-						facility_name TEXT,
-						facility_aliases TEXT,
-						facility_type TEXT,
-						image_url TEXT
-						)''')
-	conn.commit()
-	conn.close()
-	
-def create_stockpile_table():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute('''CREATE TABLE IF NOT EXISTS stockpiles (
-						id INTEGER PRIMARY KEY,
-						stockpile_name TEXT,
-						stockpile_description TEXT,
-						stockpile_location TEXT,
-						stockpile_passcode INTEGER
-						)''')
-	conn.commit()
-	conn.close()
-	
-def create_tasks_table():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute('''CREATE TABLE IF NOT EXISTS tasks (
-						id INTEGER PRIMARY KEY,
-						message_id INTEGER,
-						channel_id INTEGER,
-						item_id TEXT,
-						amount INTEGER,
-						current_amount INTEGER DEFAULT 0,
-						facility_id TEXT,
-						stockpile_id TEXT,
-						created_by TEXT,
-						assigned_users TEXT,
-						thumbnail TEXT,
-						status TEXT
-						)''')
-	conn.commit()
-	conn.close()
-
-def create_custom_tasks_table():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute('''CREATE TABLE IF NOT EXISTS custom_tasks (
-						id INTEGER PRIMARY KEY,
-						message_id INTEGER,
-						channel_id INTEGER,
-						task_header TEXT,
-						task_location TEXT,
-						task_description TEXT,
-						created_by TEXT,
-						assigned_users TEXT,
-						status TEXT
-						)''')
-	conn.commit()
-	conn.close()
-
-def get_all_task_messages():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT task_id FROM tasks")
-	return cursor.fetchall()
-
-# Function to add an item to the database
-def add_item_to_db(item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url):
-	conn = connect_db()
-	cursor = conn.cursor()
-	item_aliases_json = json.dumps(item_aliases)
-	facilities_json = json.dumps(facilities)
-	cursor.execute("INSERT INTO items (item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", 
-					(item_name, item_aliases_json, facilities_json, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url))
-	conn.commit()
-	conn.close()
-	
-#Add facility to database
-def add_facility_to_db(facility_name, facility_aliases, facility_type, image_url):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("INSERT INTO facilities (facility_name, facility_aliases, facility_type, image_url) VALUES (?, ?, ?, ?)",
-					(facility_name, facility_aliases, facility_type, image_url))
-	conn.commit()
-	conn.close()
-	
-def add_stockpile_to_db(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("INSERT INTO stockpiles (stockpile_name, stockpile_description, stockpile_location, stockpile_passcode) VALUES (?, ?, ?, ?)",
-					(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode))
-	conn.commit()
-	conn.close()
-
-def get_facility_from_db(facility_name):
-	conn = connect_db()
-	cursor = conn.cursor()
-	
-	# Check if the search term matches either the facility name or any alias
-	query= '''SELECT * FROM facilities 
-					WHERE facility_name = ? 
-					OR ',' || facility_aliases || ',' LIKE ?
-	'''
-	
-	search_with_commas = f',{facility_name},'
-	cursor.execute(query, (facility_name, f'%{search_with_commas}%'))
-
-	result = cursor.fetchone()
-	conn.close()
-
-	if result:
-		return {
-			'id' : result[0],
-			'facility_name': result[1],  # Name
-			'facility_aliases': result[2], #Alias
-			'facility_type': result[3],  # #Type
-			'image_url': result[4]  # Image
-		}
-	return None
-
-
-# Function to retrieve an item from the database (for testing)
-def get_item_from_db(item_name):
-	conn = connect_db()
-	cursor = conn.cursor()
-	
-	query= '''SELECT * FROM items 
-					WHERE item_name = ? 
-					OR ',' || item_aliases || ',' LIKE ?
-	'''
-	
-	search_with_commas = f',{item_name},'
-	cursor.execute(query, (item_name, f'%{search_with_commas}%'))
-	
-	result = cursor.fetchone()
-	conn.close()
-	
-	#Return query as dictionary
-	if result:
-		return {
-			'id' : result[0],
-			'item_name': result[1],
-			'item_aliases': result[2],
-			'facilities': result[3],
-			'can_be_crated': result[4],
-			'can_be_palleted': result[5],
-			'crate_size': result[6],
-			'pallet_size': result[7],
-			'image_url': result[8],
-		}
-	return None
-	
-#Retrieve stockpile from database
-def get_stockpile_from_db(stockpile_name):
-	conn = connect_db()
-	cursor = conn.cursor()
-	
-	query= '''SELECT * FROM stockpiles 
-					WHERE stockpile_name = ? 
-	'''
-	
-	cursor.execute(query, (stockpile_name,))
-
-	result = cursor.fetchone()
-	conn.close()
-
-	if result:
-		return {
-			'id' : result[0],
-			'stockpile_name': result[1],
-			'stockpile_description': result[2],
-			'stockpile_location': result[3],
-			'stockpile_passcode': result[4]
-		}
-	return None
-	
-def create_task(item_id, amount, facility_id, stockpile_id, created_by, assigned_users, thumbnail):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO tasks (item_id, amount, current_amount, facility_id, stockpile_id, created_by, assigned_users, thumbnail, status)
-        VALUES (?, ?, 0, ?, ?, ?, ?, ?, 'running')
-    """, (item_id, amount, facility_id, stockpile_id, created_by, json.dumps(assigned_users), thumbnail))
-    task_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return task_id
-
-def create_custom_task(task_header, task_description, task_location, created_by, assigned_users):
-    conn = connect_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO custom_tasks (task_header, task_description, task_location, created_by, assigned_users)
-            VALUES (?, ?, ?, ?, ?)
-        """, (task_header, task_description, task_location, created_by, json.dumps(assigned_users)))
-        task_id = cursor.lastrowid
-        conn.commit()
-        return task_id
-    except Exception as e:
-        print(f"Error creating custom task: {e}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
-
-def save_task_message(task_id, message_id, channel_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("""
-		UPDATE tasks
-		SET message_id = ?, channel_id = ?
-		WHERE id = ?
-	""", (message_id, channel_id, task_id))
-	conn.commit()
-	conn.close()
-	
-def save_custom_task_message(task_id, message_id, channel_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("""
-		UPDATE custom_tasks
-		SET message_id = ?, channel_id = ?
-		WHERE id = ?
-	""", (message_id, channel_id, task_id))
-	conn.commit()
-	conn.close()
-
-
-def add_user_to_task(task_id, user_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    # Get the current assigned users from the task
-    cursor.execute("SELECT assigned_users FROM tasks WHERE id = ?", (task_id,))
-    result = cursor.fetchone()
-    
-    if result and result[0]:
-        assigned_users = json.loads(result[0])
-    else:
-        assigned_users = []
-
-    # Add the user to the list if not already there
-    if str(user_id) not in assigned_users:
-        assigned_users.append(str(user_id))
-
-    # Update the task with the new list of assigned users
-    cursor.execute(
-        "UPDATE tasks SET assigned_users = ? WHERE id = ?",
-        (json.dumps(assigned_users), task_id)
-    )
-    conn.commit()
-    conn.close()
-
-def add_user_to_custom_task(task_id, user_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT assigned_users FROM custom_tasks WHERE id = ?", (task_id,))
-    result = cursor.fetchone()
-    
-    if result and result[0]:
-        assigned_users = json.loads(result[0])
-    else:
-        assigned_users = []
-
-    if str(user_id) not in assigned_users:
-        assigned_users.append(str(user_id))
-
-    cursor.execute(
-        "UPDATE custom_tasks SET assigned_users = ? WHERE id = ?",
-        (json.dumps(assigned_users), task_id)
-    )
-    conn.commit()
-    conn.close()
-
-def close_task(task_id):
-    try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        conn.commit()
-        conn.close()
-        logger.info(f"Task {task_id} deleted from the database")
-    except Exception as e:
-        logger.error(f"Error deleting task {task_id} from the database: {str(e)}")
-        raise
-
-def close_custom_task(task_id):
-	try:
-		conn = connect_db()
-		cursor = conn.cursor()
-		cursor.execute("DELETE FROM custom_tasks WHERE id = ?", (task_id,))
-		conn.commit()
-		conn.close()
-		logger.info(f"Task {task_id} deleted from the database")
-	except Exception as e:	
-		logger.error(f"Error deleting task {task_id} from the database: {str(e)}")
-		raise
-
-def get_task(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	
-	query= '''SELECT * FROM tasks 
-					WHERE id = ? 
-	'''
-	
-	cursor.execute(query, (task_id,))
-
-	result = cursor.fetchall()
-	conn.close()
-
-	if result:
-		return {
-			'id' : result[0],
-		}
-	return None
-
-def get_custom_task(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	
-	query= '''SELECT * FROM custom_tasks 
-					WHERE id = ? 
-	'''	
-	
-	cursor.execute(query, (task_id,))
-
-	result = cursor.fetchall()
-	conn.close()
-
-	if result:
-		return {
-			'id' : result[0],
-		}	
-	return None
-
-def purge_tasks():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("DELETE FROM tasks")
-	conn.commit()
-	conn.close()
-	
-def purge_custom_tasks():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("DELETE FROM custom_tasks")
-	conn.commit()
-	conn.close()
-
-def purge_stockpiles():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("DELETE FROM stockpiles")
-	conn.commit()
-	conn.close()
-
-async def save_task_message(task_id, message_id, channel_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("""
-		UPDATE tasks
-		SET message_id = ?, channel_id = ?
-		WHERE id = ?
-	""", (message_id, channel_id, task_id))
-	conn.commit()
-	conn.close()
-	
-async def save_custom_task_message(task_id, message_id, channel_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE custom_tasks
-        SET message_id = ?, channel_id = ?
-        WHERE id = ?
-    """, (message_id, channel_id, task_id))
-    conn.commit()
-    conn.close()
-
-async def update_task_message_id(task_id, message_id):
-	conn = connect_db()	
-	cursor = conn.cursor()
-	cursor.execute("UPDATE tasks SET message_id = ? WHERE id = ?", (message_id, task_id))
-	conn.commit()
-
-async def update_custom_task_message_id(task_id, message_id):
-	conn = connect_db()	
-	cursor = conn.cursor()
-	cursor.execute("UPDATE custom_tasks SET message_id = ? WHERE id = ?", (message_id, task_id))
-	conn.commit()
-	conn.close()
-
-async def get_task_message(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT message_id, channel_id FROM tasks WHERE task_id = ?", (task_id,))
-	result = cursor.fetchone()
-	if result:
-		return {'message_id': result[0], 'channel_id': result[1]}
-	return None
-
-async def get_custom_task_message(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT message_id, channel_id FROM custom_tasks WHERE task_id = ?", (task_id,))
-	result = cursor.fetchone()
-	if result:
-		return {'message_id': result[0], 'channel_id': result[1]}
-	return None
-
-def get_all_tasks():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT id, message_id, channel_id FROM tasks")
-	tasks = cursor.fetchall()
-	conn.close()
-	return tasks
-
-def get_all_custom_tasks():
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT id, message_id, channel_id FROM custom_tasks")
-	tasks = cursor.fetchall()
-	conn.close()
-	return tasks
-
-def get_task(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT * FROM tasks WHERE id = ?", (task_id,))
-	task = cursor.fetchone()
-	conn.close()
-	if task:
-		return {
-			'id': task[0],
-			'message_id': task[1],
-			'channel_id': task[2],
-			'item_id': task[3],
-			'amount': task[4],
-			'current_amount': task[5],
-			'facility_id': task[6],
-			'stockpile_id': task[7],
-			'created_by': task[8],
-			'assigned_users': task[9],
-			'thumbnail': task[10],
-			'status': task[11]
-		}
-	return None
-
-def get_custom_task(task_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("SELECT * FROM custom_tasks WHERE id = ?", (task_id,))
-	task = cursor.fetchone()
-	conn.close()
-	if task:
-		return {
-			'id': task[0],
-			'message_id': task[1],
-			'channel_id': task[2],
-			'task_header': task[3],
-			'task_description': task[4],
-			'task_location': task[5],
-			'created_by': task[6],
-			'assigned_users': task[7],
-			'status': task[8]
-		}
-	return None
-
-def update_task_message_id(task_id, message_id):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("UPDATE tasks SET message_id = ? WHERE id = ?", (message_id, task_id))
-	conn.commit()
-	conn.close()
-
-def update_task_progress(task_id, new_amount):
-	conn = connect_db()
-	cursor = conn.cursor()
-	cursor.execute("UPDATE tasks SET current_amount = ? WHERE id = ?", (new_amount, task_id))
-	conn.commit()
-	conn.close()
-	logger.info(f"Updated task {task_id} progress to {new_amount}")
-
-def get_task(task_id):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT t.*, i.item_name, f.facility_name, s.stockpile_name
-        FROM tasks t
-        JOIN items i ON t.item_id = i.id
-        JOIN facilities f ON t.facility_id = f.id
-        JOIN stockpiles s ON t.stockpile_id = s.id
-        WHERE t.id = ?
-    """, (task_id,))
-    task = cursor.fetchone()
-    conn.close()
-    if task:
-        task_dict = {
-            'id': task[0],
-            'message_id': task[1],
-            'channel_id': task[2],
-            'item_id': task[3],
-            'amount': task[4],
-            'current_amount': task[5],
-            'facility_id': task[6],
-            'stockpile_id': task[7],
-            'created_by': task[8],
-            'assigned_users': task[9],
-            'thumbnail': task[10],
-            'status': task[11],
-            'item_name': task[12],
-            'facility_name': task[13],
-            'stockpile_name': task[14]
-        }
-        logger.info(f"Retrieved task: {task_dict}")
-        return task_dict
-    logger.warning(f"No task found with id {task_id}")
-    return None
-
-def check_database_health():
-    try:
-        conn = sqlite3.connect('main_data.db', timeout=10)
-        cursor = conn.cursor()
-        
-        # Try to perform a simple query
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        # Check if we can write to the database
-        cursor.execute("CREATE TABLE IF NOT EXISTS health_check (id INTEGER PRIMARY KEY);")
-        cursor.execute("INSERT INTO health_check (id) VALUES (1);")
-        cursor.execute("DELETE FROM health_check WHERE id = 1;")
-        
-        conn.commit()
-        conn.close()
-        
-        logger.info("Database health check passed. Database is accessible and writable.")
-        return True
-    except sqlite3.Error as e:
-        if 'database is locked' in str(e):
-            logger.error("Database health check failed: Database is locked. Please close any other connections and restart.")
-        elif 'unable to open database file' in str(e):
-            logger.error("Database health check failed: Unable to open database file. Check file permissions and path.")
-        else:
-            logger.error(f"Database health check failed: {str(e)}")
-        return False
-
-def update_task_assigned_users(task_id, assigned_users):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE tasks SET assigned_users = ? WHERE id = ?",
-        (assigned_users, task_id)
-    )
-    conn.commit()
-    conn.close()
-
-def update_custom_task_assigned_users(task_id, assigned_users):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "UPDATE custom_tasks SET assigned_users = ? WHERE id = ?",
-        (assigned_users, task_id)
-    )	
-    conn.commit()
-    conn.close()
-	
-def update_task_status(task_id, status):
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
-    conn.commit()
-    conn.close()
-
-def update_item(item):
-    conn = connect_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            UPDATE items
-            SET item_name = ?, item_aliases = ?, can_be_crated = ?, can_be_palleted = ?, 
-                crate_size = ?, pallet_size = ?, facilities = ?, image_url = ?
-            WHERE id = ?
-        """, (item['item_name'], item['item_aliases'], item['can_be_crated'], item['can_be_palleted'],
-              item['crate_size'], item['pallet_size'], item['facilities'], item['image_url'], item['id']))
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"Error updating item: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-        
-def update_stockpile(stockpile):
-    conn = connect_db()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("""
-            UPDATE stockpiles
-            SET stockpile_name = ?, stockpile_description = ?, stockpile_location = ?, stockpile_passcode = ?
-            WHERE id = ?
-        """, (stockpile['stockpile_name'], stockpile['stockpile_description'], stockpile['stockpile_location'], stockpile['stockpile_passcode'],
-              stockpile['id']))
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"Error updating stockpile: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
-
-def get_item_by_name(item_name):
-    """Check if the item exists in the database."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM items WHERE item_name = ?", (item_name,))
-    item = cursor.fetchone()
-
-    conn.close()
-
-    return item
-
-def get_stockpile_by_name(stockpile_name):
-    """Check if stockpile exists in the database."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM stockpiles WHERE stockpile_name = ?", (stockpile_name,))
-    item = cursor.fetchone()
-
-    conn.close()
-
-    return item
-
-def delete_item_by_name(item_name):
-    """Delete an item from the database by its name."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM items WHERE item_name = ?", (item_name,))
-    conn.commit()
-
-    conn.close()
-
-def delete_stockpile_by_name(stockpile_name):
-    """Delete stockpile from the database by its name."""
-    conn = connect_db()
-    cursor = conn.cursor()
-
-    cursor.execute("DELETE FROM stockpiles WHERE stockpile_name = ?", (stockpile_name,))
-    conn.commit()
-
-    conn.close()
-
-def parse_aliases(aliases_str):
-    if not aliases_str:
-        return []
-    try:
-        aliases = json.loads(aliases_str)
-        if isinstance(aliases, list):
-            return aliases
-        elif isinstance(aliases, str):
-            return [aliases]
-        else:
-            return []
-    except json.JSONDecodeError:
-        return [aliases_str]  # Treat the whole string as a single alias if it's not valid JSON
-
-def get_all_items():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT item_name, item_aliases FROM items")
-    items = cursor.fetchall()
-    conn.close()
-
-    return [{'name': item[0], 'aliases': parse_aliases(item[1])} for item in items]
-
-def get_all_facilities():
-    conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT facility_name, facility_aliases FROM facilities")
-    facilities = cursor.fetchall()
-    conn.close()
-
-    return [{'name': facility[0], 'aliases': parse_aliases(facility[1])} for facility in facilities]
+import sqlite3
+import sqlitecloud
+import json
+import logging
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+import lz4.frame
+
+from search_index import SearchIndex, MAX_RESULTS
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 5 # Maximum number of open database connections
+POOL_CHECKOUT_TIMEOUT = 10 # Seconds to wait for a free connection before giving up
+HEALTH_CHECK_INTERVAL = 60 # Idle connections older than this are pinged before reuse
+
+#--Storage backends--
+# Defaults for the "database" section of vkeeper_config.json
+DEFAULT_DATABASE_SETTINGS = {
+    'backend': 'sqlitecloud', # 'sqlitecloud' or 'sqlite'
+    'url': 'veliankeeper.db', # sqlitecloud connection string
+    'path': 'main_data.db', # sqlite database file
+    'busy_timeout': 10, # sqlite: seconds to wait for a lock held by another connection
+    'synchronous': 'NORMAL', # sqlite: NORMAL is durable in WAL mode except across power loss
+    'mmap_size': 268435456, # sqlite: bytes of the file read through memory mapping
+    'cache_size': -65536 # sqlite: page cache per connection, negative means KiB
+}
+_database_settings = dict(DEFAULT_DATABASE_SETTINGS)
+
+def _connect_sqlitecloud(settings):
+	return sqlitecloud.connect(settings['url'])
+
+def _connect_sqlite(settings):
+	conn = sqlite3.connect(settings['path'], timeout=settings['busy_timeout'], check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+	# WAL lets the pooled connections read while another one writes; the rest are per-connection settings
+	conn.execute("PRAGMA journal_mode=WAL")
+	conn.execute(f"PRAGMA synchronous={settings['synchronous']}")
+	conn.execute(f"PRAGMA mmap_size={int(settings['mmap_size'])}")
+	conn.execute(f"PRAGMA cache_size={int(settings['cache_size'])}")
+	conn.execute("PRAGMA temp_store=MEMORY")
+	return conn
+
+BACKENDS = {
+    'sqlitecloud': _connect_sqlitecloud,
+    'sqlite': _connect_sqlite
+}
+
+# Select the storage backend from the "database" config section (run this before anything touches the database)
+def configure_database(settings=None):
+    global _database_settings
+    settings = {**DEFAULT_DATABASE_SETTINGS, **(settings or {})}
+    if settings['backend'] not in BACKENDS:
+        raise ValueError(f"Unknown database backend '{settings['backend']}', expected one of: {', '.join(BACKENDS)}")
+    _database_settings = settings
+    # Drop connections opened for the previous backend
+    _pool.close_all()
+    logger.info(f"Database backend: {settings['backend']} ({settings['url'] if settings['backend'] == 'sqlitecloud' else settings['path']})")
+
+def database_backend():
+    return _database_settings['backend']
+
+# Function to connect to the database
+def connect_db():
+	try:	
+		conn = BACKENDS[_database_settings['backend']](_database_settings)
+		return conn
+	except Exception as e:
+		logger.error(f"Error connecting to the database: {e}")
+		return None
+
+class ConnectionPool:
+    """Bounded pool of reusable database connections.
+
+    Connections are handed out with `connection()`, which returns them to the
+    pool on exit. A connection that raised is rolled back, and discarded if the
+    rollback itself fails. Connections that sat idle for longer than
+    `health_check_interval` are pinged before being reused.
+    """
+
+    def __init__(self, factory, max_size=POOL_SIZE, health_check_interval=HEALTH_CHECK_INTERVAL):
+        self._factory = factory
+        self.max_size = max_size
+        self.health_check_interval = health_check_interval
+        self._idle = [] # (connection, last_used) pairs, most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.in_use = 0
+
+    def _is_healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.execute("SELECT 1").fetchall()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy database connection: {e}")
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing database connection: {e}")
+
+    def acquire(self, timeout=POOL_CHECKOUT_TIMEOUT):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No database connection available after {timeout} seconds")
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    candidate, last_used = self._idle.pop()
+                if self._is_healthy(candidate, last_used):
+                    conn = candidate
+                else:
+                    self._close(candidate)
+            if conn is None:
+                conn = self._factory()
+                if conn is None:
+                    raise ConnectionError("Could not open a database connection")
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_use += 1
+        return conn
+
+    def release(self, conn, discard=False):
+        if discard:
+            self._close(conn)
+        with self._lock:
+            if not discard:
+                self._idle.append((conn, time.monotonic()))
+            self.in_use -= 1
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Rollback failed, dropping connection: {e}")
+                self.release(conn, discard=True)
+            else:
+                self.release(conn)
+            raise
+        self.release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Check out a connection and run the block in one explicit transaction.
+
+        sqlitecloud connections autocommit every statement, so multi-statement
+        work that must apply together has to open the transaction itself.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN")
+            yield conn
+            conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {'max_size': self.max_size, 'in_use': self.in_use, 'idle': len(self._idle)}
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close(conn)
+
+# Looked up on every call so configure_database and timing wrappers apply to new connections
+_pool = ConnectionPool(lambda: connect_db())
+
+# Check out a pooled connection: `with get_connection() as conn:`
+def get_connection():
+    return _pool.connection()
+
+# Check out a pooled connection inside one transaction: `with get_transaction() as conn:`
+def get_transaction():
+    return _pool.transaction()
+
+def close_pool():
+    _pool.close_all()
+
+# Connection counts for monitoring: {'max_size', 'in_use', 'idle'}
+def pool_stats():
+    return _pool.stats()
+
+# Normalize a search term the same way for names and aliases
+def normalize_term(term):
+    return term.strip().casefold()
+
+class CatalogRecord:
+    """Compact in-memory copy of one catalog row; subclasses list the table's columns as __slots__."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for column, value in zip(self.__slots__, values):
+            setattr(self, column, value)
+
+    @classmethod
+    def from_dict(cls, row):
+        return cls(*(row[column] for column in cls.__slots__))
+
+    def as_dict(self):
+        return {column: getattr(self, column) for column in self.__slots__}
+
+    def as_tuple(self):
+        return tuple(getattr(self, column) for column in self.__slots__)
+
+class ItemRecord(CatalogRecord):
+    __slots__ = ('id', 'item_name', 'item_aliases', 'facilities', 'can_be_crated', 'can_be_palleted', 'crate_size', 'pallet_size', 'image_url')
+
+class FacilityRecord(CatalogRecord):
+    __slots__ = ('id', 'facility_name', 'facility_aliases', 'facility_type', 'image_url')
+
+class StockpileRecord(CatalogRecord):
+    __slots__ = ('id', 'stockpile_name', 'stockpile_description', 'stockpile_location', 'stockpile_passcode')
+
+class CatalogTable:
+    """Read-through cache of one catalog table.
+
+    Once loaded, reads of the table are served from memory: lookups by
+    normalized name or alias, exact name checks, full listings and the
+    autocomplete SearchIndex. When two rows share a term, the row with the
+    lower id wins, matching what the alias query used to return. The write
+    functions in this module keep it in step with the database.
+
+    Rows written by another process (the bulk_import CLI, a second bot) are
+    not seen until a lookup misses: the miss reads the database and fills
+    the cache. Listings and autocomplete only include such rows after that,
+    and rows another process edits or deletes stay as cached - call
+    load_catalog_cache (or restart) to pick those up.
+    """
+
+    def __init__(self, record_type, name_field, aliases_field=None):
+        self.record_type = record_type
+        self.name_field = name_field
+        self.aliases_field = aliases_field
+        self.loaded = False
+        self._records = {} # row id -> record
+        self._terms = {} # normalized name or alias -> row id
+        self._names = {} # normalized name -> row id
+        self._lock = threading.Lock()
+        self.search = SearchIndex()
+
+    def _aliases(self, record):
+        return split_aliases(getattr(record, self.aliases_field)) if self.aliases_field else []
+
+    def _record_terms(self, record):
+        terms = [getattr(record, self.name_field)] + self._aliases(record)
+        return {normalize_term(term) for term in terms if term and term.strip()}
+
+    def _index(self, record):
+        for term in self._record_terms(record):
+            owner = self._terms.get(term)
+            if owner is None or owner > record.id:
+                self._terms[term] = record.id
+        name = normalize_term(getattr(record, self.name_field) or '')
+        owner = self._names.get(name)
+        if owner is None or owner > record.id:
+            self._names[name] = record.id
+
+    def _unindex(self, row_id):
+        record = self._records.pop(row_id, None)
+        if record is None:
+            return
+        orphaned = {term for term in self._record_terms(record) if self._terms.get(term) == row_id}
+        for term in orphaned:
+            del self._terms[term]
+        name = normalize_term(getattr(record, self.name_field) or '')
+        if self._names.get(name) == row_id:
+            del self._names[name]
+        # Hand terms the removed row owned over to any other row that shares them
+        for other in sorted(self._records.values(), key=lambda r: r.id):
+            for term in orphaned & self._record_terms(other):
+                self._terms.setdefault(term, other.id)
+            other_name = normalize_term(getattr(other, self.name_field) or '')
+            if other_name == name:
+                self._names.setdefault(name, other.id)
+
+    def load(self, records):
+        records = sorted(records, key=lambda r: r.id)
+        with self._lock:
+            self._records = {}
+            self._terms = {}
+            self._names = {}
+            for record in records:
+                self._records[record.id] = record
+                self._index(record)
+            self.loaded = True
+        self.search.load((record.id, getattr(record, self.name_field), self._aliases(record)) for record in records)
+
+    def put(self, record):
+        with self._lock:
+            self._unindex(record.id)
+            self._records[record.id] = record
+            self._index(record)
+        self.search.put(record.id, getattr(record, self.name_field), self._aliases(record))
+
+    # Cache a row read from the database after a miss and return it as a record
+    def fill(self, row):
+        record = self.record_type(*row)
+        if self.loaded:
+            self.put(record)
+        return record
+
+    def remove(self, row_id):
+        with self._lock:
+            self._unindex(row_id)
+        self.search.remove(row_id)
+
+    def clear(self):
+        with self._lock:
+            self._records = {}
+            self._terms = {}
+            self._names = {}
+        self.search.clear()
+
+    def lookup(self, term):
+        """Row dict for a name or alias, or None. Callers are free to mutate what they get back."""
+        with self._lock:
+            row_id = self._terms.get(normalize_term(term))
+            return self._records[row_id].as_dict() if row_id is not None else None
+
+    def by_name(self, name):
+        """Record whose name matches exactly (case-insensitively), ignoring aliases."""
+        with self._lock:
+            row_id = self._names.get(normalize_term(name))
+            return self._records[row_id] if row_id is not None else None
+
+    def records(self):
+        with self._lock:
+            return sorted(self._records.values(), key=lambda r: r.id)
+
+_items = CatalogTable(ItemRecord, 'item_name', 'item_aliases')
+_facilities = CatalogTable(FacilityRecord, 'facility_name', 'facility_aliases')
+_stockpiles = CatalogTable(StockpileRecord, 'stockpile_name')
+
+# Task kinds stored in task_assignees
+TASK_KIND = 'task'
+CUSTOM_TASK_KIND = 'custom'
+
+#--Statement registry--
+# Hot queries are declared once and run by name, so every pooled connection keeps one prepared copy of each
+# in the driver's statement cache, and the startup plan check knows which queries must be index lookups.
+STATEMENTS = {
+    'get_task': """
+        SELECT t.id, t.message_id, t.channel_id, t.item_id, t.amount, t.current_amount, t.facility_id,
+            t.stockpile_id, t.created_by, t.thumbnail, t.status,
+            i.item_name, f.facility_name, s.stockpile_name
+        FROM tasks t
+        JOIN items i ON t.item_id = i.id
+        JOIN facilities f ON t.facility_id = f.id
+        JOIN stockpiles s ON t.stockpile_id = s.id
+        WHERE t.id = ?
+    """,
+    'get_custom_task': "SELECT id, message_id, channel_id, task_header, task_description, task_location, created_by, status FROM custom_tasks WHERE id = ?",
+    'get_task_message': "SELECT message_id, channel_id FROM tasks WHERE id = ?",
+    'get_custom_task_message': "SELECT message_id, channel_id FROM custom_tasks WHERE id = ?",
+    'save_task_message': "UPDATE tasks SET message_id = ?, channel_id = ? WHERE id = ?",
+    'save_custom_task_message': "UPDATE custom_tasks SET message_id = ?, channel_id = ? WHERE id = ?",
+    'update_task_message_id': "UPDATE tasks SET message_id = ? WHERE id = ?",
+    'update_custom_task_message_id': "UPDATE custom_tasks SET message_id = ? WHERE id = ?",
+    'add_task_progress': "UPDATE tasks SET current_amount = current_amount + ? WHERE id = ? RETURNING current_amount, amount",
+    'task_assignees': "SELECT user_id FROM task_assignees WHERE task_id = ? AND task_kind = ? ORDER BY rowid",
+    'user_tasks': "SELECT task_kind, task_id FROM task_assignees WHERE user_id = ? ORDER BY task_kind, task_id",
+    'task_progress': "SELECT current_amount, amount FROM tasks WHERE id = ?",
+    'task_exists': "SELECT 1 FROM tasks WHERE id = ?",
+    'custom_task_exists': "SELECT 1 FROM custom_tasks WHERE id = ?",
+    'add_task_progress_many': "UPDATE tasks SET current_amount = current_amount + ? WHERE id = ?",
+    'task_assignee': "SELECT 1 FROM task_assignees WHERE task_id = ? AND task_kind = ? AND user_id = ?",
+    'add_task_assignee': "INSERT OR IGNORE INTO task_assignees (task_id, task_kind, user_id) VALUES (?, ?, ?)",
+    'remove_task_assignee': "DELETE FROM task_assignees WHERE task_id = ? AND task_kind = ? AND user_id = ?",
+    'remove_task_assignees': "DELETE FROM task_assignees WHERE task_id = ? AND task_kind = ?",
+    'delete_task': "DELETE FROM tasks WHERE id = ?",
+    'delete_custom_task': "DELETE FROM custom_tasks WHERE id = ?",
+}
+STATEMENT_CACHE_SIZE = 256 # Prepared statements kept per sqlite connection, well above the number of distinct queries
+
+class QueryPlanError(RuntimeError):
+    """A registered statement would scan a whole table instead of using an index."""
+
+# EXPLAIN QUERY PLAN every registered statement and raise if any of them scans a table or index end to end.
+# Uses its own connection: a cached EXPLAIN keeps reporting the plan from before a schema change.
+def check_query_plans():
+    full_scans = []
+    conn = connect_db()
+    if conn is None:
+        raise QueryPlanError("Could not connect to the database to check query plans")
+    try:
+        cursor = conn.cursor()
+        for name, sql in STATEMENTS.items():
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", (None,) * sql.count('?'))
+            details = [str(row[-1]) for row in cursor.fetchall()]
+            logger.debug(f"Query plan for {name}: {'; '.join(details)}")
+            full_scans.extend(f"{name}: {detail}" for detail in details
+                              if detail.startswith("SCAN ") and detail != "SCAN CONSTANT ROW")
+    finally:
+        conn.close()
+    if full_scans:
+        for scan in full_scans:
+            logger.error(f"Full scan in hot query {scan}")
+        raise QueryPlanError(f"{len(full_scans)} hot queries fall back to a full scan: {', '.join(full_scans)}")
+    logger.info(f"Query plans checked: all {len(STATEMENTS)} hot queries use an index")
+
+#--Schema migrations--
+# Each step runs once per database, in version order, and is recorded in schema_version.
+# Append new steps to MIGRATIONS - never edit or reorder a step that may already have been applied.
+
+def _migrate_base_tables(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS items (
+                        id INTEGER PRIMARY KEY,
+                        item_name TEXT,
+                        item_aliases TEXT,
+                        facilities TEXT,
+                        can_be_crated TEXT,
+                        can_be_palleted TEXT,
+                        crate_size TEXT,
+                        pallet_size TEXT,
+                        image_url TEXT
+                    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS facilities (
+                        id INTEGER PRIMARY KEY,
+                        facility_name TEXT,
+                        facility_aliases TEXT,
+                        facility_type TEXT,
+                        image_url TEXT
+                    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS stockpiles (
+                        id INTEGER PRIMARY KEY,
+                        stockpile_name TEXT,
+                        stockpile_description TEXT,
+                        stockpile_location TEXT,
+                        stockpile_passcode INTEGER
+                    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS tasks (
+                        id INTEGER PRIMARY KEY,
+                        message_id INTEGER,
+                        channel_id INTEGER,
+                        item_id TEXT,
+                        amount INTEGER,
+                        current_amount INTEGER DEFAULT 0,
+                        facility_id TEXT,
+                        stockpile_id TEXT,
+                        created_by TEXT,
+                        assigned_users TEXT,
+                        thumbnail TEXT,
+                        status TEXT
+                    )''')
+    cursor.execute('''CREATE TABLE IF NOT EXISTS custom_tasks (
+                        id INTEGER PRIMARY KEY,
+                        message_id INTEGER,
+                        channel_id INTEGER,
+                        task_header TEXT,
+                        task_location TEXT,
+                        task_description TEXT,
+                        created_by TEXT,
+                        assigned_users TEXT,
+                        status TEXT
+                    )''')
+
+# Users signed up to tasks - one row per (task, user). This replaces the assigned_users JSON column,
+# which is no longer written and is only read once to carry existing sign-ups over.
+def _migrate_task_assignees(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_assignees'")
+    exists = cursor.fetchone() is not None
+    cursor.execute('''CREATE TABLE IF NOT EXISTS task_assignees (
+                        task_id INTEGER NOT NULL,
+                        task_kind TEXT NOT NULL,
+                        user_id TEXT NOT NULL,
+                        PRIMARY KEY (task_id, task_kind, user_id)
+                    )''')
+    # The primary key already indexes lookups by task; this one serves lookups by user
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_assignees_user ON task_assignees (user_id, task_kind)")
+    if not exists:
+        # Carry over sign-ups recorded in the assigned_users JSON before this table existed
+        for table, kind in (('tasks', TASK_KIND), ('custom_tasks', CUSTOM_TASK_KIND)):
+            cursor.execute(f"""
+                INSERT OR IGNORE INTO task_assignees (task_id, task_kind, user_id)
+                SELECT t.id, ?, CAST(j.value AS TEXT)
+                FROM {table} t, json_each(t.assigned_users) j
+                WHERE json_valid(t.assigned_users)
+            """, (kind,))
+
+class MigrationError(RuntimeError):
+    """A schema migration found data it cannot convert safely; nothing was changed."""
+
+# Write merged aliases back in the same style the row already used: a JSON string (items) or the raw ",a,,,b," form
+def _encode_aliases(style_source, aliases):
+    formatted = ",".join(f",{alias}," for alias in aliases)
+    try:
+        is_json = isinstance(json.loads(style_source), str) if style_source else False
+    except json.JSONDecodeError:
+        is_json = False
+    return json.dumps(formatted) if is_json else formatted
+
+# Names are matched case-insensitively, so they must be unique case-insensitively too.
+# Items and facilities that share a name and differ only in their aliases are merged into the oldest row,
+# the one lookups already returned: it gets the aliases of every row, and tasks move over to it.
+# Anything else - duplicate stockpiles, or rows that differ in other columns - stops the migration
+# with the conflicting ids so they can be fixed by hand. No data is dropped.
+def _migrate_lookup_indexes(cursor):
+    tables = (('items', 'item_name', 'item_aliases', 'item_id'),
+              ('facilities', 'facility_name', 'facility_aliases', 'facility_id'),
+              ('stockpiles', 'stockpile_name', None, 'stockpile_id'))
+    merges = []
+    conflicts = []
+    for table, column, aliases_column, task_column in tables:
+        cursor.execute(f"""
+            SELECT GROUP_CONCAT(id) FROM {table}
+            WHERE {column} IS NOT NULL
+            GROUP BY {column} COLLATE NOCASE
+            HAVING COUNT(*) > 1
+        """)
+        for (all_ids,) in cursor.fetchall():
+            ids = sorted(int(row_id) for row_id in str(all_ids).split(','))
+            rows = []
+            for row_id in ids:
+                cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,))
+                columns = [description[0] for description in cursor.description]
+                rows.append(dict(zip(columns, cursor.fetchone())))
+            if aliases_column is None:
+                conflicts.append(f"{table} rows {ids} share the name '{rows[0][column]}'")
+                continue
+            differing = sorted({key for row in rows[1:] for key, value in row.items()
+                                if key not in ('id', column, aliases_column) and value != rows[0][key]})
+            if differing:
+                conflicts.append(f"{table} rows {ids} share the name '{rows[0][column]}' but differ in {', '.join(differing)}")
+                continue
+            merges.append((table, aliases_column, task_column, rows))
+    if conflicts:
+        raise MigrationError("Cannot make catalog names unique without losing data: " + "; ".join(conflicts)
+                             + ". Rename or delete the duplicates by hand, then restart.")
+
+    for table, aliases_column, task_column, rows in merges:
+        kept, removed = rows[0], rows[1:]
+        aliases = []
+        seen = set()
+        for row in rows:
+            for alias in split_aliases(row[aliases_column]):
+                if normalize_term(alias) not in seen:
+                    seen.add(normalize_term(alias))
+                    aliases.append(alias)
+        style_source = next((row[aliases_column] for row in rows if row[aliases_column]), "")
+        cursor.execute(f"UPDATE {table} SET {aliases_column} = ? WHERE id = ?", (_encode_aliases(style_source, aliases), kept['id']))
+        for row in removed:
+            cursor.execute(f"UPDATE tasks SET {task_column} = ? WHERE {task_column} = ?", (kept['id'], row['id']))
+            cursor.execute(f"DELETE FROM {table} WHERE id = ?", (row['id'],))
+            logger.warning(f"Merged duplicate {table} row {row['id']} into row {kept['id']}: {row}")
+        logger.warning(f"{table} row {kept['id']} now has the aliases {', '.join(aliases)}")
+
+    for table, column, _, _ in tables:
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_name ON {table} ({column} COLLATE NOCASE)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_message_id ON tasks (message_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_custom_tasks_message_id ON custom_tasks (message_id)")
+
+MIGRATIONS = [
+    (1, "Create catalog and task tables", _migrate_base_tables),
+    (2, "Move task sign-ups to task_assignees", _migrate_task_assignees),
+    (3, "Index item, facility and stockpile names and task message IDs", _migrate_lookup_indexes),
+]
+
+# Bring the schema up to date. All pending steps apply in one transaction, so a failure leaves the schema untouched.
+def run_migrations():
+    with get_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+                            version INTEGER PRIMARY KEY,
+                            description TEXT,
+                            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+                        )''')
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current_version = cursor.fetchone()[0]
+
+        for version, description, migrate in MIGRATIONS:
+            if version <= current_version:
+                continue
+            logger.info(f"Applying schema migration {version}: {description}")
+            try:
+                migrate(cursor)
+            except Exception as e:
+                logger.error(f"Schema migration {version} failed, rolling back all pending migrations: {e}")
+                raise
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+            current_version = version
+    return current_version
+
+_bootstrap_lock = threading.Lock()
+_bootstrap_seconds = None
+
+# Prepare the database for the bot (run this when bot starts). Only the first call in a process does
+# any work, so gateway reconnects that fire on_ready again cost nothing. Returns the bootstrap time in seconds.
+def bootstrap_database():
+    global _bootstrap_seconds
+    with _bootstrap_lock:
+        if _bootstrap_seconds is None:
+            started = time.perf_counter()
+            version = run_migrations()
+            check_query_plans()
+            load_catalog_cache()
+            _bootstrap_seconds = time.perf_counter() - started
+            logger.info(f"Database bootstrap finished in {_bootstrap_seconds * 1000:.1f} ms (schema version {version})")
+        return _bootstrap_seconds
+
+# Load items, facilities and stockpiles into the catalog cache (run this when bot starts)
+def load_catalog_cache():
+    loaded = {}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for table, cache in (('items', _items), ('facilities', _facilities), ('stockpiles', _stockpiles)):
+            cursor.execute(f"SELECT {', '.join(cache.record_type.__slots__)} FROM {table}")
+            loaded[cache] = [cache.record_type(*row) for row in cursor.fetchall()]
+    for cache, records in loaded.items():
+        cache.load(records)
+    logger.info(f"Catalog cache loaded: {len(loaded[_items])} items, {len(loaded[_facilities])} facilities, {len(loaded[_stockpiles])} stockpiles")
+
+# Ranked name suggestions for autocomplete - served from memory, safe to call on the event loop
+def search_items(query, limit=MAX_RESULTS):
+    return _items.search.search(query, limit)
+
+def search_facilities(query, limit=MAX_RESULTS):
+    return _facilities.search.search(query, limit)
+
+def search_stockpiles(query, limit=MAX_RESULTS):
+    return _stockpiles.search.search(query, limit)
+
+def get_all_task_messages():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("SELECT id FROM tasks")
+		return cursor.fetchall()
+
+# Catalog names are unique case-insensitively; both drivers report a clash as an IntegrityError
+INTEGRITY_ERRORS = (sqlite3.IntegrityError, sqlitecloud.IntegrityError)
+
+class DuplicateNameError(ValueError):
+    """An item, facility or stockpile with that name is already in the catalog."""
+
+# Function to add an item to the database
+def add_item_to_db(item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		item_aliases_json = json.dumps(item_aliases)
+		facilities_json = json.dumps(facilities)
+		try:
+			cursor.execute("INSERT INTO items (item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", 
+							(item_name, item_aliases_json, facilities_json, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url))
+		except INTEGRITY_ERRORS as e:
+			raise DuplicateNameError(f"An item named '{item_name}' already exists") from e
+		item_id = cursor.lastrowid
+		conn.commit()
+	_items.put(ItemRecord(item_id, item_name, item_aliases_json, facilities_json, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url))
+	
+#Add facility to database
+def add_facility_to_db(facility_name, facility_aliases, facility_type, image_url):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		try:
+			cursor.execute("INSERT INTO facilities (facility_name, facility_aliases, facility_type, image_url) VALUES (?, ?, ?, ?)",
+							(facility_name, facility_aliases, facility_type, image_url))
+		except INTEGRITY_ERRORS as e:
+			raise DuplicateNameError(f"A facility named '{facility_name}' already exists") from e
+		facility_id = cursor.lastrowid
+		conn.commit()
+	_facilities.put(FacilityRecord(facility_id, facility_name, facility_aliases, facility_type, image_url))
+	
+# Add many items in one transaction - rows are (item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url).
+# Names that already exist are skipped. Returns the records that were added.
+def add_items_to_db(items):
+	rows = [(item_name, json.dumps(item_aliases), json.dumps(facilities), can_be_crated, can_be_palleted, crate_size, pallet_size, image_url)
+			for item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url in items]
+	with get_transaction() as conn:
+		cursor = conn.cursor()
+		cursor.execute("SELECT COALESCE(MAX(id), 0) FROM items")
+		last_id = cursor.fetchone()[0]
+		cursor.executemany("INSERT OR IGNORE INTO items (item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+		cursor.execute("SELECT id, item_name, item_aliases, facilities, can_be_crated, can_be_palleted, crate_size, pallet_size, image_url FROM items WHERE id > ?", (last_id,))
+		added = [ItemRecord(*result) for result in cursor.fetchall()]
+	for record in added:
+		_items.put(record)
+	return added
+
+# Add many facilities in one transaction - rows are (facility_name, facility_aliases, facility_type, image_url).
+# Names that already exist are skipped. Returns the records that were added.
+def add_facilities_to_db(facilities):
+	with get_transaction() as conn:
+		cursor = conn.cursor()
+		cursor.execute("SELECT COALESCE(MAX(id), 0) FROM facilities")
+		last_id = cursor.fetchone()[0]
+		cursor.executemany("INSERT OR IGNORE INTO facilities (facility_name, facility_aliases, facility_type, image_url) VALUES (?, ?, ?, ?)", list(facilities))
+		cursor.execute("SELECT id, facility_name, facility_aliases, facility_type, image_url FROM facilities WHERE id > ?", (last_id,))
+		added = [FacilityRecord(*result) for result in cursor.fetchall()]
+	for record in added:
+		_facilities.put(record)
+	return added
+
+def add_stockpile_to_db(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		try:
+			cursor.execute("INSERT INTO stockpiles (stockpile_name, stockpile_description, stockpile_location, stockpile_passcode) VALUES (?, ?, ?, ?)",
+							(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode))
+		except INTEGRITY_ERRORS as e:
+			raise DuplicateNameError(f"A stockpile named '{stockpile_name}' already exists") from e
+		stockpile_id = cursor.lastrowid
+		conn.commit()
+	_stockpiles.put(StockpileRecord(stockpile_id, stockpile_name, stockpile_description, stockpile_location, stockpile_passcode))
+
+def get_facility_from_db(facility_name):
+	if _facilities.loaded:
+		facility = _facilities.lookup(facility_name)
+		if facility is not None:
+			return facility
+
+	# Cache not loaded (e.g. a script that skipped the bootstrap), or a row another process added since - read the database
+	with get_connection() as conn:
+		cursor = conn.cursor()
+	
+		# Check if the search term matches either the facility name or any alias
+		query= '''SELECT * FROM facilities 
+						WHERE facility_name = ? COLLATE NOCASE 
+						OR ',' || facility_aliases || ',' LIKE ?
+		'''
+	
+		search_with_commas = f',{facility_name},'
+		cursor.execute(query, (facility_name, f'%{search_with_commas}%'))
+
+		result = cursor.fetchone()
+
+		if result:
+			return _facilities.fill(result).as_dict()
+		return None
+
+
+# Function to retrieve an item by name or alias
+def get_item_from_db(item_name):
+	if _items.loaded:
+		item = _items.lookup(item_name)
+		if item is not None:
+			return item
+
+	# Cache not loaded (e.g. a script that skipped the bootstrap), or a row another process added since - read the database
+	with get_connection() as conn:
+		cursor = conn.cursor()
+	
+		query= '''SELECT * FROM items 
+						WHERE item_name = ? COLLATE NOCASE 
+						OR ',' || item_aliases || ',' LIKE ?
+		'''
+	
+		search_with_commas = f',{item_name},'
+		cursor.execute(query, (item_name, f'%{search_with_commas}%'))
+	
+		result = cursor.fetchone()
+	
+		#Return query as dictionary
+		if result:
+			return _items.fill(result).as_dict()
+		return None
+	
+#Retrieve stockpile from database
+def get_stockpile_from_db(stockpile_name):
+	if _stockpiles.loaded:
+		stockpile = _stockpiles.by_name(stockpile_name)
+		if stockpile is not None:
+			return stockpile.as_dict()
+
+	with get_connection() as conn:
+		cursor = conn.cursor()
+	
+		query= '''SELECT * FROM stockpiles 
+						WHERE stockpile_name = ? COLLATE NOCASE 
+		'''
+	
+		cursor.execute(query, (stockpile_name,))
+
+		result = cursor.fetchone()
+
+		if result:
+			return _stockpiles.fill(result).as_dict()
+		return None
+	
+def create_task(item_id, amount, facility_id, stockpile_id, created_by, assigned_users, thumbnail):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO tasks (item_id, amount, current_amount, facility_id, stockpile_id, created_by, thumbnail, status)
+            VALUES (?, ?, 0, ?, ?, ?, ?, 'running')
+        """, (item_id, amount, facility_id, stockpile_id, created_by, thumbnail))
+        task_id = cursor.lastrowid
+        cursor.executemany(STATEMENTS['add_task_assignee'],
+                           [(task_id, TASK_KIND, str(user_id)) for user_id in assigned_users])
+        conn.commit()
+        return task_id
+
+def create_custom_task(task_header, task_description, task_location, created_by, assigned_users):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO custom_tasks (task_header, task_description, task_location, created_by)
+                VALUES (?, ?, ?, ?)
+            """, (task_header, task_description, task_location, created_by))
+            task_id = cursor.lastrowid
+            cursor.executemany(STATEMENTS['add_task_assignee'],
+                               [(task_id, CUSTOM_TASK_KIND, str(user_id)) for user_id in assigned_users])
+            conn.commit()
+            return task_id
+        except Exception as e:
+            print(f"Error creating custom task: {e}")
+            conn.rollback()
+            return None
+
+def save_task_message(task_id, message_id, channel_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['save_task_message'], (message_id, channel_id, task_id))
+		conn.commit()
+	
+def save_custom_task_message(task_id, message_id, channel_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['save_custom_task_message'], (message_id, channel_id, task_id))
+		conn.commit()
+
+
+def add_user_to_task(task_id, user_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATEMENTS['add_task_assignee'], (task_id, TASK_KIND, str(user_id)))
+        conn.commit()
+
+def add_user_to_custom_task(task_id, user_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATEMENTS['add_task_assignee'], (task_id, CUSTOM_TASK_KIND, str(user_id)))
+        conn.commit()
+
+# Sign a user up for a task, or drop them if already signed up. Returns True if the user is now assigned.
+def _task_exists(cursor, task_kind, task_id):
+    cursor.execute(STATEMENTS['custom_task_exists' if task_kind == CUSTOM_TASK_KIND else 'task_exists'], (task_id,))
+    return cursor.fetchone() is not None
+
+# Returns whether the user is now assigned, or None if the task no longer exists
+def toggle_task_assignee(task_kind, task_id, user_id):
+    with get_transaction() as conn:
+        cursor = conn.cursor()
+        if not _task_exists(cursor, task_kind, task_id):
+            return None
+        cursor.execute(STATEMENTS['remove_task_assignee'], (task_id, task_kind, str(user_id)))
+        assigned = cursor.rowcount == 0
+        if assigned:
+            cursor.execute(STATEMENTS['add_task_assignee'], (task_id, task_kind, str(user_id)))
+    return assigned
+
+# Mutation kinds accepted by apply_task_mutations
+PROGRESS_MUTATION = 'progress' # ('progress', task_id, amount)
+TOGGLE_MUTATION = 'toggle' # ('toggle', task_kind, task_id, user_id)
+
+def apply_task_mutations(mutations):
+    """Apply a batch of task mutations in one transaction, with the same outcome as applying them one by one.
+
+    Returns one result per mutation, in order: what add_task_progress or
+    toggle_task_assignee would have returned for it.
+    """
+    results = [None] * len(mutations)
+    progress = [(index, mutation[1], mutation[2]) for index, mutation in enumerate(mutations) if mutation[0] == PROGRESS_MUTATION]
+    toggles = [(index, mutation[1], mutation[2], str(mutation[3])) for index, mutation in enumerate(mutations) if mutation[0] == TOGGLE_MUTATION]
+
+    with get_transaction() as conn:
+        cursor = conn.cursor()
+        if progress:
+            # Submissions for a deleted task match no row and keep their None result
+            cursor.executemany(STATEMENTS['add_task_progress_many'], [(amount, task_id) for _, task_id, amount in progress])
+            totals = {}
+            for task_id in {task_id for _, task_id, _ in progress}:
+                cursor.execute(STATEMENTS['task_progress'], (task_id,))
+                totals[task_id] = cursor.fetchone()
+            # Walk backwards from the final total so each caller sees the total right after its own submission
+            for index, task_id, amount in reversed(progress):
+                row = totals[task_id]
+                if row is not None:
+                    results[index] = {'current_amount': row[0], 'amount': row[1]}
+                    totals[task_id] = (row[0] - amount, row[1])
+
+        if toggles:
+            # Sign-ups for a task deleted in the meantime would leave orphan assignee rows - drop them, result None
+            existing = {task for task in {(task_kind, task_id) for _, task_kind, task_id, _ in toggles}
+                        if _task_exists(cursor, *task)}
+            toggles = [toggle for toggle in toggles if (toggle[1], toggle[2]) in existing]
+
+        if toggles:
+            assigned = {}
+            for key in {(task_kind, task_id, user_id) for _, task_kind, task_id, user_id in toggles}:
+                cursor.execute(STATEMENTS['task_assignee'], (key[1], key[0], key[2]))
+                assigned[key] = cursor.fetchone() is not None
+            removed = [key for key, present in assigned.items() if present]
+            last_signup = {}
+            for index, task_kind, task_id, user_id in toggles:
+                key = (task_kind, task_id, user_id)
+                assigned[key] = results[index] = not assigned[key]
+                last_signup[key] = index
+            # Re-insert in sign-up order so assignee lists keep the order they would have had
+            added = sorted((key for key, present in assigned.items() if present), key=last_signup.get)
+            # The cloud driver still sends an empty command to the server for an empty executemany
+            if removed:
+                cursor.executemany(STATEMENTS['remove_task_assignee'], [(task_id, task_kind, user_id) for task_kind, task_id, user_id in removed])
+            if added:
+                cursor.executemany(STATEMENTS['add_task_assignee'], [(task_id, task_kind, user_id) for task_kind, task_id, user_id in added])
+
+    logger.info(f"Applied {len(progress)} progress submissions and {len(toggles)} sign-up toggles in one transaction")
+    return results
+
+def close_task(task_id):
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(STATEMENTS['delete_task'], (task_id,))
+            cursor.execute(STATEMENTS['remove_task_assignees'], (task_id, TASK_KIND))
+            conn.commit()
+            logger.info(f"Task {task_id} deleted from the database")
+    except Exception as e:
+        logger.error(f"Error deleting task {task_id} from the database: {str(e)}")
+        raise
+
+def close_custom_task(task_id):
+	try:
+		with get_connection() as conn:
+			cursor = conn.cursor()
+			cursor.execute(STATEMENTS['delete_custom_task'], (task_id,))
+			cursor.execute(STATEMENTS['remove_task_assignees'], (task_id, CUSTOM_TASK_KIND))
+			conn.commit()
+			logger.info(f"Task {task_id} deleted from the database")
+	except Exception as e:	
+		logger.error(f"Error deleting task {task_id} from the database: {str(e)}")
+		raise
+
+def purge_tasks():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("DELETE FROM tasks")
+		cursor.execute("DELETE FROM task_assignees WHERE task_kind = ?", (TASK_KIND,))
+		conn.commit()
+	
+def purge_custom_tasks():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("DELETE FROM custom_tasks")
+		cursor.execute("DELETE FROM task_assignees WHERE task_kind = ?", (CUSTOM_TASK_KIND,))
+		conn.commit()
+
+def purge_stockpiles():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("DELETE FROM stockpiles")
+		conn.commit()
+	_stockpiles.clear()
+
+def update_custom_task_message_id(task_id, message_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['update_custom_task_message_id'], (message_id, task_id))
+		conn.commit()
+
+def get_task_message(task_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['get_task_message'], (task_id,))
+		result = cursor.fetchone()
+		if result:
+			return {'message_id': result[0], 'channel_id': result[1]}
+		return None
+
+def get_custom_task_message(task_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['get_custom_task_message'], (task_id,))
+		result = cursor.fetchone()
+		if result:
+			return {'message_id': result[0], 'channel_id': result[1]}
+		return None
+
+def get_all_tasks():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("SELECT id, message_id, channel_id FROM tasks")
+		tasks = cursor.fetchall()
+		return tasks
+
+def get_all_custom_tasks():
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("SELECT id, message_id, channel_id FROM custom_tasks")
+		tasks = cursor.fetchall()
+		return tasks
+
+# Assigned user IDs of a task, in sign-up order
+def _fetch_assignees(cursor, task_kind, task_id):
+    cursor.execute(STATEMENTS['task_assignees'], (task_id, task_kind))
+    return [row[0] for row in cursor.fetchall()]
+
+def get_task_assignees(task_kind, task_id):
+    with get_connection() as conn:
+        return _fetch_assignees(conn.cursor(), task_kind, task_id)
+
+# Every (task_kind, task_id) a user is signed up for
+def get_user_tasks(user_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATEMENTS['user_tasks'], (str(user_id),))
+        return cursor.fetchall()
+
+def get_custom_task(task_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['get_custom_task'], (task_id,))
+		task = cursor.fetchone()
+		if task:
+			return {
+				'id': task[0],
+				'message_id': task[1],
+				'channel_id': task[2],
+				'task_header': task[3],
+				'task_description': task[4],
+				'task_location': task[5],
+				'created_by': task[6],
+				'assigned_users': _fetch_assignees(cursor, CUSTOM_TASK_KIND, task[0]),
+				'status': task[7]
+			}
+		return None
+
+def update_task_message_id(task_id, message_id):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute(STATEMENTS['update_task_message_id'], (message_id, task_id))
+		conn.commit()
+
+# Backfill message IDs for many tasks in one transaction - pairs are (task_id, message_id)
+def update_task_message_ids(pairs):
+    with get_transaction() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(STATEMENTS['update_task_message_id'], [(message_id, task_id) for task_id, message_id in pairs])
+
+# Add to a task's progress in one statement so concurrent submissions are never lost.
+# Returns {'current_amount', 'amount'} after the update, or None if the task does not exist.
+def add_task_progress(task_id, amount):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATEMENTS['add_task_progress'], (amount, task_id))
+        result = cursor.fetchone()
+        conn.commit()
+    if result is None:
+        return None
+    logger.info(f"Added {amount} to task {task_id} progress, now {result[0]}")
+    return {'current_amount': result[0], 'amount': result[1]}
+
+def update_task_progress(task_id, new_amount):
+	with get_connection() as conn:
+		cursor = conn.cursor()
+		cursor.execute("UPDATE tasks SET current_amount = ? WHERE id = ?", (new_amount, task_id))
+		conn.commit()
+		logger.info(f"Updated task {task_id} progress to {new_amount}")
+
+def get_task(task_id):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(STATEMENTS['get_task'], (task_id,))
+        task = cursor.fetchone()
+        if task:
+            task_dict = {
+                'id': task[0],
+                'message_id': task[1],
+                'channel_id': task[2],
+                'item_id': task[3],
+                'amount': task[4],
+                'current_amount': task[5],
+                'facility_id': task[6],
+                'stockpile_id': task[7],
+                'created_by': task[8],
+                'assigned_users': _fetch_assignees(cursor, TASK_KIND, task[0]),
+                'thumbnail': task[9],
+                'status': task[10],
+                'item_name': task[11],
+                'facility_name': task[12],
+                'stockpile_name': task[13]
+            }
+            logger.info(f"Retrieved task: {task_dict}")
+            return task_dict
+        logger.warning(f"No task found with id {task_id}")
+        return None
+
+# Check that the active backend is reachable and writable, on a fresh connection rather than a pooled one
+def check_database_health():
+    conn = connect_db()
+    if conn is None:
+        logger.error(f"Database health check failed: could not connect to the {database_backend()} backend.")
+        return False
+    try:
+        cursor = conn.cursor()
+        
+        # Try to perform a simple query
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        tables = cursor.fetchall()
+        
+        # Check if we can write to the database
+        cursor.execute("CREATE TABLE IF NOT EXISTS health_check (id INTEGER PRIMARY KEY);")
+        cursor.execute("INSERT INTO health_check (id) VALUES (1);")
+        cursor.execute("DELETE FROM health_check WHERE id = 1;")
+        
+        conn.commit()
+        
+        logger.info(f"Database health check passed. The {database_backend()} database is accessible and writable.")
+        return True
+    except Exception as e:
+        if 'database is locked' in str(e):
+            logger.error("Database health check failed: Database is locked. Please close any other connections and restart.")
+        elif 'unable to open database file' in str(e):
+            logger.error("Database health check failed: Unable to open database file. Check file permissions and path.")
+        else:
+            logger.error(f"Database health check failed: {str(e)}")
+        return False
+    finally:
+        conn.close()
+
+# Number of tasks not yet closed, per task kind
+def count_open_tasks():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM tasks WHERE status IS NOT 'closed'")
+        tasks = cursor.fetchone()[0]
+        cursor.execute("SELECT COUNT(*) FROM custom_tasks WHERE status IS NOT 'closed'")
+        custom_tasks = cursor.fetchone()[0]
+    return {TASK_KIND: tasks, CUSTOM_TASK_KIND: custom_tasks}
+
+def update_task_status(task_id, status):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE tasks SET status = ? WHERE id = ?", (status, task_id))
+        conn.commit()
+
+def update_item(item):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE items
+                SET item_name = ?, item_aliases = ?, can_be_crated = ?, can_be_palleted = ?, 
+                    crate_size = ?, pallet_size = ?, facilities = ?, image_url = ?
+                WHERE id = ?
+            """, (item['item_name'], item['item_aliases'], item['can_be_crated'], item['can_be_palleted'],
+                  item['crate_size'], item['pallet_size'], item['facilities'], item['image_url'], item['id']))
+            conn.commit()
+            _items.put(ItemRecord.from_dict(item))
+            return True
+        except Exception as e:
+            print(f"Error updating item: {e}")
+            conn.rollback()
+            return False
+        
+def update_stockpile(stockpile):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE stockpiles
+                SET stockpile_name = ?, stockpile_description = ?, stockpile_location = ?, stockpile_passcode = ?
+                WHERE id = ?
+            """, (stockpile['stockpile_name'], stockpile['stockpile_description'], stockpile['stockpile_location'], stockpile['stockpile_passcode'],
+                  stockpile['id']))
+            conn.commit()
+            _stockpiles.put(StockpileRecord.from_dict(stockpile))
+            return True
+        except Exception as e:
+            print(f"Error updating stockpile: {e}")
+            conn.rollback()
+            return False
+
+def get_item_by_name(item_name):
+    """Check if the item exists in the database."""
+    if _items.loaded:
+        item = _items.by_name(item_name)
+        if item is not None:
+            return item.as_tuple()
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT * FROM items WHERE item_name = ? COLLATE NOCASE", (item_name,))
+        item = cursor.fetchone()
+
+
+        return _items.fill(item).as_tuple() if item else None
+
+def get_facility_by_name(facility_name):
+    """Check if the facility exists in the database."""
+    if _facilities.loaded:
+        facility = _facilities.by_name(facility_name)
+        if facility is not None:
+            return facility.as_tuple()
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM facilities WHERE facility_name = ? COLLATE NOCASE", (facility_name,))
+        facility = cursor.fetchone()
+        return _facilities.fill(facility).as_tuple() if facility else None
+
+def get_stockpile_by_name(stockpile_name):
+    """Check if stockpile exists in the database."""
+    if _stockpiles.loaded:
+        stockpile = _stockpiles.by_name(stockpile_name)
+        if stockpile is not None:
+            return stockpile.as_tuple()
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT * FROM stockpiles WHERE stockpile_name = ? COLLATE NOCASE", (stockpile_name,))
+        item = cursor.fetchone()
+
+
+        return _stockpiles.fill(item).as_tuple() if item else None
+
+def delete_item_by_name(item_name):
+    """Delete an item from the database by its name."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM items WHERE item_name = ? COLLATE NOCASE RETURNING id", (item_name,))
+        deleted_ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+
+    for item_id in deleted_ids:
+        _items.remove(item_id)
+
+def delete_stockpile_by_name(stockpile_name):
+    """Delete stockpile from the database by its name."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM stockpiles WHERE stockpile_name = ? COLLATE NOCASE RETURNING id", (stockpile_name,))
+        deleted_ids = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+
+    for stockpile_id in deleted_ids:
+        _stockpiles.remove(stockpile_id)
+
+# Split a stored aliases column (",a,,b," or its JSON-encoded form) into individual aliases
+def split_aliases(aliases_str):
+    return [alias.strip() for entry in parse_aliases(aliases_str) for alias in str(entry).split(',') if alias.strip()]
+
+def parse_aliases(aliases_str):
+    if not aliases_str:
+        return []
+    try:
+        aliases = json.loads(aliases_str)
+        if isinstance(aliases, list):
+            return aliases
+        elif isinstance(aliases, str):
+            return [aliases]
+        else:
+            return []
+    except json.JSONDecodeError:
+        return [aliases_str]  # Treat the whole string as a single alias if it's not valid JSON
+
+def get_all_items():
+    if _items.loaded:
+        return [{'name': item.item_name, 'aliases': parse_aliases(item.item_aliases)} for item in _items.records()]
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT item_name, item_aliases FROM items")
+        items = cursor.fetchall()
+
+        return [{'name': item[0], 'aliases': parse_aliases(item[1])} for item in items]
+
+def get_all_facilities():
+    if _facilities.loaded:
+        return [{'name': facility.facility_name, 'aliases': parse_aliases(facility.facility_aliases)} for facility in _facilities.records()]
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT facility_name, facility_aliases FROM facilities")
+        facilities = cursor.fetchall()
+
+        return [{'name': facility[0], 'aliases': parse_aliases(facility[1])} for facility in facilities]
+
+#--Catalog snapshots--
+CATALOG_MAGIC = b"VKCATLOG"
+CATALOG_FORMAT_VERSION = 1
+_CATALOG_HEADER = struct.Struct("<8sH") # Magic, format version; the lz4 frame follows
+CATALOG_TABLES = {
+    'items': ItemRecord.__slots__,
+    'facilities': FacilityRecord.__slots__,
+    'stockpiles': StockpileRecord.__slots__,
+}
+
+# Write items, facilities and stockpiles to an lz4-compressed snapshot file. Returns the row count per table.
+def export_catalog(path):
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        schema = cursor.fetchone()[0]
+        tables = {}
+        for table, columns in CATALOG_TABLES.items():
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+            tables[table] = [list(row) for row in cursor.fetchall()]
+
+    payload = json.dumps({
+        'schema_version': schema,
+        'exported_at': time.time(),
+        'columns': {table: list(columns) for table, columns in CATALOG_TABLES.items()},
+        'tables': tables
+    }, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(_CATALOG_HEADER.pack(CATALOG_MAGIC, CATALOG_FORMAT_VERSION))
+        f.write(lz4.frame.compress(payload))
+
+    counts = {table: len(rows) for table, rows in tables.items()}
+    logger.info(f"Exported catalog to {path}: {counts}")
+    return counts
+
+def read_catalog_snapshot(path):
+    with open(path, 'rb') as f:
+        header = f.read(_CATALOG_HEADER.size)
+        if len(header) < _CATALOG_HEADER.size:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        magic, version = _CATALOG_HEADER.unpack(header)
+        if magic != CATALOG_MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        if version > CATALOG_FORMAT_VERSION:
+            raise ValueError(f"Catalog snapshot format {version} is newer than this bot supports ({CATALOG_FORMAT_VERSION})")
+        return json.loads(lz4.frame.decompress(f.read()))
+
+# Restore a snapshot written by export_catalog in one transaction, keeping row ids so task references stay valid.
+# With replace the current catalog is deleted first; otherwise rows whose id or name already exists are skipped.
+def import_catalog(path, replace=True):
+    snapshot = read_catalog_snapshot(path)
+    counts = {}
+    with get_transaction() as conn:
+        cursor = conn.cursor()
+        for table, columns in CATALOG_TABLES.items():
+            snapshot_columns = snapshot['columns'].get(table)
+            rows = snapshot['tables'].get(table, [])
+            if snapshot_columns is None:
+                continue
+            # Only restore columns this schema knows, in the snapshot's order
+            kept = [index for index, column in enumerate(snapshot_columns) if column in columns]
+            names = [snapshot_columns[index] for index in kept]
+            if replace:
+                cursor.execute(f"DELETE FROM {table}")
+            # Rows skipped as conflicts are not counted. sqlitecloud's rowcount after executemany covers only the
+            # last statement, so the count comes from the table size instead.
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            before = cursor.fetchone()[0]
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})",
+                [[row[index] for index in kept] for row in rows]
+            )
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cursor.fetchone()[0] - before
+    load_catalog_cache()
+    logger.info(f"Imported catalog from {path} (schema version {snapshot['schema_version']}): {counts}")
+    return counts
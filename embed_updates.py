@@ -0,0 +1,102 @@
+import asyncio
+import collections
+import logging
+import time
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 0.5 # Seconds a task stays dirty before its message is edited, so a burst of clicks becomes one edit
+DEFAULT_CHANNEL_EDITS = 5 # Message edits allowed per channel in each period...
+DEFAULT_CHANNEL_PERIOD = 5.0 # ...of this many seconds, Discord's per-channel edit limit
+
+class ChannelBucket:
+    """Holds back message edits in one channel so no more than `limit` start in any `period` seconds."""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self._edits = collections.deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so edits in a channel go out in the order they became due
+        async with self._lock:
+            now = time.monotonic()
+            while self._edits and now - self._edits[0] >= self.period:
+                self._edits.popleft()
+            if len(self._edits) >= self.limit:
+                await asyncio.sleep(self.period - (now - self._edits[0]))
+                self._edits.popleft()
+            self._edits.append(time.monotonic())
+
+class EmbedUpdateScheduler:
+    """Coalesces task embed re-renders into at most one message edit per task per window.
+
+    `render` is a coroutine function taking (kind, task_id) and returning the
+    up-to-date embed, or None when the task is gone. Marking a task dirty only
+    records which message shows it; the task is read and the embed built once,
+    when the edit is actually sent. `view`, if given, takes (message, kind,
+    task_id) and returns a view to replace the message's components with, or
+    None to leave them as they are.
+    """
+
+    def __init__(self, render, window=DEFAULT_WINDOW, channel_edits=DEFAULT_CHANNEL_EDITS, channel_period=DEFAULT_CHANNEL_PERIOD, view=None):
+        self.render = render
+        self.view = view
+        self.window = window
+        self.channel_edits = channel_edits
+        self.channel_period = channel_period
+        self._dirty = {} # (kind, task_id) -> message to edit
+        self._timers = {} # (kind, task_id) -> task waiting out the window
+        self._buckets = {} # channel ID -> ChannelBucket
+
+    def mark_dirty(self, kind, task_id, message):
+        key = (kind, task_id)
+        self._dirty[key] = message
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._update_later(key))
+
+    # Forget a pending edit, e.g. because the task message is being deleted
+    def discard(self, kind, task_id):
+        self._dirty.pop((kind, task_id), None)
+
+    async def _update_later(self, key):
+        try:
+            # Changes that land while an edit is in flight get one more edit after the next window
+            while key in self._dirty:
+                await asyncio.sleep(self.window)
+                await self._update(key)
+        finally:
+            self._timers.pop(key, None)
+
+    async def _update(self, key):
+        message = self._dirty.get(key)
+        if message is None:
+            return
+        bucket = self._buckets.get(message.channel.id)
+        if bucket is None:
+            bucket = self._buckets[message.channel.id] = ChannelBucket(self.channel_edits, self.channel_period)
+        await bucket.acquire()
+
+        # Take the flag only now, so changes made while waiting for the bucket are part of this edit
+        message = self._dirty.pop(key, None)
+        if message is None:
+            return
+        try:
+            embed = await self.render(*key)
+            if embed is not None:
+                view = self.view(message, *key) if self.view else None
+                if view is not None:
+                    await message.edit(embed=embed, view=view)
+                else:
+                    await message.edit(embed=embed)
+        except discord.NotFound:
+            pass # The task message was deleted in the meantime
+        except Exception as e:
+            logger.error(f"Error updating the message of {key[0]} {key[1]}: {str(e)}")
+
+    async def flush(self):
+        """Send every pending edit now instead of waiting for its window."""
+        await asyncio.gather(*(self._update(key) for key in list(self._dirty)))
@@ -0,0 +1,39 @@
+import random
+
+import discord
+
+task_quotes = [] # Footer quotes for task embeds, loaded from vkeeper_quotes.json by the bot
+
+#This section creates the embed for the task
+def task_embed(task):
+    embed = discord.Embed(
+        title=f"Task: {task['amount']} x {task['item_name']} to {task['stockpile_name']}",
+        description=f"Task created by <@{task['created_by']}>",
+        color=discord.Color.blue()
+    )
+    assigned_users_list = task['assigned_users']
+    formatted_assigned_users = ", ".join([f"<@{user_id}>" for user_id in assigned_users_list]) if assigned_users_list else "None"
+    embed.add_field(name="Status", value=task['status'].capitalize(), inline=True)
+    embed.add_field(name="Progress", value=f"{task['current_amount']} / {task['amount']}", inline=True)
+    embed.add_field(name="Facility", value=task['facility_name'], inline=True)
+    embed.add_field(name="Stockpile", value=task['stockpile_name'], inline=True)
+    embed.add_field(name="Assigned Users", value=formatted_assigned_users, inline=False)
+    embed.set_thumbnail(url=task['thumbnail'])
+    random_quote = random.choice(task_quotes) if task_quotes else ""
+    embed.set_footer(text=f"Task ID: {task['id']} | {random_quote}")
+    return embed
+
+#This section creates the embed for the custom task
+def custom_task_embed(task):
+    embed = discord.Embed(
+        title=f"Task: {task['task_header']}",
+        description=f"Task created by <@{task['created_by']}>",
+        color=discord.Color.blue()
+    )
+    assigned_users_list = task['assigned_users']
+    formatted_assigned_users = ", ".join([f"<@{user_id}>" for user_id in assigned_users_list]) if assigned_users_list else "None"
+    embed.add_field(name="Description", value=task['task_description'], inline=False)
+    embed.add_field(name="Location", value=task['task_location'], inline=False)
+    embed.add_field(name="Assigned Users", value=formatted_assigned_users, inline=False)
+    embed.set_footer(text=f"Custom Task ID: {task['id']}")
+    return embed
@@ -0,0 +1,145 @@
+import bisect
+import collections
+import functools
+import inspect
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds: 10 µs to ~2 minutes, each 25% wider than the last
+BUCKET_BOUNDS = []
+_bound = 0.00001
+while _bound < 120:
+    BUCKET_BOUNDS.append(_bound)
+    _bound *= 1.25
+BUCKET_BOUNDS.append(float("inf"))
+
+PENDING_LIMIT = 100000 # Samples kept between drains; the oldest are dropped past this
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are accurate to one bucket (25%)."""
+    __slots__ = ('count', 'errors', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKET_BOUNDS)
+
+    def add(self, seconds, error=False):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+# Recording only appends to a deque, which is atomic, so timed code on any thread never takes a lock.
+# Readers drain the samples into the histograms when they ask for numbers.
+_pending = collections.deque(maxlen=PENDING_LIMIT)
+_histograms = {}
+_drain_lock = threading.Lock()
+
+def record(name, seconds, error=False):
+    _pending.append((name, seconds, error))
+
+def _drain():
+    with _drain_lock:
+        while True:
+            try:
+                name, seconds, error = _pending.popleft()
+            except IndexError:
+                return
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.add(seconds, error)
+
+def histograms():
+    """Up-to-date histograms by metric name. Treat them as read-only."""
+    _drain()
+    return dict(_histograms)
+
+def snapshot():
+    """Summary per metric name: count, errors, total and percentiles, in seconds."""
+    return {
+        name: {
+            'count': histogram.count,
+            'errors': histogram.errors,
+            'total': histogram.total,
+            'p50': histogram.percentile(0.50),
+            'p95': histogram.percentile(0.95),
+            'p99': histogram.percentile(0.99),
+            'max': histogram.max
+        }
+        for name, histogram in histograms().items()
+    }
+
+def reset():
+    with _drain_lock:
+        _pending.clear()
+        _histograms.clear()
+
+def timed(name):
+    """Decorator recording how long each call of a function or coroutine function takes."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                error = True
+                try:
+                    result = await func(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    record(name, time.perf_counter() - started, error)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                record(name, time.perf_counter() - started, error)
+        return wrapper
+    return decorator
+
+def instrument_module(module, prefix, exclude=()):
+    """Replace every public function defined in `module` with a timed wrapper named prefix + function name.
+
+    Calls made inside the module go through the module globals, so they are timed too.
+    """
+    for name, func in list(vars(module).items()):
+        if name.startswith('_') or name in exclude or not inspect.isfunction(func):
+            continue
+        if func.__module__ != module.__name__ or hasattr(func, '__wrapped__'):
+            continue
+        setattr(module, name, timed(prefix + name)(func))
+
+def report_lines(limit=None):
+    """Metrics as fixed-width text lines, the most total time first."""
+    rows = sorted(snapshot().items(), key=lambda item: item[1]['total'], reverse=True)
+    if limit:
+        rows = rows[:limit]
+    lines = [f"{'metric':<36} {'count':>7} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'total s':>8}"]
+    for name, stats in rows:
+        lines.append(
+            f"{name[:36]:<36} {stats['count']:>7} {stats['errors']:>4} {stats['p50'] * 1000:>8.1f} "
+            f"{stats['p95'] * 1000:>8.1f} {stats['p99'] * 1000:>8.1f} {stats['total']:>8.2f}"
+        )
+    return lines
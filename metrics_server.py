@@ -0,0 +1,119 @@
+import logging
+import math
+
+from aiohttp import web
+
+import db_async
+import db_manager
+import metrics
+import scraphauler
+
+logger = logging.getLogger(__name__)
+
+# Export every fourth histogram bound (each ~2.4x the last) to keep the output short
+EXPORT_BOUNDS = metrics.BUCKET_BOUNDS[:-1:4]
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _histogram_lines(metric, label_name, label_value, histogram):
+    labels = f'{label_name}="{_label(label_value)}"'
+    lines = []
+    cumulative = 0
+    bucket_index = 0
+    for bound in EXPORT_BOUNDS:
+        while metrics.BUCKET_BOUNDS[bucket_index] <= bound:
+            cumulative += histogram.buckets[bucket_index]
+            bucket_index += 1
+        lines.append(f'{metric}_bucket{{{labels},le="{bound:.6g}"}} {cumulative}')
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f'{metric}_sum{{{labels}}} {histogram.total:.6f}')
+    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+    return lines
+
+def render(bot, open_tasks):
+    """Current metrics in the Prometheus text exposition format."""
+    histograms = metrics.histograms()
+    lines = []
+
+    def family(name, kind, help_text, prefix, label_name):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for metric_name in sorted(histograms):
+            if metric_name.startswith(prefix):
+                histogram = histograms[metric_name]
+                label_value = metric_name[len(prefix):]
+                if kind == "histogram":
+                    lines.extend(_histogram_lines(name, label_name, label_value, histogram))
+                else:
+                    lines.append(f'{name}{{{label_name}="{_label(label_value)}"}} {histogram.errors}')
+
+    family("veliankeeper_command_duration_seconds", "histogram", "Slash command latency, including role checks.", "command.", "command")
+    family("veliankeeper_command_errors_total", "counter", "Slash commands that raised an error.", "command.", "command")
+    family("veliankeeper_db_call_duration_seconds", "histogram", "db_manager call latency.", "db.", "function")
+    family("veliankeeper_scrape_duration_seconds", "histogram", "scraphauler call latency.", "scrape.", "function")
+
+    pool = db_manager.pool_stats()
+    lines.append("# HELP veliankeeper_db_pool_connections Database connections by state.")
+    lines.append("# TYPE veliankeeper_db_pool_connections gauge")
+    lines.append(f'veliankeeper_db_pool_connections{{state="in_use"}} {pool["in_use"]}')
+    lines.append(f'veliankeeper_db_pool_connections{{state="idle"}} {pool["idle"]}')
+    lines.append("# HELP veliankeeper_db_pool_max_connections Size limit of the database connection pool.")
+    lines.append("# TYPE veliankeeper_db_pool_max_connections gauge")
+    lines.append(f"veliankeeper_db_pool_max_connections {pool['max_size']}")
+
+    outcomes = dict(scraphauler.cache_stats)
+    lines.append("# HELP veliankeeper_scrape_cache_requests_total Scrapes by cache outcome.")
+    lines.append("# TYPE veliankeeper_scrape_cache_requests_total counter")
+    for outcome in ("hit", "revalidated", "stale", "miss"):
+        lines.append(f'veliankeeper_scrape_cache_requests_total{{outcome="{outcome}"}} {outcomes.get(outcome, 0)}')
+    total = sum(outcomes.values())
+    served = outcomes.get("hit", 0) + outcomes.get("revalidated", 0) + outcomes.get("stale", 0)
+    lines.append("# HELP veliankeeper_scrape_cache_hit_ratio Share of scrapes answered without downloading the page.")
+    lines.append("# TYPE veliankeeper_scrape_cache_hit_ratio gauge")
+    lines.append(f"veliankeeper_scrape_cache_hit_ratio {served / total if total else 0:.4f}")
+
+    latency = bot.latency
+    lines.append("# HELP veliankeeper_gateway_latency_seconds Discord gateway heartbeat latency.")
+    lines.append("# TYPE veliankeeper_gateway_latency_seconds gauge")
+    lines.append(f"veliankeeper_gateway_latency_seconds {latency if math.isfinite(latency) else 'NaN'}")
+
+    if open_tasks is not None:
+        lines.append("# HELP veliankeeper_open_tasks Tasks that are not closed yet.")
+        lines.append("# TYPE veliankeeper_open_tasks gauge")
+        for kind, count in open_tasks.items():
+            lines.append(f'veliankeeper_open_tasks{{kind="{kind}"}} {count}')
+
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """HTTP endpoint serving /metrics from the bot's own event loop."""
+
+    def __init__(self, bot, host, port):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def handle_metrics(self, request):
+        try:
+            open_tasks = await db_async.count_open_tasks()
+        except Exception as e:
+            # Still export everything else when the database is unreachable
+            logger.warning(f"Could not count open tasks for metrics: {e}")
+            open_tasks = None
+        return web.Response(body=render(self.bot, open_tasks).encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,128 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "scrape_cache.db"
+DEFAULT_TTL = 7 * 24 * 3600 # Seconds a scrape is served without asking the wiki again
+DEFAULT_MAX_ENTRIES = 5000 # Least recently used entries beyond this are evicted
+
+def normalize_key(search_term):
+    # "Basic Materials", "basic_materials" and " BASIC  materials" are the same wiki page
+    return " ".join(search_term.replace("_", " ").casefold().split())
+
+class ScrapeCache:
+    """Parsed wiki scrape results kept in a local SQLite file.
+
+    Entries younger than the TTL are served without touching the network.
+    Older entries keep their ETag/Last-Modified validators so the scraper can
+    revalidate them with a conditional GET, and a 304 answer refreshes the
+    entry without downloading or parsing the page again.
+
+    Lookups run on the caller's thread (the event loop) and never wait for a
+    write: the file is in WAL mode and reads use their own connection and lock.
+    Hits only note their time in memory; those last-used times are written out
+    with the next put, revalidation or close, which callers run off the loop.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock() # Held by writes, across their commit
+        self._read_lock = threading.Lock() # Held by lookups only
+        self._touched = {} # term -> last use not written to the file yet
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            # A reader in WAL mode sees the last commit and never waits for a writer
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS scrape_cache (
+                                    term TEXT PRIMARY KEY,
+                                    data TEXT NOT NULL,
+                                    etag TEXT,
+                                    last_modified TEXT,
+                                    fetched_at REAL NOT NULL,
+                                    last_used REAL NOT NULL
+                                )''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scrape_cache_last_used ON scrape_cache (last_used)")
+            self._conn.commit()
+        self._read_conn = sqlite3.connect(path, check_same_thread=False)
+
+    def get(self, search_term):
+        """Return the cached entry for a term as a dict, or None, and mark it as used.
+
+        The entry's `fresh` key says whether it is still inside the TTL.
+        """
+        entry = self.peek(search_term)
+        if entry is not None:
+            self._touched[normalize_key(search_term)] = time.time()
+        return entry
+
+    def peek(self, search_term):
+        """Like get, but without counting as a use for the LRU eviction."""
+        term = normalize_key(search_term)
+        now = time.time()
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT data, etag, last_modified, fetched_at FROM scrape_cache WHERE term = ?", (term,)
+            ).fetchone()
+        if row is None:
+            return None
+        data, etag, last_modified, fetched_at = row
+        return {
+            "data": json.loads(data),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fresh": now - fetched_at < self.ttl
+        }
+
+    # Write the last-used times noted since the previous commit; call with the lock held
+    def _write_touched(self):
+        # Swapped out rather than cleared, since lookups add to it without taking the write lock
+        touched, self._touched = self._touched, {}
+        if touched:
+            self._conn.executemany("UPDATE scrape_cache SET last_used = ? WHERE term = ?",
+                                   [(used, term) for term, used in touched.items()])
+
+    def put(self, search_term, data, etag=None, last_modified=None):
+        term = normalize_key(search_term)
+        now = time.time()
+        with self._lock:
+            self._write_touched()
+            self._touched.pop(term, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrape_cache (term, data, etag, last_modified, fetched_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (term, json.dumps(data), etag, last_modified, now, now)
+            )
+            # Evict the least recently used entries over the limit
+            evicted = self._conn.execute(
+                "DELETE FROM scrape_cache WHERE term IN (SELECT term FROM scrape_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+        if evicted:
+            logger.debug(f"Evicted {evicted} scrape cache entries")
+
+    def revalidated(self, search_term):
+        """Restart the TTL of an entry the wiki confirmed is unchanged."""
+        with self._lock:
+            self._write_touched()
+            self._conn.execute("UPDATE scrape_cache SET fetched_at = ? WHERE term = ?", (time.time(), normalize_key(search_term)))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._conn.execute("DELETE FROM scrape_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
@@ -1,73 +1,262 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote
-
-def scrape_image(search_term):
-	# Replace spaces with underscores in search_term
-	search_term = search_term.replace(" ", "_")
-	# URL encode the search term to handle special characters
-	encoded_term = quote(search_term)
-	url = f"http://foxhole.wiki.gg/{encoded_term}?action=pagevalues"
-	print(f"{url}")
-
-	# Fetch the webpage
-	response = requests.get(url)
-
-	if response.status_code == 200:
-		soup = BeautifulSoup(response.content, "html.parser")
-		
-		# Find the image with class "thumbimage"
-		img_tag = soup.find("img", {"class": ["thumbimage", "thumbinner"]})
-		
-		if img_tag:
-			# Get the image source (src) URL
-			img_url = img_tag['src']
-			# Make it a full URL by adding the base URL	
-			img_url = f"http://foxhole.wiki.gg{img_url}"
-			return img_url
-		else:
-			return "No image found"
-	else:
-		return f"Failed to retrieve page. Status code: {response.status_code}"
-		
-def scrape_item_data(search_term):
-	# Replace spaces with underscores in search_term
-	search_term = search_term.replace(" ", "_")
-	# URL encode the search term to handle special characters
-	encoded_term = quote(search_term)
-	url = f"http://foxhole.wiki.gg/{encoded_term}?action=pagevalues"
-	print(f"{url}")
-
-	# Fetch the webpage
-	response = requests.get(url)
-
-	if response.status_code == 200:
-		soup = BeautifulSoup(response.content, "html.parser")
-		
-		# Find the image
-		img_tag = soup.find("img", {"class": "thumbimage"})
-		img_url = None
-		if img_tag:
-			img_url = f"http://foxhole.wiki.gg{img_tag['src']}"
-			
-		# Scrap production price
-		price_tag = soup.find("span", {"class": "price"})
-		price = price_tag.text if price_tag else "No price found"
-		
-		# Find the factory
-		factory_tag = soup.find("span", {"class": "factory"})
-		factory = factory_tag.text if factory_tag else "No factory found"
-		
-		# Find the materials
-		madeof_tag = soup.find("span", {"class": "madeof"})
-		madeof = madeof_tag.text if madeof_tag else "No materials found"
-		
-		# Return a dictionary of all the scraped data
-		return {
-			"image_url": img_url,
-			"price": price,
-			"factory": factory,
-			"madeof": madeof
-		}
-	else:
-		return f"Failed to retrieve page. Status code: {response.status_code}"
+import asyncio
+import codecs
+import collections
+import json
+import logging
+import aiohttp
+from html.parser import HTMLParser
+from urllib.parse import quote
+
+from scrape_cache import ScrapeCache, normalize_key
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = "http://foxhole.wiki.gg"
+REQUEST_TIMEOUT = 15 # Seconds for a whole request, including reading the body
+CONNECT_TIMEOUT = 5 # Seconds to open a connection to the wiki
+MAX_RETRIES = 3 # Retries after the first attempt
+RETRY_BACKOFF = 0.5 # Seconds before the first retry, doubled for each retry after it
+RETRY_STATUSES = {429, 500, 502, 503, 504} # Responses that are worth trying again
+CONNECTIONS_PER_HOST = 8 # Keep-alive connections kept open to the wiki
+PARSE_CHUNK_SIZE = 16 * 1024 # Bytes fed to the parser at a time, so parsing can stop once every field is found
+
+IMAGE_CLASSES = {"thumbimage", "thumbinner"}
+TEXT_FIELDS = ("price", "factory", "madeof") # Span classes whose text is scraped
+
+_session = None
+_cache = None
+cache_stats = collections.Counter() # Scrape outcomes: hit, revalidated, stale, miss
+
+# Set where and for how long scrape results are cached (run this when bot starts)
+def configure_cache(path=None, ttl=None, max_entries=None):
+	global _cache
+	if _cache is not None:
+		_cache.close()
+	options = {"path": path, "ttl": ttl, "max_entries": max_entries}
+	_cache = ScrapeCache(**{key: value for key, value in options.items() if value is not None})
+	return _cache
+
+def get_cache():
+	if _cache is None:
+		configure_cache()
+	return _cache
+
+# Shared session, so every scrape reuses the same keep-alive connections. Created lazily because it must be made inside the running event loop.
+def get_session():
+	global _session
+	if _session is None or _session.closed:
+		_session = aiohttp.ClientSession(
+			timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+			connector=aiohttp.TCPConnector(limit_per_host=CONNECTIONS_PER_HOST, ttl_dns_cache=300),
+		)
+	return _session
+
+# Close the shared session (run this when bot shuts down)
+async def close():
+	global _session
+	if _session is not None and not _session.closed:
+		await _session.close()
+	_session = None
+
+def page_url(search_term):
+	# Replace spaces with underscores in search_term
+	search_term = search_term.replace(" ", "_")
+	# URL encode the search term to handle special characters
+	encoded_term = quote(search_term)
+	return f"{BASE_URL}/{encoded_term}?action=pagevalues"
+
+# Fetch a URL, retrying connection errors, timeouts and temporary server errors with exponential backoff.
+# Returns (status, body, headers); raises the last network error once the retries are used up.
+async def fetch(url, headers=None):
+	session = get_session()
+	for attempt in range(MAX_RETRIES + 1):
+		try:
+			async with session.get(url, headers=headers) as response:
+				if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+					return response.status, await response.read(), response.headers
+				logger.warning(f"Wiki returned {response.status} for {url} (attempt {attempt + 1}/{MAX_RETRIES + 1})")
+		except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+			if attempt == MAX_RETRIES:
+				raise
+			logger.warning(f"Request to {url} failed (attempt {attempt + 1}/{MAX_RETRIES + 1}): {e!r}")
+		await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+class FieldParser(HTMLParser):
+	"""Streaming extractor for the fields scraphauler reads from a wiki page.
+
+	Only the first matching image source and the text of the first span of
+	each field class are kept; nothing else of the page is stored. `done`
+	turns true as soon as everything has been found, so the caller can stop
+	feeding the rest of the page.
+	"""
+
+	def __init__(self):
+		super().__init__(convert_charrefs=True)
+		self.image_src = None
+		self.texts = {} # Field -> text parts seen so far
+		self.finished = set()
+		self._capturing = None # Field whose span is open right now
+		self._depth = 0 # Spans open inside the captured span, including itself
+
+	@property
+	def done(self):
+		return self.image_src is not None and len(self.finished) == len(TEXT_FIELDS)
+
+	def handle_starttag(self, tag, attrs):
+		if tag == "span" and self._capturing:
+			self._depth += 1
+			return
+		if tag != "img" and tag != "span":
+			return
+		attrs = dict(attrs)
+		classes = set((attrs.get("class") or "").split())
+		if tag == "img":
+			if self.image_src is None and classes & IMAGE_CLASSES and attrs.get("src"):
+				self.image_src = attrs["src"]
+			return
+		for field in TEXT_FIELDS:
+			if field in classes and field not in self.texts:
+				self.texts[field] = []
+				self._capturing = field
+				self._depth = 1
+				return
+
+	def handle_endtag(self, tag):
+		if tag == "span" and self._capturing:
+			self._depth -= 1
+			if self._depth == 0:
+				self.finished.add(self._capturing)
+				self._capturing = None
+
+	def handle_data(self, data):
+		if self._capturing:
+			self.texts[self._capturing].append(data)
+
+	def text(self, field):
+		parts = self.texts.get(field)
+		return "".join(parts) if parts is not None else None
+
+def extract_fields(content):
+	parser = FieldParser()
+	decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+	# Feed the page piece by piece and stop as soon as every field has been found
+	for start in range(0, len(content), PARSE_CHUNK_SIZE):
+		parser.feed(decoder.decode(content[start:start + PARSE_CHUNK_SIZE]))
+		if parser.done:
+			break
+	else:
+		parser.feed(decoder.decode(b"", final=True))
+		parser.close()
+
+	# Find the image with class "thumbimage"
+	img_url = f"{BASE_URL}{parser.image_src}" if parser.image_src else None
+		
+	# Scrap production price
+	price = parser.text("price")
+	price = price if price is not None else "No price found"
+	
+	# Find the factory
+	factory = parser.text("factory")
+	factory = factory if factory is not None else "No factory found"
+	
+	# Find the materials
+	madeof = parser.text("madeof")
+	madeof = madeof if madeof is not None else "No materials found"
+	
+	# Return a dictionary of all the scraped data
+	return {
+		"image_url": img_url,
+		"price": price,
+		"factory": factory,
+		"madeof": madeof
+	}
+
+_in_flight = {} # Normalized search term -> task scraping that page right now
+
+# Scrape every field of a wiki page with a single fetch and a single parse.
+# Returns a dict with image_url, price, factory and madeof, or an error string if the page could not be retrieved.
+# Concurrent calls for the same page share one request.
+async def scrape_page(search_term):
+	key = normalize_key(search_term)
+	task = _in_flight.get(key)
+	if task is None:
+		task = asyncio.ensure_future(_scrape_page(search_term))
+		_in_flight[key] = task
+		task.add_done_callback(lambda _: _in_flight.pop(key, None))
+	return await asyncio.shield(task)
+
+# Fresh cache entries cost no request at all, stale ones are revalidated with a conditional GET
+# so an unchanged page is neither downloaded nor parsed again
+async def _scrape_page(search_term):
+	cache = get_cache()
+	entry = cache.get(search_term)
+	if entry and entry["fresh"]:
+		cache_stats["hit"] += 1
+		return entry["data"]
+
+	headers = {}
+	if entry:
+		if entry["etag"]:
+			headers["If-None-Match"] = entry["etag"]
+		if entry["last_modified"]:
+			headers["If-Modified-Since"] = entry["last_modified"]
+
+	url = page_url(search_term)
+	logger.debug(f"Scraping {url}")
+
+	# Fetch the webpage
+	try:
+		status, content, response_headers = await fetch(url, headers=headers)
+	except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+		if entry:
+			logger.warning(f"Serving stale scrape of {search_term} after failed revalidation: {e!r}")
+			cache_stats["stale"] += 1
+			return entry["data"]
+		cache_stats["miss"] += 1
+		return f"Failed to retrieve page. Error: {e!r}"
+
+	# Cache writes commit to disk, so they run off the event loop
+	if status == 304 and entry:
+		await asyncio.to_thread(cache.revalidated, search_term)
+		cache_stats["revalidated"] += 1
+		return entry["data"]
+	if status >= 500 and entry:
+		# The wiki is down - keep serving what it last said rather than replacing it with an error
+		logger.warning(f"Serving stale scrape of {search_term} after status {status} from the wiki")
+		cache_stats["stale"] += 1
+		return entry["data"]
+	cache_stats["miss"] += 1
+	if status == 200:
+		data = extract_fields(content)
+		await asyncio.to_thread(cache.put, search_term, data, response_headers.get("ETag"), response_headers.get("Last-Modified"))
+		return data
+	return f"Failed to retrieve page. Status code: {status}"
+
+# Titles of the pages in a wiki category, following the API's continuation until the whole category is listed
+async def category_members(category):
+	if not category.lower().startswith("category:"):
+		category = f"Category:{category}"
+	titles = []
+	params = f"action=query&list=categorymembers&cmtype=page&cmlimit=500&format=json&cmtitle={quote(category.replace(' ', '_'))}"
+	cmcontinue = None
+	while True:
+		url = f"{BASE_URL}/api.php?{params}" + (f"&cmcontinue={quote(cmcontinue)}" if cmcontinue else "")
+		status, content, _ = await fetch(url)
+		if status != 200:
+			raise RuntimeError(f"Failed to list {category}. Status code: {status}")
+		result = json.loads(content)
+		titles.extend(member["title"] for member in result.get("query", {}).get("categorymembers", []))
+		cmcontinue = result.get("continue", {}).get("cmcontinue")
+		if not cmcontinue:
+			return titles
+
+# Image URL of a wiki page, or an error string
+async def scrape_image(search_term):
+	page = await scrape_page(search_term)
+	if isinstance(page, str):
+		return page
+	return page["image_url"] or "No image found"
+		
+# Production data of a wiki page, or an error string
+async def scrape_item_data(search_term):
+	return await scrape_page(search_term)
@@ -0,0 +1,133 @@
+import bisect
+import heapq
+import math
+import threading
+from collections import defaultdict
+
+MAX_RESULTS = 25 # Discord shows at most 25 autocomplete choices
+MIN_SIMILARITY = 0.3 # Trigram similarity below this is not considered a match
+MAX_FUZZY_CANDIDATES = 200 # Terms scored for a fuzzy query once enough candidates came from its rarer trigrams
+
+def normalize(term):
+    return " ".join(term.casefold().split())
+
+def trigrams(term):
+    # Pad so short terms and word starts still produce grams
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """Ranked name search for autocomplete.
+
+    Each entry is a display name plus the terms it can be found by (the name
+    itself and its aliases). Results are ranked exact match first, then prefix
+    matches (shorter terms first), then trigram similarity, so typos still find
+    the right entry. Lookup structures are rebuilt lazily after a change.
+    """
+
+    def __init__(self):
+        self._entries = {} # key -> (display name, normalized terms)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._terms_by_length = [] # (term length, sorted (term, key) pairs) for prefix search, shortest first
+        self._grams = {} # trigram -> [(term, key)]
+        self._term_grams = {} # term -> its trigrams
+        self._sorted_names = []
+
+    def _set(self, key, name, terms):
+        normalized = {normalize(term) for term in terms if term and term.strip()}
+        normalized.add(normalize(name))
+        self._entries[key] = (name, normalized)
+
+    def load(self, entries):
+        """Replace the index contents with (key, name, terms) tuples."""
+        with self._lock:
+            self._entries = {}
+            for key, name, terms in entries:
+                self._set(key, name, terms)
+            self._dirty = True
+
+    def put(self, key, name, terms=()):
+        with self._lock:
+            self._set(key, name, terms)
+            self._dirty = True
+
+    def remove(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    def clear(self):
+        self.load(())
+
+    def _rebuild(self):
+        terms_by_length = defaultdict(list)
+        grams = defaultdict(list)
+        term_grams = {}
+        for key, (name, terms) in self._entries.items():
+            for term in terms:
+                terms_by_length[len(term)].append((term, key))
+                term_grams[term] = trigrams(term)
+                for gram in term_grams[term]:
+                    grams[gram].append((term, key))
+        self._terms_by_length = [(length, sorted(pairs)) for length, pairs in sorted(terms_by_length.items())]
+        self._grams = dict(grams)
+        self._term_grams = term_grams
+        self._sorted_names = sorted(name for name, _ in self._entries.values())
+        self._dirty = False
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Return up to `limit` display names best matching `query`."""
+        with self._lock:
+            if self._dirty:
+                self._rebuild()
+            query = normalize(query)
+            if not query:
+                return self._sorted_names[:limit]
+
+            best = {} # key -> best (rank, tiebreak) seen
+            def consider(key, score):
+                if key not in best or score < best[key]:
+                    best[key] = score
+
+            # Exact and prefix matches, shortest terms first. Once a full page of entries has matched, every
+            # entry still unseen could only match through a longer term and would rank below all of them.
+            for length, pairs in self._terms_by_length:
+                if length < len(query):
+                    continue
+                if len(best) >= limit:
+                    break
+                index = bisect.bisect_left(pairs, (query,))
+                while index < len(pairs) and pairs[index][0].startswith(query):
+                    term, key = pairs[index]
+                    consider(key, (0, 0) if term == query else (1, length))
+                    index += 1
+
+            # Fuzzy matches rank below every prefix match, so they can't change a full page of prefix matches
+            if len(best) < limit:
+                self._fuzzy_matches(query, consider)
+
+            ranked = heapq.nsmallest(limit, best, key=lambda key: (best[key], self._entries[key][0]))
+            return [self._entries[key][0] for key in ranked]
+
+    def _fuzzy_matches(self, query, consider):
+        # A term with similarity >= MIN_SIMILARITY shares at least `needed` of the query's trigrams, so it
+        # contains at least one of the rarest len(query_grams) - needed + 1 of them - the rest are never read.
+        # Posting lists are taken rarest first and at most MAX_FUZZY_CANDIDATES terms are scored: a common gram
+        # (" it", "ite" in a catalog of "Item ...") is skipped once the rarer ones found a page of candidates,
+        # and otherwise only tops the candidates up to the cap.
+        query_grams = trigrams(query)
+        needed = max(1, math.ceil(MIN_SIMILARITY * len(query_grams)))
+        postings = sorted((self._grams.get(gram, ()) for gram in query_grams), key=len)
+        candidates = set()
+        for posting in postings[:len(query_grams) - needed + 1]:
+            room = MAX_FUZZY_CANDIDATES - len(candidates)
+            if room <= 0 or (len(candidates) >= MAX_RESULTS and len(posting) > room):
+                break
+            candidates.update(posting[:room])
+        for term, key in candidates:
+            grams = self._term_grams[term]
+            shared = len(query_grams & grams)
+            similarity = shared / (len(query_grams) + len(grams) - shared)
+            if similarity >= MIN_SIMILARITY:
+                consider(key, (2, -similarity))
@@ -0,0 +1,55 @@
+"""Regression tests for the catalog cache seeing rows another process wrote after it was loaded.
+
+Run from the repository root:
+    python -m unittest discover -s tests
+"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import db_manager
+
+class CatalogCacheMissTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="vk_test_")
+        self.path = os.path.join(self.directory, "main_data.db")
+        db_manager.configure_database({'backend': 'sqlite', 'path': self.path})
+        db_manager.run_migrations()
+        db_manager.load_catalog_cache()
+
+    def tearDown(self):
+        db_manager.close_pool()
+        shutil.rmtree(self.directory)
+
+    # Write a row the way the bulk_import CLI or a second bot would: on its own connection, behind the cache's back
+    def insert_elsewhere(self, sql, params):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_item_added_elsewhere_is_found_and_cached(self):
+        self.insert_elsewhere("INSERT INTO items (item_name, item_aliases, facilities) VALUES (?, ?, ?)",
+                              ("Basic Materials", json.dumps(",bmats,"), json.dumps({'facility_name': ''})))
+        self.assertEqual(db_manager.get_item_from_db("bmats")['item_name'], "Basic Materials")
+        self.assertIsNotNone(db_manager.get_item_by_name("basic materials"))
+        # Once found, the row is served from memory and offered by autocomplete
+        self.assertIn("Basic Materials", db_manager.search_items("basic"))
+
+    def test_facility_and_stockpile_added_elsewhere_are_found(self):
+        self.insert_elsewhere("INSERT INTO facilities (facility_name, facility_aliases) VALUES (?, ?)", ("Refinery", ",ref,"))
+        self.insert_elsewhere("INSERT INTO stockpiles (stockpile_name) VALUES (?)", ("Depot",))
+        self.assertEqual(db_manager.get_facility_from_db("ref")['facility_name'], "Refinery")
+        self.assertEqual(db_manager.get_stockpile_from_db("depot")['stockpile_name'], "Depot")
+
+    def test_unknown_name_is_still_none(self):
+        self.assertIsNone(db_manager.get_item_from_db("nothing"))
+        self.assertIsNone(db_manager.get_facility_by_name("nothing"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Regression tests for the schema migrations, run against copies of the shipped main_data.db.
+
+Run from the repository root:
+    python -m unittest discover -s tests
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import db_manager
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED_DB = os.path.join(REPO_DIR, "main_data.db")
+
+class ShippedDatabaseMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="vk_test_")
+        self.path = os.path.join(self.directory, "main_data.db")
+        shutil.copy(SHIPPED_DB, self.path)
+        db_manager.configure_database({'backend': 'sqlite', 'path': self.path})
+
+    def tearDown(self):
+        db_manager.close_pool()
+        shutil.rmtree(self.directory)
+
+    def rows(self, sql, params=()):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def test_duplicate_items_are_merged_without_losing_aliases(self):
+        before = {table: self.rows(f"SELECT COUNT(*) FROM {table}")[0][0] for table in ('items', 'facilities', 'stockpiles')}
+        self.assertEqual(db_manager.run_migrations(), len(db_manager.MIGRATIONS))
+        db_manager.load_catalog_cache()
+
+        # "Naval Hull Segments" is stored twice (rows 5 and 7); the oldest row stays and keeps every alias
+        self.assertEqual(self.rows("SELECT id FROM items WHERE item_name = 'Naval Hull Segments'"), [(5,)])
+        self.assertEqual(sorted(db_manager.split_aliases(self.rows("SELECT item_aliases FROM items WHERE id = 5")[0][0])),
+                         ["hull", "hull segments", "segments"])
+        for alias in ("hull", "hull segments", "segments"):
+            self.assertEqual(db_manager.get_item_from_db(alias)['id'], 5)
+
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM items")[0][0], before['items'] - 1)
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM facilities")[0][0], before['facilities'])
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM stockpiles")[0][0], before['stockpiles'])
+
+    def test_migrations_are_idempotent(self):
+        version = db_manager.run_migrations()
+        self.assertEqual(db_manager.run_migrations(), version)
+        self.assertEqual(self.rows("SELECT COUNT(*) FROM schema_version")[0][0], len(db_manager.MIGRATIONS))
+
+    def test_duplicate_stockpiles_stop_the_migration(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("INSERT INTO stockpiles (stockpile_name, stockpile_description, stockpile_location, stockpile_passcode) VALUES ('rcln logi', 'Copy', 'Elsewhere', 1)")
+        conn.commit()
+        conn.close()
+
+        with self.assertRaises(db_manager.MigrationError) as raised:
+            db_manager.run_migrations()
+        self.assertIn("stockpiles rows [4, 6]", str(raised.exception))
+        # The whole run rolled back: both stockpiles and the unmerged items are still there
+        self.assertEqual(len(self.rows("SELECT id FROM stockpiles WHERE stockpile_name = 'rcln logi' COLLATE NOCASE")), 2)
+        self.assertEqual(len(self.rows("SELECT id FROM items WHERE item_name = 'Naval Hull Segments'")), 2)
+
+    def test_duplicates_that_differ_beyond_aliases_stop_the_migration(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("UPDATE items SET crate_size = '5' WHERE id = 7")
+        conn.commit()
+        conn.close()
+
+        with self.assertRaises(db_manager.MigrationError) as raised:
+            db_manager.run_migrations()
+        self.assertIn("items rows [5, 7]", str(raised.exception))
+        self.assertIn("crate_size", str(raised.exception))
+        self.assertEqual(len(self.rows("SELECT id FROM items WHERE item_name = 'Naval Hull Segments'")), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""Ranking tests for search_index.SearchIndex.
+
+Run from the repository root:
+    python -m unittest discover -s tests
+"""
+import unittest
+
+from search_index import MAX_RESULTS, SearchIndex
+
+class SearchIndexRankingTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.load([
+            (1, "Basic Materials", ["bmat", "bmats"]),
+            (2, "Refined Materials", ["rmat"]),
+            (3, "Basic Materials Crate", []),
+            (4, "Bomastone Grenade", ["boma", "nade"]),
+        ])
+
+    def test_exact_match_ranks_first(self):
+        self.assertEqual(self.index.search("bmat")[0], "Basic Materials")
+        self.assertEqual(self.index.search("basic materials")[:2], ["Basic Materials", "Basic Materials Crate"])
+
+    def test_prefix_matches_rank_shorter_terms_first(self):
+        self.assertEqual(self.index.search("bas"), ["Basic Materials", "Basic Materials Crate"])
+
+    def test_typos_still_match(self):
+        self.assertEqual(self.index.search("bomastnoe grenade")[0], "Bomastone Grenade")
+        self.assertEqual(self.index.search("refnied materials")[0], "Refined Materials")
+
+    def test_empty_query_lists_names_alphabetically(self):
+        self.assertEqual(self.index.search(""), ["Basic Materials", "Basic Materials Crate", "Bomastone Grenade", "Refined Materials"])
+
+    def test_full_page_of_prefix_matches_keeps_shortest_terms(self):
+        index = SearchIndex()
+        index.load([(number, f"Item {number}", [f"item{number}"]) for number in range(500)])
+        results = index.search("item")
+        self.assertEqual(len(results), MAX_RESULTS)
+        # "item0".."item9" are the shortest terms starting with "item", ahead of every two-digit item
+        self.assertEqual(sorted(results[:10]), sorted(f"Item {number}" for number in range(10)))
+        self.assertEqual(index.search("item 47")[:2], ["Item 47", "Item 470"])
+
+    def test_changes_are_picked_up(self):
+        self.index.put(5, "Gas Mask", ["mask"])
+        self.assertEqual(self.index.search("mask"), ["Gas Mask"])
+        self.index.remove(5)
+        self.assertEqual(self.index.search("mask"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Regression tests for apply_task_mutations: a batch must end up exactly where applying it one mutation at a time would.
+
+Run from the repository root:
+    python -m unittest discover -s tests
+"""
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import db_manager
+
+TASK = db_manager.TASK_KIND
+CUSTOM = db_manager.CUSTOM_TASK_KIND
+PROGRESS = db_manager.PROGRESS_MUTATION
+TOGGLE = db_manager.TOGGLE_MUTATION
+
+class ApplyTaskMutationsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="vk_test_")
+        db_manager.configure_database({'backend': 'sqlite', 'path': os.path.join(self.directory, "main_data.db")})
+        db_manager.run_migrations()
+        db_manager.add_facility_to_db("Test Facility", "", "", None)
+        db_manager.add_item_to_db("Test Item", "", None, None, None, None, None, None)
+        db_manager.add_stockpile_to_db("Test Stockpile", "", "", 1)
+        self.tasks = [db_manager.create_task(1, 100, 1, 1, "creator", [], None) for _ in range(3)]
+        self.custom_task = db_manager.create_custom_task("Header", "Description", "Location", "creator", [])
+
+    def tearDown(self):
+        db_manager.close_pool()
+        shutil.rmtree(self.directory)
+
+    # What applying the mutations one by one returns, and the assignee lists and totals it leaves behind
+    def apply_sequentially(self, mutations):
+        totals = {task_id: 0 for task_id in self.tasks}
+        assignees = {}
+        results = []
+        for mutation in mutations:
+            if mutation[0] == PROGRESS:
+                totals[mutation[1]] += mutation[2]
+                results.append({'current_amount': totals[mutation[1]], 'amount': 100})
+            else:
+                users = assignees.setdefault((mutation[1], mutation[2]), [])
+                if mutation[3] in users:
+                    users.remove(mutation[3])
+                    results.append(False)
+                else:
+                    users.append(mutation[3])
+                    results.append(True)
+        return results, totals, assignees
+
+    def test_batch_matches_sequential_order(self):
+        rng = random.Random(3)
+        tasks = [(TASK, task_id) for task_id in self.tasks] + [(CUSTOM, self.custom_task)]
+        mutations = []
+        for _ in range(300):
+            if rng.random() < 0.5:
+                mutations.append((PROGRESS, rng.choice(self.tasks), rng.randint(1, 20)))
+            else:
+                mutations.append((TOGGLE, *rng.choice(tasks), rng.choice("abcd")))
+
+        results, totals, assignees = self.apply_sequentially(mutations)
+        self.assertEqual(db_manager.apply_task_mutations(mutations), results)
+        for task_id, total in totals.items():
+            self.assertEqual(db_manager.get_task(task_id)['current_amount'], total)
+        for (kind, task_id), users in assignees.items():
+            # Sign-up order survives the batch, not just the set of assignees
+            self.assertEqual(db_manager.get_task_assignees(kind, task_id), users)
+
+    def test_leave_and_rejoin_in_one_batch_moves_user_to_the_end(self):
+        task_id = self.tasks[0]
+        db_manager.apply_task_mutations([(TOGGLE, TASK, task_id, "a"), (TOGGLE, TASK, task_id, "b")])
+        results = db_manager.apply_task_mutations([(TOGGLE, TASK, task_id, "a"), (TOGGLE, TASK, task_id, "a")])
+        self.assertEqual(results, [False, True])
+        self.assertEqual(db_manager.get_task_assignees(TASK, task_id), ["b", "a"])
+
+    def test_deleted_task_is_skipped(self):
+        missing = max(self.tasks) + 1
+        results = db_manager.apply_task_mutations([
+            (PROGRESS, missing, 5),
+            (TOGGLE, TASK, missing, "a"),
+            (TOGGLE, CUSTOM, self.custom_task + 1, "a"),
+            (TOGGLE, TASK, self.tasks[0], "a"),
+        ])
+        self.assertEqual(results, [None, None, None, True])
+        self.assertEqual(db_manager.get_task_assignees(TASK, missing), [])
+        self.assertEqual(db_manager.get_user_tasks("a"), [(TASK, self.tasks[0])])
+
+    def test_progress_only_batch(self):
+        results = db_manager.apply_task_mutations([(PROGRESS, self.tasks[0], 10), (PROGRESS, self.tasks[0], 5)])
+        self.assertEqual([result['current_amount'] for result in results], [10, 15])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,1015 +1,1263 @@
-import discord
-from discord.ext.commands import Greedy, Context
-from discord.ext import commands
-from discord.ui import View, Select
-from discord import app_commands
-from discord import Embed
-from typing import Literal, Optional
-
-import scraphauler #Import scraper
-import db_manager #Import database management
-import json #Import json managing
-import logging #Import logging
-import traceback #Import traceback  
-import random #Import random - for random quotes
-import asyncio #Import asyncio - for async tasks    
-
-#Enable logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-#--Init--
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix="/", intents=intents)
-
-# Database health check
-if db_manager.check_database_health():
-    logger.info("Database health check passed. Bot initialization continuing.")
-else:
-    logger.error("Database health check failed. Please resolve the issues and restart the bot.")
-    exit(1)  # Exit the script if the database check fails
-
-with open('vkeeper_config.json', 'r') as config_file:
-    config = json.load(config_file)
-
-with open('vkeeper_quotes.json', 'r') as f:
-    quotes = json.load(f)
-
-#This section sorts out the roles and tokens from the config file - these are used to check if a user has the correct roles to use certain commands
-verification_roles = config['verification_roles']
-command_use_roles = config['command_use_roles']
-critical_command_roles = config['critical_command_roles']
-bot_token = config['bot_token']
-
-#This section loads the help manual from the json file
-def load_help_manual():
-    with open('vkeeper_manual.json', 'r') as f:
-        return json.load(f)
-help_manual_data = load_help_manual()
-
-#---Verification role check - for /vouch---
-# Define a check for users with multiple possible verification roles
-def has_verification_role():
-    async def predicate(interaction: discord.Interaction):
-        allowed_roles = verification_roles  
-        user_roles = [role.name for role in interaction.user.roles]
-        
-        # Check if the user has any of the allowed roles
-        if any(role in allowed_roles for role in user_roles):
-            return True
-        else:
-            await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
-            return False
-    return app_commands.check(predicate)
-
-#---Command use check - for everything else---
-def has_command_use_role():
-    async def predicate(interaction: discord.Interaction):
-        allowed_roles = command_use_roles  
-        user_roles = [role.name for role in interaction.user.roles]
-        
-        # Check if the user has any of the allowed roles
-        if any(role in allowed_roles for role in user_roles):
-            return True
-        else:
-            await interaction.response.send_message("You do not have permission to use this command.", ephemeral=True)
-            return False
-    return app_commands.check(predicate)
-
-#---Critical command check - for critical commands---
-def has_critical_command_use_role():
-    async def predicate(interaction: discord.Interaction):
-        allowed_roles = critical_command_roles  
-        user_roles = [role.name for role in interaction.user.roles]
-        
-        # Check if the user has any of the allowed roles
-        if any(role in allowed_roles for role in user_roles):
-            return True 
-        else:
-            await interaction.response.send_message("This is a critical command. You don't have permission to use it.", ephemeral=True)
-            return False
-    return app_commands.check(predicate)    
-
-#This section creates the embed for the task
-def task_embed(task):
-    embed = discord.Embed(
-        title=f"Task: {task['amount']} x {task['item_name']} to {task['stockpile_name']}",
-        description=f"Task created by <@{task['created_by']}>",
-        color=discord.Color.blue()
-    )
-    assigned_users_list = task['assigned_users'] if isinstance(task['assigned_users'], list) else json.loads(task['assigned_users'])
-    formatted_assigned_users = ", ".join([f"<@{user_id}>" for user_id in assigned_users_list]) if assigned_users_list else "None"
-    embed.add_field(name="Status", value=task['status'].capitalize(), inline=True)
-    embed.add_field(name="Progress", value=f"{task['current_amount']} / {task['amount']}", inline=True)
-    embed.add_field(name="Facility", value=task['facility_name'], inline=True)
-    embed.add_field(name="Stockpile", value=task['stockpile_name'], inline=True)
-    embed.add_field(name="Assigned Users", value=formatted_assigned_users, inline=False)
-    embed.set_thumbnail(url=task['thumbnail'])
-    random_quote = random.choice(quotes['task_quotes'])
-    embed.set_footer(text=f"Task ID: {task['id']} | {random_quote}")
-    return embed
-
-#This section creates the embed for the custom task
-def custom_task_embed(task):
-    embed = discord.Embed(
-        title=f"Task: {task['task_header']}",
-        description=f"Task created by <@{task['created_by']}>",
-        color=discord.Color.blue()
-    )
-    assigned_users_list = task['assigned_users'] if isinstance(task['assigned_users'], list) else json.loads(task['assigned_users'])
-    formatted_assigned_users = ", ".join([f"<@{user_id}>" for user_id in assigned_users_list]) if assigned_users_list else "None"
-    embed.add_field(name="Description", value=task['task_description'], inline=False)
-    embed.add_field(name="Location", value=task['task_location'], inline=False)
-    embed.add_field(name="Assigned Users", value=formatted_assigned_users, inline=False)
-    embed.set_footer(text=f"Custom Task ID: {task['id']}")
-    return embed
-
-#This section creates the dropdown view for the vouch command
-@bot.tree.command(name="vouch", description="Verify a new user and assign roles.")
-@has_verification_role()
-@app_commands.describe(member="The member to verify")
-async def vouch(interaction: discord.Interaction, member: discord.Member):
-    # Create the dropdown view and send it to the officer
-    await interaction.response.send_message("Select the role for the user:", view=RoleSelectView(member), ephemeral=True)
-
-#This section creates the pagination view for the help manual
-class PaginationView(discord.ui.View):
-
-	def __init__(self, data):
-		super().__init__(timeout=None)
-		self.data = data
-		self.current_page = 1
-		self.sep = 5
-
-	async def send (self, interaction: discord.Interaction):
-		self.message = await interaction.response.send_message(embed=self.create_help_embed(), view=self)
-		
-	def create_help_embed(self):
-		embed = discord.Embed(title="Velian Keeper User Manual")
-		start = (self.current_page - 1) * self.sep
-		end =  start + self.sep
-		for item in self.data[start:end]:
-			command = item['command']
-			description = item['description']
-			embed.add_field(name=command, value=description, inline=False)
-			
-		embed.set_footer(text=f"Page {self.current_page}/{self.max_pages}")
-		return embed
-		
-	async def update_message(self, interaction: discord.Interaction):
-		await interaction.response.edit_message(embed=self.create_help_embed(), view=self)
-		
-	@property
-	def max_pages(self):
-		return -(-len(self.data) // self.sep)  # Ceiling division
-		
-	@discord.ui.button(label="First", style=discord.ButtonStyle.primary)
-	async def first_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-		self.current_page = 1
-		await self.update_message(interaction)
-
-	@discord.ui.button(label="Previous", style=discord.ButtonStyle.primary)
-	async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-		self.current_page = max(1, self.current_page - 1)
-		await self.update_message(interaction)
-
-	@discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
-	async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-		self.current_page = min(self.max_pages, self.current_page + 1)
-		await self.update_message(interaction)
-
-	@discord.ui.button(label="Last", style=discord.ButtonStyle.primary)
-	async def last_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-		self.current_page = self.max_pages
-		await self.update_message(interaction)
-
-class TaskManagerView(discord.ui.View):
-    def __init__(self, task_id):
-        super().__init__(timeout=None)
-        self.task_id = task_id
-        # Add a custom ID to the view
-        self.custom_id = f"task_manager_{task_id}"
-        
-    async def update_message(self, interaction: discord.Interaction):
-        updated_task = db_manager.get_task(self.task_id)
-        updated_embed = task_embed(updated_task)
-        await interaction.response.edit_message(embed=updated_embed, view=self)
-
-    @discord.ui.button(label="Pick task", style=discord.ButtonStyle.green, custom_id="sign_up")
-    async def sign_up(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = str(interaction.user.id)
-        task = db_manager.get_task(self.task_id)
-        assigned_users = json.loads(task['assigned_users'])
-        
-        if user_id in assigned_users:
-            # User is already assigned, so remove them
-            assigned_users.remove(user_id)
-            action = "dropped from"
-            button.label = "Pick task"
-            button.style = discord.ButtonStyle.green
-        else:
-            # User is not assigned, so add them
-            assigned_users.append(user_id)
-            action = "signed up for"
-            button.label = "Drop Task"
-            button.style = discord.ButtonStyle.gray
-        
-        db_manager.update_task_assigned_users(self.task_id, json.dumps(assigned_users))
-        
-        # Update the embed with the new user list
-        await self.update_message(interaction)
-        
-        await interaction.followup.send(f"You've been {action} the task!", ephemeral=True)
-
-    @discord.ui.button(label="Submit", style=discord.ButtonStyle.blurple, custom_id="submit")
-    async def submit(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_modal(SubmitModal(self.task_id, self))
-
-    @discord.ui.button(label="Close Task", style=discord.ButtonStyle.red, custom_id="close_task")
-    async def close_task_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Load the completed tasks channel ID from config
-        with open('vkeeper_config.json', 'r') as config_file:
-            config = json.load(config_file)
-        completed_channel_id = config['completed_tasks_channel_id']
-
-        # Update task status in the database
-        db_manager.update_task_status(self.task_id, "closed")
-
-        # Get the updated task information
-        task = db_manager.get_task(self.task_id)
-
-        # Create a new embed for the completed task
-        completed_embed = task_embed(task)
-        completed_embed.color = discord.Color.red()
-        completed_embed.add_field(name="Status", value="Closed", inline=False)
-
-        # Send the completed task to the completed tasks channel
-        completed_channel = interaction.guild.get_channel(completed_channel_id)
-        await completed_channel.send(embed=completed_embed)
-
-        # Delete the original task message
-        try:
-            await interaction.message.delete()
-        except discord.errors.NotFound:
-            # The message was already deleted
-            pass
-
-        await interaction.response.send_message("Task marked as closed, moved to the completed tasks channel, and removed from the original channel.", ephemeral=True)
-
-class CustomTaskManagerView(discord.ui.View):
-    def __init__(self, task_id):
-        super().__init__(timeout=None)
-        self.task_id = task_id
-        # Add a custom ID to the view
-        self.custom_id = f"custom_task_manager_{task_id}"
-        
-    async def update_message(self, interaction: discord.Interaction):
-        updated_task = db_manager.get_custom_task(self.task_id)
-        updated_embed = custom_task_embed(updated_task)
-        await interaction.response.edit_message(embed=updated_embed, view=self)
-
-    @discord.ui.button(label="Pick task", style=discord.ButtonStyle.green, custom_id="sign_up")
-    async def sign_up(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_id = str(interaction.user.id)
-        task = db_manager.get_custom_task(self.task_id)
-        assigned_users = json.loads(task['assigned_users'])
-        
-        if user_id in assigned_users:
-            # User is already assigned, so remove them
-            assigned_users.remove(user_id)
-            action = "dropped from"
-            button.label = "Pick task"
-            button.style = discord.ButtonStyle.green
-        else:
-            # User is not assigned, so add them
-            assigned_users.append(user_id)
-            action = "signed up for"
-            button.label = "Drop Task"
-            button.style = discord.ButtonStyle.gray
-        
-        db_manager.update_custom_task_assigned_users(self.task_id, json.dumps(assigned_users))
-        
-        # Update the embed with the new user list
-        await self.update_message(interaction)
-        
-        await interaction.followup.send(f"You've been {action} the task!", ephemeral=True)
-
-    @discord.ui.button(label="Submit", style=discord.ButtonStyle.blurple, custom_id="submit")
-    async def submit(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_modal(SubmitModal(self.task_id))
-
-    @discord.ui.button(label="Close Task", style=discord.ButtonStyle.red, custom_id="close_custom_task")
-    async def close_custom_task_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            # Mark the task as closed in the database
-            db_manager.close_custom_task(self.task_id)
-            logger.info(f"Task {self.task_id} marked as closed in the database")
-            
-            # Delete the original message
-            await interaction.message.delete()
-            logger.info(f"Message for task {self.task_id} deleted")
-            
-            # Send a confirmation message
-            await interaction.response.send_message(f"Task {self.task_id} has been closed and removed.", ephemeral=True)
-            
-            self.stop()  # This disables the buttons
-            logger.info(f"View stopped for task {self.task_id}")
-        except Exception as e:
-            logger.error(f"Error in close_custom_task_button for task {self.task_id}: {str(e)}")
-            await interaction.response.send_message(f"An error occurred while closing the task: {str(e)}", ephemeral=True)
-
-class SubmitModal(discord.ui.Modal, title='Submit Progress'):
-    amount = discord.ui.TextInput(label='Amount to submit')
-
-    def __init__(self, task_id, view):
-        super().__init__()
-        self.task_id = task_id
-        self.view = view
-
-    async def on_submit(self, interaction: discord.Interaction):
-        try:
-            amount = int(self.amount.value)
-            task = db_manager.get_task(self.task_id)
-            new_amount = task['current_amount'] + amount
-            db_manager.update_task_progress(self.task_id, new_amount)
-            
-            await self.view.update_message(interaction)
-            logger.info(f"Embed updated")
-            await interaction.followup.send(f"Successfully submitted {amount}.", ephemeral=True)
-            
-            if new_amount >= task['amount']:
-                
-                with open('vkeeper_config.json', 'r') as config_file:
-                    config = json.load(config_file)
-                completed_channel_id = config['completed_tasks_channel_id']
-
-                # Update task status in the database
-                db_manager.update_task_status(self.task_id, "closed")
-
-                # Get the updated task information
-                task = db_manager.get_task(self.task_id)
-
-                # Create a new embed for the completed task
-                completed_embed = task_embed(task)
-                completed_embed.color = discord.Color.green()
-                completed_embed.add_field(name="Status", value="Completed", inline=False)
-
-        # Send the completed task to the completed tasks channel
-                completed_channel = interaction.guild.get_channel(completed_channel_id)
-                await completed_channel.send(embed=completed_embed)
-                try:
-                    await interaction.message.delete()
-                except discord.errors.NotFound:
-                    # The message was already deleted
-                    pass
-
-                await interaction.response.send_message("Task marked as completed, moved to the completed tasks channel, and removed from the original channel.", ephemeral=True)
-        except Exception as e:
-            logger.error(f"Error in SubmitModal: {str(e)}")
-            await interaction.response.send_message(f"An error occurred: {str(e)}", ephemeral=True)
-
-class RoleSelect(discord.ui.Select):
-    def __init__(self, member: discord.Member):
-        self.member = member
-        # Define the dropdown options
-        options = [
-            discord.SelectOption(label="Ally", description="Assign the Ally role"),
-            discord.SelectOption(label="Seaman", description="Assign the Member role"),
-        ]
-        
-		  # Initialize the dropdown
-        super().__init__(placeholder="Choose the role to assign...", min_values=1, max_values=1, options=options)
-    
-    async def callback(self, interaction: discord.Interaction):
-        selected_role = self.values[0]
-        guild = interaction.guild
-        role = None
-        verified_role = discord.utils.get(guild.roles, name="Legionnaire")
-        
-        if selected_role == "Ally":
-            role = discord.utils.get(guild.roles, name="Ally")
-            if role:
-                await self.member.add_roles(role)
-                await interaction.response.send_message(
-                    f"{self.member.mention} has been verified as an Ally! Welcome to the Republic Coastal Legion! "
-                    "Please be sure to change your server nickname to match your in-game name. "
-                    "Check out <id:browse> for additional optional roles, and take a look at our <id:guide>. "
-                    "Welcome aboard :saluting_face:", 
-                    ephemeral=False
-                )
-        elif selected_role == "Seaman":
-            role = discord.utils.get(guild.roles, name="Seaman")
-            if role and verified_role:
-                await self.member.add_roles(role, verified_role)
-                await interaction.response.send_message(
-                    f"{self.member.mention} has been verified as a Seaman! Welcome to the Republic Coastal Legion! "
-                    "Please be sure to change your server nickname to match your in-game name. "
-                    "Check out <id:browse> for additional optional roles, and take a look at our <id:guide>. "
-                    "Welcome aboard :saluting_face:", 
-                    ephemeral=False
-                )
-        
-        if not role:
-            await interaction.response.send_message("Role not found. Please check role names.", ephemeral=True)
-
-class RoleSelectView(View):
-    def __init__(self, member: discord.Member):
-        super().__init__()
-        self.add_item(RoleSelect(member))
-
-class EditStockpileModal(discord.ui.Modal, title='Edit Stockpile'):
-    def __init__(self, stockpile):
-        super().__init__()
-        self.stockpile = stockpile
-        self.add_item(discord.ui.TextInput(label='Stockpile Name', default=stockpile['stockpile_name']))
-        self.add_item(discord.ui.TextInput(label='Description', default=stockpile['stockpile_description']))
-        self.add_item(discord.ui.TextInput(label='Location', default=str(stockpile['stockpile_location'])))
-        self.add_item(discord.ui.TextInput(label='Passcode', default=stockpile['stockpile_passcode']))
-
-    async def on_submit(self, interaction: discord.Interaction):
-        self.stockpile['stockpile_name'] = self.children[0].value
-        self.stockpile['stockpile_description'] = self.children[1].value
-        self.stockpile['stockpile_location'] = self.children[2].value
-        self.stockpile['stockpile_passcode'] = self.children[3].value
-
-        success = db_manager.update_stockpile(self.stockpile)
-        if success:
-            await interaction.response.send_message(f"Stockpile '{self.stockpile['stockpile_name']}' has been fully updated.", ephemeral=True)
-        else:
-            await interaction.response.send_message("Failed to update stockpile. Please try again.", ephemeral=True)
-
-class EditItemModalPrimary(discord.ui.Modal, title='Edit Item'):
-    def __init__(self, item):
-        super().__init__()
-        self.item = item
-        self.add_item(discord.ui.TextInput(label='Item Name', default=item['item_name']))
-        self.add_item(discord.ui.TextInput(label='Aliases', default=item['item_aliases']))
-        self.add_item(discord.ui.TextInput(label='Can be crated?', default=str(item['can_be_crated'])))
-        self.add_item(discord.ui.TextInput(label='Can be palletized?', default=str(item['can_be_palleted'])))
-        self.add_item(discord.ui.TextInput(label='Image URL', default=item['image_url']))
-
-    async def on_submit(self, interaction: discord.Interaction):
-        self.item['item_name'] = self.children[0].value
-        self.item['item_aliases'] = self.children[1].value
-        self.item['can_be_crated'] = self.children[2].value
-        self.item['can_be_palleted'] = self.children[3].value
-        self.item['image_url'] = self.children[4].value
-
-        success = db_manager.update_item(self.item)
-        if success:
-            view = EditItemSecondaryView(self.item)
-            await interaction.response.send_message(
-                "Primary fields updated successfully. Click the button below to edit secondary fields.",
-                view=view,
-                ephemeral=True
-            )
-        else:
-            await interaction.response.send_message("Failed to update the item. Please try again.", ephemeral=True)
-
-class EditItemSecondaryView(discord.ui.View):
-    def __init__(self, item):
-        super().__init__()
-        self.item = item
-
-    @discord.ui.button(label="Edit Secondary Fields", style=discord.ButtonStyle.primary)
-    async def edit_secondary(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_modal(EditItemModalSecondary(self.item))
-
-class EditItemModalSecondary(discord.ui.Modal, title='Edit Secondary Fields'):
-    def __init__(self, item):
-        super().__init__()
-        self.item = item
-        self.add_item(discord.ui.TextInput(label='Crate Size', default=str(item['crate_size'])))
-        self.add_item(discord.ui.TextInput(label='Pallet Size', default=str(item['pallet_size'])))
-        self.add_item(discord.ui.TextInput(label='Facilities', default=str(item['facilities'])))
-
-    async def on_submit(self, interaction: discord.Interaction):
-        self.item['crate_size'] = self.children[0].value
-        self.item['pallet_size'] = self.children[1].value
-        self.item['facilities'] = self.children[2].value
-
-        success = db_manager.update_item(self.item)
-        if success:
-            await interaction.response.send_message(f"Item '{self.item['item_name']}' has been fully updated.", ephemeral=True)
-        else:
-            await interaction.response.send_message("Failed to update secondary fields. Please try again.", ephemeral=True)
-
-class PaginatedView(discord.ui.View):
-    def __init__(self, entries, entries_per_page=10):
-        super().__init__(timeout=180)  # 3 minutes timeout
-        self.entries = entries
-        self.entries_per_page = entries_per_page
-        self.current_page = 1
-        self.total_pages = -(-len(entries) // entries_per_page)  # Ceiling division
-
-    @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey)
-    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page > 1:
-            self.current_page -= 1
-            await self.update_message(interaction)
-
-    @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
-    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page < self.total_pages:
-            self.current_page += 1
-            await self.update_message(interaction)
-
-    async def update_message(self, interaction: discord.Interaction):
-        embed = self.create_embed()
-        await interaction.response.edit_message(embed=embed, view=self)
-
-    def create_embed(self):
-        start_idx = (self.current_page - 1) * self.entries_per_page
-        end_idx = start_idx + self.entries_per_page
-        current_entries = self.entries[start_idx:end_idx]
-
-        embed = discord.Embed(title="Database Entries", color=discord.Color.blue())
-        for entry in current_entries:
-            aliases = entry['aliases']
-            if isinstance(aliases, str):
-                aliases = [aliases]  # If it's a string, make it a list with one item
-            aliases_str = ', '.join(aliases) if aliases else 'None'
-            embed.add_field(name=entry['name'], value=f"Aliases: {aliases_str}", inline=False)
-
-        embed.set_footer(text=f"Page {self.current_page}/{self.total_pages}")
-        return embed
-
-#--Startup
-@bot.event
-async def on_ready():
-    print(f'Logged in as {bot.user} (ID: {bot.user.id})')
-    print(f'Guild ID: {bot.guilds[0].id if bot.guilds else "Not in any guild"}')
-    print(f'Bot ID: {bot.user.id}') #Bot ID
-    db_manager.connect_db()
-    db_manager.create_item_table()
-    db_manager.create_facility_table()
-    db_manager.create_stockpile_table()
-    db_manager.create_tasks_table()
-    db_manager.create_custom_tasks_table()
-    
-    tasks = db_manager.get_all_tasks()
-    for task_id, message_id, channel_id in tasks:
-        if message_id is None:
-            channel = bot.get_channel(channel_id)
-            if channel:
-                async for message in channel.history(limit=100):
-                    if message.author == bot.user and message.embeds:
-                        embed = message.embeds[0]
-                        if embed.footer.text == f"Task ID: {task_id}":
-                            db_manager.update_task_message_id(task_id, message.id)
-                            break
-        else:
-            channel = bot.get_channel(channel_id)
-            if channel:
-                try:
-                    message = await channel.fetch_message(message_id)
-                    await message.edit(view=TaskManagerView(task_id))
-                except discord.NotFound:
-                    print(f"Message {message_id} not found for task {task_id}.")
-
-    bot.add_view(TaskManagerView(None))
-    print(f'{bot.user} is ready and tracking task messages.')
-
-@bot.event
-async def on_message(message):
-	print(f'Message from {message.author}: {message.content}')
-	await bot.process_commands(message)
-      
-@bot.event
-async def on_member_join(member):
-    # Replace these IDs with your actual channel IDs
-    # TO DO: Move those values to .json config file
-    how_to_verify_channel_id = config['how_to_verify_channel_id']
-    verification_channel_id = config['verification_channel_id']
-    welcome_channel_id = config['welcome_channel_id']
-
-    # Get the welcome channel using its ID
-    channel = bot.get_channel(welcome_channel_id)
-    
-    if channel:  # Ensure the channel exists
-        # Format the welcome message with correct channel mentions using their IDs
-        await channel.send(
-            f"<:RCL:{1301341129559638087}> Welcome {member.mention}! Please follow the instructions in <#{how_to_verify_channel_id}> "
-            f"and submit your images in <#{verification_channel_id}>. <:RCL:{1301341129559638087}>"
-        )
-#-- Slash Commands --
-#Parameters for help slash command can be added in def help()
-@bot.tree.command()
-async def help(interaction: discord.Interaction):
-    """Bot manual"""  # Description when viewing / commands
-    help_view = PaginationView(help_manual_data)
-    await help_view.send(interaction)
-
-#------ Sync Tree ------
-guild = discord.Object(id='1055525730143969350')
-# Get Guild ID from right clicking on server icon
-# Must have developer mode on discord on setting>Advance>Developer Mode
-# More info on tree can be found on discord.py Git Repo
-@bot.command()
-@commands.guild_only()
-@commands.is_owner()
-async def sync(
-	ctx: Context, guilds: Greedy[discord.Object], spec: Optional[Literal["~", "*", "^"]] = None) -> None:
-	if not guilds:
-		if spec == "~":
-			synced = await ctx.bot.tree.sync(guild=ctx.guild)
-		elif spec == "*":
-			ctx.bot.tree.copy_global_to(guild=ctx.guild)
-			synced = await ctx.bot.tree.sync(guild=ctx.guild)
-		elif spec == "^":
-			ctx.bot.tree.clear_commands(guild=ctx.guild)
-			await ctx.bot.tree.sync(guild=ctx.guild)
-			synced = []
-		else:
-			synced = await ctx.bot.tree.sync()
-		await ctx.send(
-			f"Synced {len(synced)} commands {'globally' if spec is None else 'to the current guild.'}"
-		)
-		return
-		
-	ret = 0
-	for guild in guilds:
-		try:
-			await ctx.bot.tree.sync(guild=guild)
-		except discord.HTTPException:
-			pass
-		else:
-			ret += 1
-			
-	await ctx.send(f"Synced the tree to {ret}/{len(guilds)}.")
-
-@bot.tree.command()
-@has_command_use_role()
-async def add_item(interaction: discord.Interaction, item_name: str, production_facility: str, can_be_crated : str, can_be_palleted : str, crate_size: int, pallet_size : int):
-	"""Add item to the database"""
-	# Scrape image and other necessary values
-	image_url = scraphauler.scrape_image(item_name)
-	facilities = db_manager.get_facility_from_db(production_facility)
-	
-	await interaction.response.send_message("Please enter aliases for item (separate by commas - e.g. \"pcons, pcmats, pcm\"):")
-	
-	# Wait for user input for aliases
-	aliases_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
-	item_aliases = aliases_msg.content
-	alias_list = item_aliases.split(',')
-	formatted_aliases = ",".join([f",{alias.strip()}," for alias in alias_list if alias.strip()])  # Strip spaces
-	item_aliases = formatted_aliases
-	
-	# Store in the database
-	db_manager.add_item_to_db(item_name, item_aliases, facilities, can_be_crated, can_be_palleted, 
-							crate_size, pallet_size, image_url)
-
-	# Confirm the entry
-	await interaction.followup.send(f"Added {item_name} to the database with aliases: {item_aliases}.")
-	
-@bot.tree.command()
-@has_command_use_role()
-async def add_facility(interaction: discord.Interaction, facility_name: str):
-	"""Add facility to the database"""
-	# First response with the initial prompt
-	await interaction.response.send_message("Please enter aliases for this facility (separate by commas):")
-	
-	# Wait for user input for aliases
-	facility_aliases_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
-	facility_aliases = facility_aliases_msg.content
-	alias_list = facility_aliases.split(',')
-	formatted_aliases = ",".join([f",{alias.strip()}," for alias in alias_list if alias.strip()])  # Strip spaces
-	facility_aliases = formatted_aliases
-	
-	# Ask for facility type
-	await interaction.followup.send("Is this facility World-built or Player-built?")
-	
-	facility_type_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
-	facility_type = facility_type_msg.content
-
-	# Scrape image URL
-	image_url = scraphauler.scrape_image(facility_name)
-	
-	# Add the facility to the database
-	db_manager.add_facility_to_db(facility_name, facility_aliases, facility_type, image_url)
-	
-	# Confirm the addition
-	await interaction.followup.send(f"Added {facility_name} to the database with aliases: {facility_aliases}.")
-
-@bot.tree.command()
-@has_command_use_role()
-async def add_stockpile(interaction: discord.Interaction, stockpile_name : str, stockpile_description : str, stockpile_location : str, stockpile_passcode : int):
-	"""Add a stockpile to the database"""
-	
-	# Store in the database
-	db_manager.add_stockpile_to_db(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode)
-
-	# Confirm the entry
-	await interaction.response.send_message(f"Added stockpile {stockpile_name} at {stockpile_location} with passcode {stockpile_passcode}. Description: {stockpile_description}.")
-	
-
-@bot.tree.command()
-@has_command_use_role()
-async def create_task(interaction: discord.Interaction, item_name: str, amount: int, facility: str, stockpile: str):
-    """Create a new production task"""
-    
-    # Query the item, facility, and stockpile from the database
-    item_info = db_manager.get_item_from_db(item_name)
-    facility_info = db_manager.get_facility_from_db(facility)
-    stockpile_info = db_manager.get_stockpile_from_db(stockpile)
-
-    # Handle cases where the item, facility, or stockpile aren't found
-    if not item_info:
-        await interaction.response.send_message(f"Item '{item_name}' not found.")
-        return
-    if not facility_info:
-        await interaction.response.send_message(f"Production facility '{facility}' not found.")
-        return
-    if not stockpile_info:
-        await interaction.response.send_message(f"Stockpile '{stockpile}' not found.")
-        return
-    
-    assigned_users = [str(interaction.user.id)]
-    created_by = str(interaction.user.id)
-    thumbnail = item_info['image_url']
-    
-    # Insert the new task into the database
-    task_id = db_manager.create_task(item_info['id'], amount, facility_info['id'], stockpile_info['id'], created_by, assigned_users, thumbnail)
-    
-    if task_id:
-        task_data = {
-            'id': task_id,
-            'item_name': item_info['item_name'],
-            'amount': amount,
-            'current_amount': 0,
-            'facility_name': facility_info['facility_name'],
-            'stockpile_name': stockpile_info['stockpile_name'],
-            'created_by': created_by,
-            'assigned_users': assigned_users,
-            'thumbnail': thumbnail,
-            'status': 'running'  # Add this line
-        }
-        task_embed_on_create = task_embed(task_data)
-        view = TaskManagerView(task_id)
-        
-        await interaction.response.send_message(embed=task_embed_on_create, view=view)
-        # Save the task message
-        message = await interaction.original_response()
-        await db_manager.save_task_message(task_id, message.id, interaction.channel_id)
-    else:
-        await interaction.response.send_message("Failed to create task in the database")
-
-@bot.tree.command()
-@has_command_use_role()
-async def create_custom_task(interaction: discord.Interaction, task_header: str, task_description: str, task_location: str):
-    """Create a new custom task"""
-    
-    assigned_users = [str(interaction.user.id)]
-    created_by = str(interaction.user.id)
-    
-    # Insert the new task into the database
-    task_id = db_manager.create_custom_task(task_header, task_description, task_location, created_by, assigned_users)
-    
-    if task_id:
-        task_embed_on_create = custom_task_embed({
-            'id': task_id,
-            'task_header': task_header,
-            'task_description': task_description,
-            'task_location': task_location,
-            'created_by': created_by,
-            'assigned_users': assigned_users,
-        })
-        view = CustomTaskManagerView(task_id)
-        
-        await interaction.response.send_message(embed=task_embed_on_create, view=view)
-        # Save the task message
-        message = await interaction.original_response()
-        await db_manager.save_custom_task_message(task_id, message.id, interaction.channel_id)
-    else:
-        await interaction.response.send_message("Failed to create task in the database")
-
-@bot.tree.command()
-@has_command_use_role()
-async def get_item(interaction: discord.Interaction, item_name: str):
-	"""Retrieve item information from the database based on the search term."""
-
-	# Connect to the database and search for the facility or its alias
-	item_info = db_manager.get_item_from_db(item_name)
-	facilities_list = json.loads(item_info['facilities'])
-	facility_name = facilities_list['facility_name']
-
-	get_item_embed = discord.Embed(
-		colour = discord.Colour.dark_gold(),
-		description = "Processing your request, officer...",
-		title = "Item Database"
-	)
-	
-	get_item_embed.set_author(name="Velian Keeper Bot")
-	
-	# Check if facility info was found
-	if item_info:
-		get_item_embed.add_field(name=":newspaper: Item name", value=item_info['item_name'], inline=True),
-		get_item_embed.insert_field_at(1,name=":round_pushpin: Made at", value=facility_name, inline=True),
-		get_item_embed.add_field(name="Aliases", value=item_info['item_aliases'], inline=False),
-		get_item_embed.add_field(name="Can be crated?", value=item_info['can_be_crated'], inline=True),
-		get_item_embed.add_field(name="Can be palletized?", value=item_info['can_be_palleted'], inline=True),
-		get_item_embed.add_field(name="\u200b", value="\u200b", inline=True),
-		get_item_embed.add_field(name="Crate size", value=item_info['crate_size'], inline=True),
-		get_item_embed.add_field(name="Pallet size", value=item_info['pallet_size'], inline=True),
-		get_item_embed.add_field(name="\u200b", value="\u200b", inline=True),
-		get_item_embed.set_thumbnail(url=item_info['image_url']),
-		await interaction.response.send_message(embed=get_item_embed)
-	else:
-		await interaction.response.send_message(f"No item found for '{item_name}'.")
-		
-@bot.tree.command()
-@has_command_use_role()
-async def get_facility(interaction: discord.Interaction, facility_name: str):
-	"""Retrieve a facility information."""
-
-	# Connect to the database and search for the facility or its alias
-	facility_info = db_manager.get_facility_from_db(facility_name)
-	get_facility_embed = discord.Embed(
-		colour = discord.Colour.green(),
-		description = "Processing your request, officer...",
-		title = "Facility Knowledge Database"
-	)
-	
-	get_facility_embed.set_author(name="Velian Keeper Bot")
-	
-	# Check if facility info was found
-	if facility_info:
-		get_facility_embed.add_field(name=":newspaper: Facility Name", value=facility_info['facility_name'], inline=True),
-		get_facility_embed.insert_field_at(1,name=":round_pushpin: Build type", value=facility_info['facility_type'], inline=True),
-		get_facility_embed.add_field(name="Aliases", value=facility_info['facility_aliases'], inline=False),
-		get_facility_embed.set_thumbnail(url=facility_info['image_url']),
-		await interaction.response.send_message(embed=get_facility_embed)
-	else:
-		await interaction.response.send_message(f"No facility found for '{facility_name}'.")
-		
-@bot.tree.command()
-@has_command_use_role()
-async def get_stockpile(interaction: discord.Interaction, stockpile_name: str):
-	"""Review stockpiles info."""
-
-	# Connect to the database and search for the facility or its alias
-	stockpile_info = db_manager.get_stockpile_from_db(stockpile_name)
-	get_stockpile_embed = discord.Embed(
-		colour = discord.Colour.brand_red(),
-		description = "This is a restricted facility, i hope you got those papers signed.",
-		title = "Stockpile Information"
-	)
-	
-	get_stockpile_embed.set_author(name="Velian Keeper Bot")
-	
-	# Check if facility info was found
-	if stockpile_info:
-		get_stockpile_embed.add_field(name=":newspaper: Stockpile Name", value=stockpile_info['stockpile_name'], inline=True),
-		get_stockpile_embed.insert_field_at(1,name=":map: Location", value=stockpile_info['stockpile_location'], inline=True),
-		get_stockpile_embed.add_field(name="Description:", value=stockpile_info['stockpile_description'], inline=False),
-		get_stockpile_embed.add_field(name="Passcode", value=f"||{stockpile_info['stockpile_passcode']}||", inline=False),
-		get_stockpile_embed.set_thumbnail(url="https://static.wikia.nocookie.net/foxhole_gamepedia_en/images/7/73/Icon_Blueprint.png/revision/latest?cb=20180416214806")
-		await interaction.response.send_message(embed=get_stockpile_embed)
-	else:
-		await interaction.response.send_message(f"No stockpile found for '{stockpile_name}'.")
-	
-@bot.tree.command()
-@has_critical_command_use_role()
-async def purge_all_tasks(interaction: discord.Interaction):
-	await interaction.response.send_message("**THIS WILL DELETE ALL CREATED TASKS. THIS ACTION IS IRREVERSIBLE.** Do you want to delete all current tasks? Type YES to proceed")
-	purge = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
-	
-	if purge.content in ['YES']:
-		db_manager.purge_tasks()
-		await interaction.followup.send("All tasks have been deleted. \n*Now you become death. The destroyer of worlds.*")
-	else :
-		await interaction.followup.send("No action has been taken. All tasks are running.")
-	
-@bot.tree.command()
-@has_critical_command_use_role()
-async def purge_all_stockpiles(interaction: discord.Interaction):
-	await interaction.response.send_message("**THIS WILL DELETE ALL KNOWN STOCKPILES. THIS ACTION IS IRREVERSIBLE.** Do you want to delete all current stockpiles? Type YES to proceed")
-	purge = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
-	
-	if purge.content in ['YES']:
-		db_manager.purge_stockpiles()
-		await interaction.followup.send("All stockpiles have been deleted. \n*Jesus H. Christ, why is your footlocker unlocked?!*")
-	else :
-		await interaction.followup.send("No action has been taken. All tasks are running.")
-
-@bot.tree.command()
-@has_critical_command_use_role()
-async def edit_stockpile(interaction: discord.Interaction, stockpile_name: str):
-    """Edit an existing stockpile in the database"""
-    stockpile = db_manager.get_stockpile_from_db(stockpile_name)
-    if not stockpile:
-        await interaction.response.send_message(f"Stockpile '{stockpile_name}' not found in the database.", ephemeral=True)
-        return
-    
-    await interaction.response.send_modal(EditStockpileModal(stockpile))
-
-@bot.tree.command()
-@has_critical_command_use_role()
-async def edit_item(interaction: discord.Interaction, item_name: str):
-    """Edit an existing item in the database"""
-    item = db_manager.get_item_from_db(item_name)
-    if not item:
-        await interaction.response.send_message(f"Item '{item_name}' not found in the database.", ephemeral=True)
-        return
-    
-    await interaction.response.send_modal(EditItemModalPrimary(item))
-
-@bot.tree.command()
-@has_critical_command_use_role()
-async def delete_item(interaction: discord.Interaction, item_name: str):
-    """Delete an item from the database."""
-    
-    # Check if the item exists using the database manager
-    item_exists = db_manager.get_item_by_name(item_name)
-
-    if item_exists is None:
-        await interaction.response.send_message(f"No item found with the name: {item_name}.", ephemeral=True)
-        return
-
-    # Confirmation message
-    await interaction.response.send_message(f"Are you sure you want to delete the item '{item_name}'? Type 'yes' to confirm.", ephemeral=True)
-
-    # Wait for the user's confirmation
-    def check(m):
-        return m.author == interaction.user and m.content.lower() == "yes"
-
-    try:
-        # Wait for user confirmation
-        msg = await bot.wait_for('message', check=check, timeout=30.0)
-
-        # Delete the item using the database manager
-        db_manager.delete_item_by_name(item_name)
-        
-        await interaction.followup.send(f"Item '{item_name}' has been successfully deleted.", ephemeral=True)
-
-    except asyncio.TimeoutError:
-        await interaction.followup.send("Timeout: Item deletion canceled.", ephemeral=True)
-
-@bot.tree.command()
-@has_critical_command_use_role()
-async def delete_stockpile(interaction: discord.Interaction, stockpile_name: str):
-    """Delete stockpile from the database."""
-    
-    # Check if the item exists using the database manager
-    stockpile_exists = db_manager.get_stockpile_by_name(stockpile_name)
-
-    if stockpile_exists is None:
-        await interaction.response.send_message(f"No stockpile found with the name: {stockpile_exists}.", ephemeral=True)
-        return
-
-    # Confirmation message
-    await interaction.response.send_message(f"Are you sure you want to delete the stockpile '{stockpile_name}'? Type 'yes' to confirm.", ephemeral=True)
-
-    # Wait for the user's confirmation
-    def check(m):
-        return m.author == interaction.user and m.content.lower() == "yes"
-
-    try:
-        # Wait for user confirmation
-        msg = await bot.wait_for('message', check=check, timeout=30.0)
-
-        # Delete the item using the database manager
-        db_manager.delete_stockpile_by_name(stockpile_name)
-        
-        await interaction.followup.send(f"Item '{stockpile_name}' has been successfully deleted.", ephemeral=True)
-
-    except asyncio.TimeoutError:
-        await interaction.followup.send("Timeout: Item deletion canceled.", ephemeral=True)
-
-@bot.event
-async def on_error(event, *args, **kwargs):
-    logger.error(f"An error occurred in event {event}")
-    logger.error(f"Args: {args}")
-    logger.error(f"Kwargs: {kwargs}")
-    logger.error(traceback.format_exc())
-
-@bot.tree.command()
-@app_commands.checks.has_any_role(*config['command_use_roles'])
-async def show_all_facilities(interaction: discord.Interaction):
-    """Show all facilities in the database"""
-    facilities = db_manager.get_all_facilities()
-    if not facilities:
-        await interaction.response.send_message("No facilities found in the database.", ephemeral=True)
-        return
-
-    view = PaginatedView(facilities)
-    embed = view.create_embed()
-    await interaction.response.send_message(embed=embed, view=view)
-
-@bot.tree.command()
-@app_commands.checks.has_any_role(*config['command_use_roles'])
-async def show_all_items(interaction: discord.Interaction):
-    """Show all items in the database"""
-    items = db_manager.get_all_items()
-    if not items:
-        await interaction.response.send_message("No items found in the database.", ephemeral=True)
-        return
-
-    view = PaginatedView(items)
-    embed = view.create_embed()
-    await interaction.response.send_message(embed=embed, view=view)
-
-bot.run(bot_token)
-        
\ No newline at end of file
+import discord
+from discord.ext.commands import Greedy, Context
+from discord.ext import commands
+from discord.ext import tasks
+from discord.ui import View, Select
+from discord import app_commands
+from discord import Embed
+from typing import Literal, Optional
+
+import scraphauler #Import scraper
+import bulk_import #Import bulk wiki import - for /bulk_import
+import db_manager #Import database management
+import db_async #Import awaitable database access
+import metrics #Import metrics - for latency tracking and /botstats
+import metrics_server #Import metrics endpoint - for Prometheus scraping
+import embeds #Import task embeds
+import embed_updates #Import embed update scheduler - for coalescing task message edits
+from embeds import task_embed, custom_task_embed
+import json #Import json managing
+import logging #Import logging
+import traceback #Import traceback  
+import asyncio #Import asyncio - for async tasks    
+import time #Import time - for startup timing
+from collections import defaultdict
+
+#Enable logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Time every database function and wiki scrape. db_async looks functions up on each call, so it picks up the timed versions.
+metrics.instrument_module(db_manager, "db.", exclude=("get_connection", "get_transaction", "close_pool", "normalize_term", "split_aliases", "parse_aliases"))
+metrics.instrument_module(scraphauler, "scrape.", exclude=("get_session", "get_cache", "configure_cache", "close", "page_url"))
+
+#--Init--
+intents = discord.Intents.default()
+intents.message_content = True
+intents.members = True
+class VelianKeeperTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction):
+        # Runs before the command's own checks, so command timings include the role checks
+        interaction.extras['started'] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        record_command_timing(interaction, interaction.command, error=True)
+        await super().on_error(interaction, error)
+
+def record_command_timing(interaction, command, error=False):
+    started = interaction.extras.get('started')
+    if started is not None and command is not None:
+        metrics.record(f"command.{command.qualified_name}", time.perf_counter() - started, error)
+
+class VelianKeeperBot(commands.Bot):
+    metrics_server = None
+
+    async def setup_hook(self):
+        # Task buttons decode their task from the custom_id, so these registrations cover every task message.
+        # Registered here rather than in on_ready, which runs again on every reconnect
+        self.add_dynamic_items(SignUpButton, SubmitButton, CloseTaskButton)
+        self.add_view(LegacyTaskView())
+
+        # Optional Prometheus endpoint, served from the bot's own event loop
+        if metrics_port:
+            self.metrics_server = metrics_server.MetricsServer(self, metrics_host, metrics_port)
+            await self.metrics_server.start()
+
+    async def close(self):
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        # Commit queued task mutations, send pending embed edits and release the scraper's pooled wiki connections before the event loop goes away
+        await db_async.flush_writes()
+        await task_message_updates.flush()
+        await scraphauler.close()
+        await super().close()
+
+bot = VelianKeeperBot(command_prefix="/", intents=intents, tree_cls=VelianKeeperTree)
+
+with open('vkeeper_config.json', 'r') as config_file:
+    config = json.load(config_file)
+
+# Storage backend - see db_manager.DEFAULT_DATABASE_SETTINGS for the keys of the "database" section
+db_manager.configure_database(config.get('database'))
+
+# Database health check
+if db_manager.check_database_health():
+    logger.info("Database health check passed. Bot initialization continuing.")
+else:
+    logger.error("Database health check failed. Please resolve the issues and restart the bot.")
+    exit(1)  # Exit the script if the database check fails
+
+# Schema migrations, query plan check and catalog cache - before the bot goes online, so a failure stops the process
+try:
+    db_manager.bootstrap_database()
+except Exception as e:
+    logger.error(f"Database bootstrap failed: {e}. Please resolve the issues and restart the bot.")
+    exit(1)
+
+with open('vkeeper_quotes.json', 'r') as f:
+    quotes = json.load(f)
+embeds.task_quotes = quotes['task_quotes']
+
+#This section sorts out the roles and tokens from the config file - these are used to check if a user has the correct roles to use certain commands
+verification_roles = config['verification_roles']
+command_use_roles = config['command_use_roles']
+critical_command_roles = config['critical_command_roles']
+bot_token = config['bot_token']
+metrics_log_interval = config.get('metrics_log_interval_minutes', 15) # How often the timings are written to the log
+metrics_port = config.get('metrics_port') # Set to serve Prometheus metrics at http://<metrics_host>:<port>/metrics
+metrics_host = config.get('metrics_host', '127.0.0.1')
+embed_update_window = config.get('embed_update_window_ms', 500) / 1000 # Clicks on a task within this window share one message edit
+embed_edits_per_channel = config.get('embed_edits_per_channel', embed_updates.DEFAULT_CHANNEL_EDITS) # Edits allowed per channel every embed_edit_period_seconds
+embed_edit_period = config.get('embed_edit_period_seconds', embed_updates.DEFAULT_CHANNEL_PERIOD)
+
+# Scrape cache - every key is optional, see scrape_cache.py for the defaults
+scrape_cache_config = config.get('scrape_cache', {})
+scraphauler.configure_cache(
+    path=scrape_cache_config.get('path'),
+    ttl=scrape_cache_config.get('ttl_seconds'),
+    max_entries=scrape_cache_config.get('max_entries')
+)
+
+#This section loads the help manual from the json file
+def load_help_manual():
+    with open('vkeeper_manual.json', 'r') as f:
+        return json.load(f)
+help_manual_data = load_help_manual()
+
+#---Role checks---
+# The config lists roles by name (or by ID). Each guild's names are resolved once into frozensets of role IDs,
+# so a check is one set test instead of comparing every role name of the user against a list.
+ROLE_GROUPS = {
+    'verification': verification_roles,
+    'command_use': command_use_roles,
+    'critical': critical_command_roles
+}
+guild_role_ids = {} # guild ID -> {group: frozenset of allowed role IDs}
+
+def resolve_role_ids(guild):
+    ids_by_name = defaultdict(set)
+    for role in guild.roles:
+        ids_by_name[role.name].add(role.id)
+    resolved = {}
+    for group, roles in ROLE_GROUPS.items():
+        allowed = set()
+        for role in roles:
+            if isinstance(role, int):
+                allowed.add(role)
+            else:
+                allowed.update(ids_by_name.get(role, ()))
+        resolved[group] = frozenset(allowed)
+    guild_role_ids[guild.id] = resolved
+    return resolved
+
+def has_role_in_group(interaction: discord.Interaction, group):
+    if interaction.guild is None:
+        return False
+    allowed = guild_role_ids.get(interaction.guild.id) or resolve_role_ids(interaction.guild)
+    return not allowed[group].isdisjoint(role.id for role in interaction.user.roles)
+
+def role_group_check(group, check_name, denied_message):
+    @metrics.timed(f"check.{check_name}")
+    async def predicate(interaction: discord.Interaction):
+        if has_role_in_group(interaction, group):
+            return True
+        await interaction.response.send_message(denied_message, ephemeral=True)
+        return False
+    return app_commands.check(predicate)
+
+#---Verification role check - for /vouch---
+def has_verification_role():
+    return role_group_check('verification', "has_verification_role", "You do not have permission to use this command.")
+
+#---Command use check - for everything else---
+def has_command_use_role():
+    return role_group_check('command_use', "has_command_use_role", "You do not have permission to use this command.")
+
+#---Critical command check - for critical commands---
+def has_critical_command_use_role():
+    return role_group_check('critical', "has_critical_command_use_role", "This is a critical command. You don't have permission to use it.")
+
+#This section provides autocomplete suggestions for item, facility and stockpile names - served from memory
+async def item_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in db_manager.search_items(current)]
+
+async def facility_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in db_manager.search_facilities(current)]
+
+async def stockpile_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in db_manager.search_stockpiles(current)]
+
+#This section creates the dropdown view for the vouch command
+@bot.tree.command(name="vouch", description="Verify a new user and assign roles.")
+@has_verification_role()
+@app_commands.describe(member="The member to verify")
+async def vouch(interaction: discord.Interaction, member: discord.Member):
+    # Create the dropdown view and send it to the officer
+    await interaction.response.send_message("Select the role for the user:", view=RoleSelectView(member), ephemeral=True)
+
+#This section creates the pagination view for the help manual
+class PaginationView(discord.ui.View):
+
+	def __init__(self, data):
+		super().__init__(timeout=None)
+		self.data = data
+		self.current_page = 1
+		self.sep = 5
+
+	async def send (self, interaction: discord.Interaction):
+		self.message = await interaction.response.send_message(embed=self.create_help_embed(), view=self)
+		
+	def create_help_embed(self):
+		embed = discord.Embed(title="Velian Keeper User Manual")
+		start = (self.current_page - 1) * self.sep
+		end =  start + self.sep
+		for item in self.data[start:end]:
+			command = item['command']
+			description = item['description']
+			embed.add_field(name=command, value=description, inline=False)
+			
+		embed.set_footer(text=f"Page {self.current_page}/{self.max_pages}")
+		return embed
+		
+	async def update_message(self, interaction: discord.Interaction):
+		await interaction.response.edit_message(embed=self.create_help_embed(), view=self)
+		
+	@property
+	def max_pages(self):
+		return -(-len(self.data) // self.sep)  # Ceiling division
+		
+	@discord.ui.button(label="First", style=discord.ButtonStyle.primary)
+	async def first_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+		self.current_page = 1
+		await self.update_message(interaction)
+
+	@discord.ui.button(label="Previous", style=discord.ButtonStyle.primary)
+	async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+		self.current_page = max(1, self.current_page - 1)
+		await self.update_message(interaction)
+
+	@discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+	async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+		self.current_page = min(self.max_pages, self.current_page + 1)
+		await self.update_message(interaction)
+
+	@discord.ui.button(label="Last", style=discord.ButtonStyle.primary)
+	async def last_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+		self.current_page = self.max_pages
+		await self.update_message(interaction)
+
+#Task message buttons carry the task in their custom_id ("task:sign_up:12"), so one registration per button type
+#serves every task message after a restart - no per-message views or edits needed
+TASK = db_manager.TASK_KIND
+CUSTOM_TASK = db_manager.CUSTOM_TASK_KIND
+
+#Read the task kind and ID back out of a task embed footer ("Task ID: 12 | quote" or "Custom Task ID: 12")
+def task_ref_from_footer(text):
+    for kind, prefix in ((CUSTOM_TASK, "Custom Task ID: "), (TASK, "Task ID: ")):
+        if text and text.startswith(prefix):
+            task_id = text[len(prefix):].split(" | ", 1)[0].strip()
+            return (kind, int(task_id)) if task_id.isdigit() else None
+    return None
+
+def task_view(kind, task_id):
+    return TaskManagerView(task_id) if kind == TASK else CustomTaskManagerView(task_id)
+
+#Build the current embed of a task message, or None once the task is gone
+async def render_task_embed(kind, task_id):
+    if kind == TASK:
+        task = await db_async.get_task(task_id)
+        return task_embed(task) if task else None
+    task = await db_async.get_custom_task(task_id)
+    return custom_task_embed(task) if task else None
+
+#Messages still showing the fixed legacy custom_ids get the per-task buttons with their next embed edit
+LEGACY_CUSTOM_IDS = {"sign_up", "submit", "close_task", "close_custom_task"}
+
+def upgrade_task_view(message, kind, task_id):
+    custom_ids = {getattr(item, 'custom_id', None) for row in message.components for item in getattr(row, 'children', ())}
+    return task_view(kind, task_id) if custom_ids & LEGACY_CUSTOM_IDS else None
+
+#Task message edits are debounced per task and paced per channel, so bursts of clicks don't run into Discord's edit limits
+task_message_updates = embed_updates.EmbedUpdateScheduler(render_task_embed, embed_update_window, embed_edits_per_channel, embed_edit_period,
+                                                          view=upgrade_task_view)
+
+async def toggle_sign_up(interaction: discord.Interaction, kind, task_id):
+    # Acknowledge the click right away - the embed edit follows once the burst of clicks settles
+    await interaction.response.defer()
+
+    # Adds the user if they are not assigned yet, otherwise removes them
+    assigned = await db_async.toggle_task_assignee(kind, task_id, interaction.user.id)
+    if assigned is None:
+        await interaction.followup.send("This task no longer exists.", ephemeral=True)
+        return
+    action = "signed up for" if assigned else "dropped from"
+
+    # Update the embed with the new user list
+    await task_view(kind, task_id).update_message(interaction)
+
+    await interaction.followup.send(f"You've been {action} the task!", ephemeral=True)
+
+async def close_task_message(interaction: discord.Interaction, task_id):
+    # Load the completed tasks channel ID from config
+    with open('vkeeper_config.json', 'r') as config_file:
+        config = json.load(config_file)
+    completed_channel_id = config['completed_tasks_channel_id']
+
+    # Update task status in the database
+    await db_async.update_task_status(task_id, "closed")
+    task_message_updates.discard(TASK, task_id)
+
+    # Get the updated task information
+    task = await db_async.get_task(task_id)
+
+    # Create a new embed for the completed task
+    completed_embed = task_embed(task)
+    completed_embed.color = discord.Color.red()
+    completed_embed.add_field(name="Status", value="Closed", inline=False)
+
+    # Send the completed task to the completed tasks channel
+    completed_channel = interaction.guild.get_channel(completed_channel_id)
+    await completed_channel.send(embed=completed_embed)
+
+    # Delete the original task message
+    try:
+        await interaction.message.delete()
+    except discord.errors.NotFound:
+        # The message was already deleted
+        pass
+
+    await interaction.response.send_message("Task marked as closed, moved to the completed tasks channel, and removed from the original channel.", ephemeral=True)
+
+async def close_custom_task_message(interaction: discord.Interaction, task_id):
+    try:
+        # Mark the task as closed in the database
+        await db_async.close_custom_task(task_id)
+        task_message_updates.discard(CUSTOM_TASK, task_id)
+        logger.info(f"Task {task_id} marked as closed in the database")
+
+        # Delete the original message
+        await interaction.message.delete()
+        logger.info(f"Message for task {task_id} deleted")
+
+        # Send a confirmation message
+        await interaction.response.send_message(f"Task {task_id} has been closed and removed.", ephemeral=True)
+    except Exception as e:
+        logger.error(f"Error in close_custom_task_message for task {task_id}: {str(e)}")
+        await interaction.response.send_message(f"An error occurred while closing the task: {str(e)}", ephemeral=True)
+
+class SignUpButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?P<kind>task|custom):sign_up:(?P<task_id>[0-9]+)'):
+    def __init__(self, kind, task_id):
+        super().__init__(discord.ui.Button(label="Pick task", style=discord.ButtonStyle.green, custom_id=f"{kind}:sign_up:{task_id}"))
+        self.kind = kind
+        self.task_id = task_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['kind'], int(match['task_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        await toggle_sign_up(interaction, self.kind, self.task_id)
+
+class SubmitButton(discord.ui.DynamicItem[discord.ui.Button], template=r'task:submit:(?P<task_id>[0-9]+)'):
+    def __init__(self, task_id):
+        super().__init__(discord.ui.Button(label="Submit", style=discord.ButtonStyle.blurple, custom_id=f"task:submit:{task_id}"))
+        self.task_id = task_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(int(match['task_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.send_modal(SubmitModal(self.task_id, TaskManagerView(self.task_id)))
+
+class CloseTaskButton(discord.ui.DynamicItem[discord.ui.Button], template=r'(?P<kind>task|custom):close:(?P<task_id>[0-9]+)'):
+    def __init__(self, kind, task_id):
+        super().__init__(discord.ui.Button(label="Close Task", style=discord.ButtonStyle.red, custom_id=f"{kind}:close:{task_id}"))
+        self.kind = kind
+        self.task_id = task_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match['kind'], int(match['task_id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        if self.kind == TASK:
+            await close_task_message(interaction, self.task_id)
+        else:
+            await close_custom_task_message(interaction, self.task_id)
+
+class TaskManagerView(discord.ui.View):
+    def __init__(self, task_id):
+        super().__init__(timeout=None)
+        self.task_id = task_id
+        self.add_item(SignUpButton(TASK, task_id))
+        self.add_item(SubmitButton(task_id))
+        self.add_item(CloseTaskButton(TASK, task_id))
+
+    # Schedules a re-render of the task message; the interaction must already be acknowledged
+    async def update_message(self, interaction: discord.Interaction):
+        task_message_updates.mark_dirty(TASK, self.task_id, interaction.message)
+
+class CustomTaskManagerView(discord.ui.View):
+    def __init__(self, task_id):
+        super().__init__(timeout=None)
+        self.task_id = task_id
+        self.add_item(SignUpButton(CUSTOM_TASK, task_id))
+        self.add_item(CloseTaskButton(CUSTOM_TASK, task_id))
+
+    # Schedules a re-render of the task message; the interaction must already be acknowledged
+    async def update_message(self, interaction: discord.Interaction):
+        task_message_updates.mark_dirty(CUSTOM_TASK, self.task_id, interaction.message)
+
+#Messages posted before task IDs were encoded in custom_ids use fixed IDs - resolve the task from the embed footer instead
+class LegacyTaskView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    async def resolve_task(self, interaction: discord.Interaction):
+        embeds = interaction.message.embeds if interaction.message else []
+        task_ref = task_ref_from_footer(embeds[0].footer.text) if embeds else None
+        if task_ref is None:
+            await interaction.response.send_message("Could not find the task for this message.", ephemeral=True)
+        return task_ref
+
+    @discord.ui.button(label="Pick task", style=discord.ButtonStyle.green, custom_id="sign_up")
+    async def sign_up(self, interaction: discord.Interaction, button: discord.ui.Button):
+        task_ref = await self.resolve_task(interaction)
+        if task_ref:
+            await toggle_sign_up(interaction, *task_ref)
+
+    @discord.ui.button(label="Submit", style=discord.ButtonStyle.blurple, custom_id="submit")
+    async def submit(self, interaction: discord.Interaction, button: discord.ui.Button):
+        task_ref = await self.resolve_task(interaction)
+        if task_ref is None:
+            return
+        kind, task_id = task_ref
+        if kind == TASK:
+            await interaction.response.send_modal(SubmitModal(task_id, TaskManagerView(task_id)))
+        else:
+            await interaction.response.send_message("Custom tasks do not track submitted amounts.", ephemeral=True)
+
+    @discord.ui.button(label="Close Task", style=discord.ButtonStyle.red, custom_id="close_task")
+    async def close_task_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        task_ref = await self.resolve_task(interaction)
+        if task_ref:
+            await close_task_message(interaction, task_ref[1])
+
+    @discord.ui.button(label="Close Task", style=discord.ButtonStyle.red, custom_id="close_custom_task")
+    async def close_custom_task_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        task_ref = await self.resolve_task(interaction)
+        if task_ref:
+            await close_custom_task_message(interaction, task_ref[1])
+
+class SubmitModal(discord.ui.Modal, title='Submit Progress'):
+    amount = discord.ui.TextInput(label='Amount to submit')
+
+    def __init__(self, task_id, view):
+        super().__init__()
+        self.task_id = task_id
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            amount = int(self.amount.value)
+            # Acknowledge the submission right away - the embed edit follows once the burst of submissions settles
+            await interaction.response.defer()
+            progress = await db_async.add_task_progress(self.task_id, amount)
+            if progress is None:
+                await interaction.followup.send("This task no longer exists, so nothing was submitted.", ephemeral=True)
+                return
+            new_amount = progress['current_amount']
+            
+            await self.view.update_message(interaction)
+            logger.info(f"Embed update scheduled")
+            await interaction.followup.send(f"Successfully submitted {amount}.", ephemeral=True)
+            
+            # Only the submission that crosses the target completes the task, even if several land at once
+            if new_amount - amount < progress['amount'] <= new_amount:
+                
+                with open('vkeeper_config.json', 'r') as config_file:
+                    config = json.load(config_file)
+                completed_channel_id = config['completed_tasks_channel_id']
+
+                # Update task status in the database
+                await db_async.update_task_status(self.task_id, "closed")
+                task_message_updates.discard(TASK, self.task_id)
+
+                # Get the updated task information
+                task = await db_async.get_task(self.task_id)
+
+                # Create a new embed for the completed task
+                completed_embed = task_embed(task)
+                completed_embed.color = discord.Color.green()
+                completed_embed.add_field(name="Status", value="Completed", inline=False)
+
+        # Send the completed task to the completed tasks channel
+                completed_channel = interaction.guild.get_channel(completed_channel_id)
+                await completed_channel.send(embed=completed_embed)
+                try:
+                    await interaction.message.delete()
+                except discord.errors.NotFound:
+                    # The message was already deleted
+                    pass
+
+                await interaction.followup.send("Task marked as completed, moved to the completed tasks channel, and removed from the original channel.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in SubmitModal: {str(e)}")
+            if interaction.response.is_done():
+                await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
+            else:
+                await interaction.response.send_message(f"An error occurred: {str(e)}", ephemeral=True)
+
+class RoleSelect(discord.ui.Select):
+    def __init__(self, member: discord.Member):
+        self.member = member
+        # Define the dropdown options
+        options = [
+            discord.SelectOption(label="Ally", description="Assign the Ally role"),
+            discord.SelectOption(label="Seaman", description="Assign the Member role"),
+        ]
+        
+		  # Initialize the dropdown
+        super().__init__(placeholder="Choose the role to assign...", min_values=1, max_values=1, options=options)
+    
+    async def callback(self, interaction: discord.Interaction):
+        selected_role = self.values[0]
+        guild = interaction.guild
+        role = None
+        verified_role = discord.utils.get(guild.roles, name="Legionnaire")
+        
+        if selected_role == "Ally":
+            role = discord.utils.get(guild.roles, name="Ally")
+            if role:
+                await self.member.add_roles(role)
+                await interaction.response.send_message(
+                    f"{self.member.mention} has been verified as an Ally! Welcome to the Republic Coastal Legion! "
+                    "Please be sure to change your server nickname to match your in-game name. "
+                    "Check out <id:browse> for additional optional roles, and take a look at our <id:guide>. "
+                    "Welcome aboard :saluting_face:", 
+                    ephemeral=False
+                )
+        elif selected_role == "Seaman":
+            role = discord.utils.get(guild.roles, name="Seaman")
+            if role and verified_role:
+                await self.member.add_roles(role, verified_role)
+                await interaction.response.send_message(
+                    f"{self.member.mention} has been verified as a Seaman! Welcome to the Republic Coastal Legion! "
+                    "Please be sure to change your server nickname to match your in-game name. "
+                    "Check out <id:browse> for additional optional roles, and take a look at our <id:guide>. "
+                    "Welcome aboard :saluting_face:", 
+                    ephemeral=False
+                )
+        
+        if not role:
+            await interaction.response.send_message("Role not found. Please check role names.", ephemeral=True)
+
+class RoleSelectView(View):
+    def __init__(self, member: discord.Member):
+        super().__init__()
+        self.add_item(RoleSelect(member))
+
+class EditStockpileModal(discord.ui.Modal, title='Edit Stockpile'):
+    def __init__(self, stockpile):
+        super().__init__()
+        self.stockpile = stockpile
+        self.add_item(discord.ui.TextInput(label='Stockpile Name', default=stockpile['stockpile_name']))
+        self.add_item(discord.ui.TextInput(label='Description', default=stockpile['stockpile_description']))
+        self.add_item(discord.ui.TextInput(label='Location', default=str(stockpile['stockpile_location'])))
+        self.add_item(discord.ui.TextInput(label='Passcode', default=stockpile['stockpile_passcode']))
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.stockpile['stockpile_name'] = self.children[0].value
+        self.stockpile['stockpile_description'] = self.children[1].value
+        self.stockpile['stockpile_location'] = self.children[2].value
+        self.stockpile['stockpile_passcode'] = self.children[3].value
+
+        success = await db_async.update_stockpile(self.stockpile)
+        if success:
+            await interaction.response.send_message(f"Stockpile '{self.stockpile['stockpile_name']}' has been fully updated.", ephemeral=True)
+        else:
+            await interaction.response.send_message("Failed to update stockpile. Please try again.", ephemeral=True)
+
+class EditItemModalPrimary(discord.ui.Modal, title='Edit Item'):
+    def __init__(self, item):
+        super().__init__()
+        self.item = item
+        self.add_item(discord.ui.TextInput(label='Item Name', default=item['item_name']))
+        self.add_item(discord.ui.TextInput(label='Aliases', default=item['item_aliases']))
+        self.add_item(discord.ui.TextInput(label='Can be crated?', default=str(item['can_be_crated'])))
+        self.add_item(discord.ui.TextInput(label='Can be palletized?', default=str(item['can_be_palleted'])))
+        self.add_item(discord.ui.TextInput(label='Image URL', default=item['image_url']))
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.item['item_name'] = self.children[0].value
+        self.item['item_aliases'] = self.children[1].value
+        self.item['can_be_crated'] = self.children[2].value
+        self.item['can_be_palleted'] = self.children[3].value
+        self.item['image_url'] = self.children[4].value
+
+        success = await db_async.update_item(self.item)
+        if success:
+            view = EditItemSecondaryView(self.item)
+            await interaction.response.send_message(
+                "Primary fields updated successfully. Click the button below to edit secondary fields.",
+                view=view,
+                ephemeral=True
+            )
+        else:
+            await interaction.response.send_message("Failed to update the item. Please try again.", ephemeral=True)
+
+class EditItemSecondaryView(discord.ui.View):
+    def __init__(self, item):
+        super().__init__()
+        self.item = item
+
+    @discord.ui.button(label="Edit Secondary Fields", style=discord.ButtonStyle.primary)
+    async def edit_secondary(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(EditItemModalSecondary(self.item))
+
+class EditItemModalSecondary(discord.ui.Modal, title='Edit Secondary Fields'):
+    def __init__(self, item):
+        super().__init__()
+        self.item = item
+        self.add_item(discord.ui.TextInput(label='Crate Size', default=str(item['crate_size'])))
+        self.add_item(discord.ui.TextInput(label='Pallet Size', default=str(item['pallet_size'])))
+        self.add_item(discord.ui.TextInput(label='Facilities', default=str(item['facilities'])))
+
+    async def on_submit(self, interaction: discord.Interaction):
+        self.item['crate_size'] = self.children[0].value
+        self.item['pallet_size'] = self.children[1].value
+        self.item['facilities'] = self.children[2].value
+
+        success = await db_async.update_item(self.item)
+        if success:
+            await interaction.response.send_message(f"Item '{self.item['item_name']}' has been fully updated.", ephemeral=True)
+        else:
+            await interaction.response.send_message("Failed to update secondary fields. Please try again.", ephemeral=True)
+
+class PaginatedView(discord.ui.View):
+    def __init__(self, entries, entries_per_page=10):
+        super().__init__(timeout=180)  # 3 minutes timeout
+        self.entries = entries
+        self.entries_per_page = entries_per_page
+        self.current_page = 1
+        self.total_pages = -(-len(entries) // entries_per_page)  # Ceiling division
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page > 1:
+            self.current_page -= 1
+            await self.update_message(interaction)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.current_page < self.total_pages:
+            self.current_page += 1
+            await self.update_message(interaction)
+
+    async def update_message(self, interaction: discord.Interaction):
+        embed = self.create_embed()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    def create_embed(self):
+        start_idx = (self.current_page - 1) * self.entries_per_page
+        end_idx = start_idx + self.entries_per_page
+        current_entries = self.entries[start_idx:end_idx]
+
+        embed = discord.Embed(title="Database Entries", color=discord.Color.blue())
+        for entry in current_entries:
+            aliases = entry['aliases']
+            if isinstance(aliases, str):
+                aliases = [aliases]  # If it's a string, make it a list with one item
+            aliases_str = ', '.join(aliases) if aliases else 'None'
+            embed.add_field(name=entry['name'], value=f"Aliases: {aliases_str}", inline=False)
+
+        embed.set_footer(text=f"Page {self.current_page}/{self.total_pages}")
+        return embed
+
+#--Startup
+RECONCILE_HISTORY_LIMIT = 200 # Messages scanned per channel when looking for tasks without a stored message ID
+
+#Backfill message IDs for tasks whose message was never recorded, with one history scan per channel
+async def reconcile_task_messages():
+    started = time.perf_counter()
+    tasks = await db_async.get_all_tasks()
+
+    by_channel = defaultdict(list)
+    for task_id, message_id, channel_id in tasks:
+        by_channel[channel_id].append((task_id, message_id))
+
+    backfills = []
+    for channel_id, channel_tasks in by_channel.items():
+        missing = {task_id for task_id, message_id in channel_tasks if message_id is None}
+        channel = bot.get_channel(channel_id) if channel_id else None
+        if not missing or not channel:
+            continue
+
+        # One history scan per channel finds every task message that is missing its ID
+        async for message in channel.history(limit=RECONCILE_HISTORY_LIMIT):
+            if message.author != bot.user or not message.embeds:
+                continue
+            task_ref = task_ref_from_footer(message.embeds[0].footer.text)
+            if task_ref and task_ref[0] == TASK and task_ref[1] in missing:
+                missing.discard(task_ref[1])
+                backfills.append((task_ref[1], message.id))
+                if not missing:
+                    break
+
+    if backfills:
+        await db_async.update_task_message_ids(backfills)
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logger.info(f"Reconciled {len(tasks)} tasks across {len(by_channel)} channels in {elapsed:.1f} ms: "
+                f"{len(backfills)} message IDs backfilled")
+
+@bot.event
+async def on_ready():
+    print(f'Logged in as {bot.user} (ID: {bot.user.id})')
+    print(f'Guild ID: {bot.guilds[0].id if bot.guilds else "Not in any guild"}')
+    print(f'Bot ID: {bot.user.id}') #Bot ID
+    await reconcile_task_messages()
+    for guild in bot.guilds:
+        resolve_role_ids(guild)
+    if not log_metrics.is_running():
+        log_metrics.start()
+    print(f'{bot.user} is ready and tracking task messages.')
+
+# Role IDs are resolved from names, so re-resolve a guild whenever its roles change
+@bot.event
+async def on_guild_role_update(before, after):
+    resolve_role_ids(after.guild)
+
+@bot.event
+async def on_guild_role_create(role):
+    resolve_role_ids(role.guild)
+
+@bot.event
+async def on_guild_role_delete(role):
+    resolve_role_ids(role.guild)
+
+@bot.event
+async def on_app_command_completion(interaction: discord.Interaction, command):
+    record_command_timing(interaction, command)
+
+# Periodic dump of the timings to the log
+@tasks.loop(minutes=metrics_log_interval)
+async def log_metrics():
+    lines = metrics.report_lines()
+    if len(lines) > 1:
+        logger.info("Latency report:\n" + "\n".join(lines))
+
+@bot.event
+async def on_message(message):
+	print(f'Message from {message.author}: {message.content}')
+	await bot.process_commands(message)
+      
+@bot.event
+async def on_member_join(member):
+    # Replace these IDs with your actual channel IDs
+    # TO DO: Move those values to .json config file
+    how_to_verify_channel_id = config['how_to_verify_channel_id']
+    verification_channel_id = config['verification_channel_id']
+    welcome_channel_id = config['welcome_channel_id']
+
+    # Get the welcome channel using its ID
+    channel = bot.get_channel(welcome_channel_id)
+    
+    if channel:  # Ensure the channel exists
+        # Format the welcome message with correct channel mentions using their IDs
+        await channel.send(
+            f"<:RCL:{1301341129559638087}> Welcome {member.mention}! Please follow the instructions in <#{how_to_verify_channel_id}> "
+            f"and submit your images in <#{verification_channel_id}>. <:RCL:{1301341129559638087}>"
+        )
+#-- Slash Commands --
+#Parameters for help slash command can be added in def help()
+@bot.tree.command()
+async def help(interaction: discord.Interaction):
+    """Bot manual"""  # Description when viewing / commands
+    help_view = PaginationView(help_manual_data)
+    await help_view.send(interaction)
+
+#------ Sync Tree ------
+guild = discord.Object(id='1055525730143969350')
+# Get Guild ID from right clicking on server icon
+# Must have developer mode on discord on setting>Advance>Developer Mode
+# More info on tree can be found on discord.py Git Repo
+@bot.command()
+@commands.guild_only()
+@commands.is_owner()
+async def sync(
+	ctx: Context, guilds: Greedy[discord.Object], spec: Optional[Literal["~", "*", "^"]] = None) -> None:
+	if not guilds:
+		if spec == "~":
+			synced = await ctx.bot.tree.sync(guild=ctx.guild)
+		elif spec == "*":
+			ctx.bot.tree.copy_global_to(guild=ctx.guild)
+			synced = await ctx.bot.tree.sync(guild=ctx.guild)
+		elif spec == "^":
+			ctx.bot.tree.clear_commands(guild=ctx.guild)
+			await ctx.bot.tree.sync(guild=ctx.guild)
+			synced = []
+		else:
+			synced = await ctx.bot.tree.sync()
+		await ctx.send(
+			f"Synced {len(synced)} commands {'globally' if spec is None else 'to the current guild.'}"
+		)
+		return
+		
+	ret = 0
+	for guild in guilds:
+		try:
+			await ctx.bot.tree.sync(guild=guild)
+		except discord.HTTPException:
+			pass
+		else:
+			ret += 1
+			
+	await ctx.send(f"Synced the tree to {ret}/{len(guilds)}.")
+
+@bot.tree.command()
+@has_command_use_role()
+async def add_item(interaction: discord.Interaction, item_name: str, production_facility: str, can_be_crated : str, can_be_palleted : str, crate_size: int, pallet_size : int):
+	"""Add item to the database"""
+	if await db_async.get_item_by_name(item_name):
+		await interaction.response.send_message(f"An item named '{item_name}' already exists.", ephemeral=True)
+		return
+
+	# Prompt first - Discord wants a response within 3 seconds and a slow wiki can take far longer
+	await interaction.response.send_message("Please enter aliases for item (separate by commas - e.g. \"pcons, pcmats, pcm\"):")
+	
+	# Scrape the image while the user types the aliases
+	image_task = asyncio.ensure_future(scraphauler.scrape_image(item_name))
+	facilities = await db_async.get_facility_from_db(production_facility)
+	
+	# Wait for user input for aliases
+	aliases_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
+	item_aliases = aliases_msg.content
+	alias_list = item_aliases.split(',')
+	formatted_aliases = ",".join([f",{alias.strip()}," for alias in alias_list if alias.strip()])  # Strip spaces
+	item_aliases = formatted_aliases
+	image_url = await image_task
+	
+	# Store in the database - the name may have been taken while the aliases were typed
+	try:
+		await db_async.add_item_to_db(item_name, item_aliases, facilities, can_be_crated, can_be_palleted, 
+								crate_size, pallet_size, image_url)
+	except db_manager.DuplicateNameError as e:
+		await interaction.followup.send(f"{e}.")
+		return
+
+	# Confirm the entry
+	await interaction.followup.send(f"Added {item_name} to the database with aliases: {item_aliases}.")
+	
+@bot.tree.command()
+@has_command_use_role()
+async def add_facility(interaction: discord.Interaction, facility_name: str):
+	"""Add facility to the database"""
+	if await db_async.get_facility_by_name(facility_name):
+		await interaction.response.send_message(f"A facility named '{facility_name}' already exists.", ephemeral=True)
+		return
+
+	# First response with the initial prompt
+	await interaction.response.send_message("Please enter aliases for this facility (separate by commas):")
+	
+	# Wait for user input for aliases
+	facility_aliases_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
+	facility_aliases = facility_aliases_msg.content
+	alias_list = facility_aliases.split(',')
+	formatted_aliases = ",".join([f",{alias.strip()}," for alias in alias_list if alias.strip()])  # Strip spaces
+	facility_aliases = formatted_aliases
+	
+	# Ask for facility type
+	await interaction.followup.send("Is this facility World-built or Player-built?")
+	
+	facility_type_msg = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
+	facility_type = facility_type_msg.content
+
+	# Scrape image URL
+	image_url = await scraphauler.scrape_image(facility_name)
+	
+	# Add the facility to the database - the name may have been taken while the aliases were typed
+	try:
+		await db_async.add_facility_to_db(facility_name, facility_aliases, facility_type, image_url)
+	except db_manager.DuplicateNameError as e:
+		await interaction.followup.send(f"{e}.")
+		return
+	
+	# Confirm the addition
+	await interaction.followup.send(f"Added {facility_name} to the database with aliases: {facility_aliases}.")
+
+@bot.tree.command()
+@has_critical_command_use_role()
+async def bulk_import_catalog(interaction: discord.Interaction, kind: Literal["items", "facilities"], names: Optional[str] = None, category: Optional[str] = None, facility_type: Optional[str] = None):
+	"""Import many items or facilities from the wiki (comma separated names and/or a wiki category)"""
+	name_list = names.split(',') if names else []
+	await interaction.response.send_message(f"Starting {kind} import...")
+	
+	if category:
+		try:
+			name_list.extend(await scraphauler.category_members(category))
+		except Exception as e:
+			await interaction.edit_original_response(content=f"Could not list category '{category}': {e}")
+			return
+	
+	if not name_list:
+		await interaction.edit_original_response(content="Give some names or a wiki category to import.")
+		return
+	
+	# Keep the first message updated while pages are scraped
+	async def show_progress(report):
+		await interaction.edit_original_response(content=report.progress_line())
+	
+	report = await bulk_import.run_import(kind, name_list, facility_type=facility_type, progress=show_progress)
+	summary = report.summary()
+	summary = summary if len(summary) <= 2000 else summary[:1997] + "..."
+	try:
+		await interaction.followup.send(summary)
+	except discord.HTTPException:
+		# Interaction tokens expire after 15 minutes, which a long import can outlast
+		await interaction.channel.send(summary)
+
+@bot.tree.command()
+@has_command_use_role()
+async def add_stockpile(interaction: discord.Interaction, stockpile_name : str, stockpile_description : str, stockpile_location : str, stockpile_passcode : int):
+	"""Add a stockpile to the database"""
+	
+	# Store in the database
+	try:
+		await db_async.add_stockpile_to_db(stockpile_name, stockpile_description, stockpile_location, stockpile_passcode)
+	except db_manager.DuplicateNameError as e:
+		await interaction.response.send_message(f"{e}.", ephemeral=True)
+		return
+
+	# Confirm the entry
+	await interaction.response.send_message(f"Added stockpile {stockpile_name} at {stockpile_location} with passcode {stockpile_passcode}. Description: {stockpile_description}.")
+	
+
+@bot.tree.command()
+@has_command_use_role()
+@app_commands.autocomplete(item_name=item_autocomplete, facility=facility_autocomplete, stockpile=stockpile_autocomplete)
+async def create_task(interaction: discord.Interaction, item_name: str, amount: int, facility: str, stockpile: str):
+    """Create a new production task"""
+    
+    # Query the item, facility, and stockpile from the database
+    item_info = await db_async.get_item_from_db(item_name)
+    facility_info = await db_async.get_facility_from_db(facility)
+    stockpile_info = await db_async.get_stockpile_from_db(stockpile)
+
+    # Handle cases where the item, facility, or stockpile aren't found
+    if not item_info:
+        await interaction.response.send_message(f"Item '{item_name}' not found.")
+        return
+    if not facility_info:
+        await interaction.response.send_message(f"Production facility '{facility}' not found.")
+        return
+    if not stockpile_info:
+        await interaction.response.send_message(f"Stockpile '{stockpile}' not found.")
+        return
+    
+    assigned_users = [str(interaction.user.id)]
+    created_by = str(interaction.user.id)
+    thumbnail = item_info['image_url']
+    
+    # Insert the new task into the database
+    task_id = await db_async.create_task(item_info['id'], amount, facility_info['id'], stockpile_info['id'], created_by, assigned_users, thumbnail)
+    
+    if task_id:
+        task_data = {
+            'id': task_id,
+            'item_name': item_info['item_name'],
+            'amount': amount,
+            'current_amount': 0,
+            'facility_name': facility_info['facility_name'],
+            'stockpile_name': stockpile_info['stockpile_name'],
+            'created_by': created_by,
+            'assigned_users': assigned_users,
+            'thumbnail': thumbnail,
+            'status': 'running'  # Add this line
+        }
+        task_embed_on_create = task_embed(task_data)
+        view = TaskManagerView(task_id)
+        
+        await interaction.response.send_message(embed=task_embed_on_create, view=view)
+        # Save the task message
+        message = await interaction.original_response()
+        await db_async.save_task_message(task_id, message.id, interaction.channel_id)
+    else:
+        await interaction.response.send_message("Failed to create task in the database")
+
+@bot.tree.command()
+@has_command_use_role()
+async def create_custom_task(interaction: discord.Interaction, task_header: str, task_description: str, task_location: str):
+    """Create a new custom task"""
+    
+    assigned_users = [str(interaction.user.id)]
+    created_by = str(interaction.user.id)
+    
+    # Insert the new task into the database
+    task_id = await db_async.create_custom_task(task_header, task_description, task_location, created_by, assigned_users)
+    
+    if task_id:
+        task_embed_on_create = custom_task_embed({
+            'id': task_id,
+            'task_header': task_header,
+            'task_description': task_description,
+            'task_location': task_location,
+            'created_by': created_by,
+            'assigned_users': assigned_users,
+        })
+        view = CustomTaskManagerView(task_id)
+        
+        await interaction.response.send_message(embed=task_embed_on_create, view=view)
+        # Save the task message
+        message = await interaction.original_response()
+        await db_async.save_custom_task_message(task_id, message.id, interaction.channel_id)
+    else:
+        await interaction.response.send_message("Failed to create task in the database")
+
+@bot.tree.command()
+@has_command_use_role()
+@app_commands.autocomplete(item_name=item_autocomplete)
+async def get_item(interaction: discord.Interaction, item_name: str):
+	"""Retrieve item information from the database based on the search term."""
+
+	# Connect to the database and search for the facility or its alias
+	item_info = await db_async.get_item_from_db(item_name)
+	# Items added without a known facility store an empty object, or null from older imports
+	facilities_list = json.loads(item_info['facilities'] or 'null') if item_info else None
+	facility_name = (facilities_list or {}).get('facility_name') or "Unknown"
+
+	get_item_embed = discord.Embed(
+		colour = discord.Colour.dark_gold(),
+		description = "Processing your request, officer...",
+		title = "Item Database"
+	)
+	
+	get_item_embed.set_author(name="Velian Keeper Bot")
+	
+	# Check if facility info was found
+	if item_info:
+		get_item_embed.add_field(name=":newspaper: Item name", value=item_info['item_name'], inline=True),
+		get_item_embed.insert_field_at(1,name=":round_pushpin: Made at", value=facility_name, inline=True),
+		get_item_embed.add_field(name="Aliases", value=item_info['item_aliases'], inline=False),
+		get_item_embed.add_field(name="Can be crated?", value=item_info['can_be_crated'], inline=True),
+		get_item_embed.add_field(name="Can be palletized?", value=item_info['can_be_palleted'], inline=True),
+		get_item_embed.add_field(name="\u200b", value="\u200b", inline=True),
+		get_item_embed.add_field(name="Crate size", value=item_info['crate_size'], inline=True),
+		get_item_embed.add_field(name="Pallet size", value=item_info['pallet_size'], inline=True),
+		get_item_embed.add_field(name="\u200b", value="\u200b", inline=True),
+		get_item_embed.set_thumbnail(url=item_info['image_url']),
+		await interaction.response.send_message(embed=get_item_embed)
+	else:
+		await interaction.response.send_message(f"No item found for '{item_name}'.")
+		
+@bot.tree.command()
+@has_command_use_role()
+@app_commands.autocomplete(facility_name=facility_autocomplete)
+async def get_facility(interaction: discord.Interaction, facility_name: str):
+	"""Retrieve a facility information."""
+
+	# Connect to the database and search for the facility or its alias
+	facility_info = await db_async.get_facility_from_db(facility_name)
+	get_facility_embed = discord.Embed(
+		colour = discord.Colour.green(),
+		description = "Processing your request, officer...",
+		title = "Facility Knowledge Database"
+	)
+	
+	get_facility_embed.set_author(name="Velian Keeper Bot")
+	
+	# Check if facility info was found
+	if facility_info:
+		get_facility_embed.add_field(name=":newspaper: Facility Name", value=facility_info['facility_name'], inline=True),
+		get_facility_embed.insert_field_at(1,name=":round_pushpin: Build type", value=facility_info['facility_type'], inline=True),
+		get_facility_embed.add_field(name="Aliases", value=facility_info['facility_aliases'], inline=False),
+		get_facility_embed.set_thumbnail(url=facility_info['image_url']),
+		await interaction.response.send_message(embed=get_facility_embed)
+	else:
+		await interaction.response.send_message(f"No facility found for '{facility_name}'.")
+		
+@bot.tree.command()
+@has_command_use_role()
+@app_commands.autocomplete(stockpile_name=stockpile_autocomplete)
+async def get_stockpile(interaction: discord.Interaction, stockpile_name: str):
+	"""Review stockpiles info."""
+
+	# Connect to the database and search for the facility or its alias
+	stockpile_info = await db_async.get_stockpile_from_db(stockpile_name)
+	get_stockpile_embed = discord.Embed(
+		colour = discord.Colour.brand_red(),
+		description = "This is a restricted facility, i hope you got those papers signed.",
+		title = "Stockpile Information"
+	)
+	
+	get_stockpile_embed.set_author(name="Velian Keeper Bot")
+	
+	# Check if facility info was found
+	if stockpile_info:
+		get_stockpile_embed.add_field(name=":newspaper: Stockpile Name", value=stockpile_info['stockpile_name'], inline=True),
+		get_stockpile_embed.insert_field_at(1,name=":map: Location", value=stockpile_info['stockpile_location'], inline=True),
+		get_stockpile_embed.add_field(name="Description:", value=stockpile_info['stockpile_description'], inline=False),
+		get_stockpile_embed.add_field(name="Passcode", value=f"||{stockpile_info['stockpile_passcode']}||", inline=False),
+		get_stockpile_embed.set_thumbnail(url="https://static.wikia.nocookie.net/foxhole_gamepedia_en/images/7/73/Icon_Blueprint.png/revision/latest?cb=20180416214806")
+		await interaction.response.send_message(embed=get_stockpile_embed)
+	else:
+		await interaction.response.send_message(f"No stockpile found for '{stockpile_name}'.")
+	
+@bot.tree.command()
+@has_critical_command_use_role()
+async def purge_all_tasks(interaction: discord.Interaction):
+	await interaction.response.send_message("**THIS WILL DELETE ALL CREATED TASKS. THIS ACTION IS IRREVERSIBLE.** Do you want to delete all current tasks? Type YES to proceed")
+	purge = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
+	
+	if purge.content in ['YES']:
+		await db_async.purge_tasks()
+		await interaction.followup.send("All tasks have been deleted. \n*Now you become death. The destroyer of worlds.*")
+	else :
+		await interaction.followup.send("No action has been taken. All tasks are running.")
+	
+@bot.tree.command()
+@has_critical_command_use_role()
+async def purge_all_stockpiles(interaction: discord.Interaction):
+	await interaction.response.send_message("**THIS WILL DELETE ALL KNOWN STOCKPILES. THIS ACTION IS IRREVERSIBLE.** Do you want to delete all current stockpiles? Type YES to proceed")
+	purge = await bot.wait_for("message", check=lambda m: m.author == interaction.user)
+	
+	if purge.content in ['YES']:
+		await db_async.purge_stockpiles()
+		await interaction.followup.send("All stockpiles have been deleted. \n*Jesus H. Christ, why is your footlocker unlocked?!*")
+	else :
+		await interaction.followup.send("No action has been taken. All tasks are running.")
+
+@bot.tree.command()
+@has_critical_command_use_role()
+async def edit_stockpile(interaction: discord.Interaction, stockpile_name: str):
+    """Edit an existing stockpile in the database"""
+    stockpile = await db_async.get_stockpile_from_db(stockpile_name)
+    if not stockpile:
+        await interaction.response.send_message(f"Stockpile '{stockpile_name}' not found in the database.", ephemeral=True)
+        return
+    
+    await interaction.response.send_modal(EditStockpileModal(stockpile))
+
+@bot.tree.command()
+@has_critical_command_use_role()
+async def edit_item(interaction: discord.Interaction, item_name: str):
+    """Edit an existing item in the database"""
+    item = await db_async.get_item_from_db(item_name)
+    if not item:
+        await interaction.response.send_message(f"Item '{item_name}' not found in the database.", ephemeral=True)
+        return
+    
+    await interaction.response.send_modal(EditItemModalPrimary(item))
+
+@bot.tree.command()
+@has_critical_command_use_role()
+async def delete_item(interaction: discord.Interaction, item_name: str):
+    """Delete an item from the database."""
+    
+    # Check if the item exists using the database manager
+    item_exists = await db_async.get_item_by_name(item_name)
+
+    if item_exists is None:
+        await interaction.response.send_message(f"No item found with the name: {item_name}.", ephemeral=True)
+        return
+
+    # Confirmation message
+    await interaction.response.send_message(f"Are you sure you want to delete the item '{item_name}'? Type 'yes' to confirm.", ephemeral=True)
+
+    # Wait for the user's confirmation
+    def check(m):
+        return m.author == interaction.user and m.content.lower() == "yes"
+
+    try:
+        # Wait for user confirmation
+        msg = await bot.wait_for('message', check=check, timeout=30.0)
+
+        # Delete the item using the database manager
+        await db_async.delete_item_by_name(item_name)
+        
+        await interaction.followup.send(f"Item '{item_name}' has been successfully deleted.", ephemeral=True)
+
+    except asyncio.TimeoutError:
+        await interaction.followup.send("Timeout: Item deletion canceled.", ephemeral=True)
+
+@bot.tree.command()
+@has_critical_command_use_role()
+async def delete_stockpile(interaction: discord.Interaction, stockpile_name: str):
+    """Delete stockpile from the database."""
+    
+    # Check if the item exists using the database manager
+    stockpile_exists = await db_async.get_stockpile_by_name(stockpile_name)
+
+    if stockpile_exists is None:
+        await interaction.response.send_message(f"No stockpile found with the name: {stockpile_exists}.", ephemeral=True)
+        return
+
+    # Confirmation message
+    await interaction.response.send_message(f"Are you sure you want to delete the stockpile '{stockpile_name}'? Type 'yes' to confirm.", ephemeral=True)
+
+    # Wait for the user's confirmation
+    def check(m):
+        return m.author == interaction.user and m.content.lower() == "yes"
+
+    try:
+        # Wait for user confirmation
+        msg = await bot.wait_for('message', check=check, timeout=30.0)
+
+        # Delete the item using the database manager
+        await db_async.delete_stockpile_by_name(stockpile_name)
+        
+        await interaction.followup.send(f"Item '{stockpile_name}' has been successfully deleted.", ephemeral=True)
+
+    except asyncio.TimeoutError:
+        await interaction.followup.send("Timeout: Item deletion canceled.", ephemeral=True)
+
+@bot.event
+async def on_error(event, *args, **kwargs):
+    logger.error(f"An error occurred in event {event}")
+    logger.error(f"Args: {args}")
+    logger.error(f"Kwargs: {kwargs}")
+    logger.error(traceback.format_exc())
+
+@bot.tree.command()
+@has_verification_role()
+async def botstats(interaction: discord.Interaction):
+    """Show command, database and scrape latencies"""
+    lines = metrics.report_lines(limit=25)
+    embed = discord.Embed(title="Bot latency", color=discord.Color.dark_teal())
+    if len(lines) > 1:
+        embed.description = "```\n" + "\n".join(lines)[:4000] + "\n```"
+    else:
+        embed.description = "Nothing has been timed yet."
+    embed.set_footer(text=f"Gateway latency: {bot.latency * 1000:.0f} ms | Slowest 25 by total time")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command()
+@has_command_use_role()
+async def show_all_facilities(interaction: discord.Interaction):
+    """Show all facilities in the database"""
+    facilities = await db_async.get_all_facilities()
+    if not facilities:
+        await interaction.response.send_message("No facilities found in the database.", ephemeral=True)
+        return
+
+    view = PaginatedView(facilities)
+    embed = view.create_embed()
+    await interaction.response.send_message(embed=embed, view=view)
+
+@bot.tree.command()
+@has_command_use_role()
+async def show_all_items(interaction: discord.Interaction):
+    """Show all items in the database"""
+    items = await db_async.get_all_items()
+    if not items:
+        await interaction.response.send_message("No items found in the database.", ephemeral=True)
+        return
+
+    view = PaginatedView(items)
+    embed = view.create_embed()
+    await interaction.response.send_message(embed=embed, view=view)
+
+bot.run(bot_token)
+db_async.shutdown()